@@ -0,0 +1,474 @@
+"""
+Pipeline d'écriture des statistiques de réponses aux quiz.
+
+Chaque réponse produit un AnswerEvent. En mode asynchrone (ANSWER_STATS_ASYNC),
+la requête se contente de l'ajouter à une file; un thread de fond vide la file
+par lots et agrège les événements avant de les écrire en une transaction:
+- questions.times_answered / success_count       (UPDATE ... SET x = x + n)
+- user_question_stats                             (INSERT ... ON CONFLICT DO UPDATE)
+- question_answer_stats                           (INSERT ... ON CONFLICT DO UPDATE)
+- user_stats_rollups (agrégats de /me)            (INSERT ... ON CONFLICT DO UPDATE)
+- user_quiz_sessions (compteurs de la partie)     (UPDATE ... WHERE status <> 'completed')
+
+Sur SQLite, cela remplace un verrou d'écriture par réponse par un verrou par lot.
+La file est vidée à l'arrêt du processus (atexit). Une réponse encore en file
+quand sa session est abandonnée (nouvelle partie, annulation) y est comptée à
+l'écriture du lot; une session terminée n'est plus modifiée: ses compteurs
+définitifs sont écrits à la clôture depuis l'état de quiz, qui inclut toutes
+les réponses. La requête n'attend donc jamais la file (ni celle d'un autre processus).
+
+Tous les compteurs sont incrémentés côté SQL (jamais lus puis réécrits en Python),
+y compris en mode synchrone: des réponses concurrentes ne perdent aucune mise à jour.
+Les upserts reposent sur les contraintes uniques (user_id, question_id) et
+(question_id, answer_index); voir migrate_add_stats_unique_constraints.py pour
+les bases créées avant ces contraintes.
+"""
+
+import atexit
+import queue
+import threading
+from datetime import datetime
+from typing import NamedTuple
+
+from sqlalchemy import bindparam, case, func, inspect, literal, select, text
+from sqlalchemy.exc import IntegrityError
+
+from models import db, Question, UserQuestionStat, QuestionAnswerStat, UserQuizSession, UserStatsRollup
+from app_logging import get_logger
+
+logger = get_logger('stats')
+
+
+class AnswerEvent(NamedTuple):
+    question_id: int
+    user_id: int | None
+    selected_answer: str          # index original (1-based) de la réponse choisie, '' si aucune
+    is_correct: bool
+    score: int = 0
+    quiz_session_id: int | None = None
+    answered_at: datetime | None = None
+
+
+def _dialect_insert(table):
+    """Retourne l'INSERT du dialecte courant s'il supporte ON CONFLICT DO UPDATE, sinon None."""
+    dialect = db.session.get_bind().dialect.name
+    if dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+    elif dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        return None
+    return insert(table)
+
+
+def _increment_or_insert(table, keys: dict, increments: dict, assignments: dict):
+    """Incrémente les compteurs d'une ligne identifiée par une clé unique, en une instruction.
+    Si la ligne n'existe pas, l'insère; si une autre transaction l'a insérée entre-temps
+    (violation de la contrainte unique), refait l'UPDATE.
+    """
+    where = [table.c[name] == value for name, value in keys.items()]
+    values = {name: table.c[name] + delta for name, delta in increments.items()}
+    values.update(assignments)
+    if db.session.execute(table.update().where(*where).values(**values)).rowcount:
+        return
+    try:
+        with db.session.begin_nested():
+            db.session.execute(table.insert().values(**keys, **increments, **assignments))
+    except IntegrityError:
+        db.session.execute(table.update().where(*where).values(**values))
+
+
+# Contraintes uniques nécessaires aux upserts: (table, nom, colonnes)
+STATS_UNIQUE_INDEXES = (
+    ('user_question_stats', 'uq_user_question', ('user_id', 'question_id')),
+    ('question_answer_stats', 'uq_question_answer_index_stat', ('question_id', 'answer_index')),
+    ('user_stats_rollups', 'uq_user_stats_rollup', ('user_id', 'dimension', 'dim_key')),
+)
+
+
+def missing_stats_unique_indexes() -> list[tuple[str, str, tuple[str, ...]]]:
+    """Retourne les contraintes uniques de STATS_UNIQUE_INDEXES absentes de la base."""
+    inspector = inspect(db.engine)
+    missing = []
+    for table, name, columns in STATS_UNIQUE_INDEXES:
+        if not inspector.has_table(table):
+            continue
+        existing = [set(uc['column_names']) for uc in inspector.get_unique_constraints(table)]
+        existing += [set(ix['column_names']) for ix in inspector.get_indexes(table) if ix.get('unique')]
+        if set(columns) not in existing:
+            missing.append((table, name, columns))
+    return missing
+
+
+def ensure_stats_unique_indexes() -> list[str]:
+    """Crée les index uniques manquants (échoue s'il reste des doublons). Retourne les noms créés."""
+    created = []
+    for table, name, columns in missing_stats_unique_indexes():
+        db.session.execute(text(f"CREATE UNIQUE INDEX {name} ON {table} ({', '.join(columns)})"))
+        db.session.commit()
+        created.append(name)
+    return created
+
+
+def apply_answer_events(events) -> None:
+    """Agrège une liste d'AnswerEvent et les écrit en une seule transaction (commit inclus)."""
+    if not events:
+        return
+
+    question_deltas: dict[int, list] = {}
+    user_deltas: dict[tuple[int, int], dict] = {}
+    answer_deltas: dict[tuple[int, int], int] = {}
+    session_deltas: dict[int, list] = {}
+
+    for event in events:
+        answered_at = event.answered_at or datetime.utcnow()
+        success = 1 if event.is_correct else 0
+
+        delta = question_deltas.setdefault(event.question_id, [0, 0, answered_at])
+        delta[0] += 1
+        delta[1] += success
+        delta[2] = max(delta[2], answered_at)
+
+        if event.user_id:
+            row = user_deltas.get((event.user_id, event.question_id))
+            if row is None:
+                row = user_deltas[(event.user_id, event.question_id)] = {
+                    'user_id': event.user_id,
+                    'question_id': event.question_id,
+                    'times_answered': 0,
+                    'success_count': 0,
+                }
+            row['times_answered'] += 1
+            row['success_count'] += success
+            # Les champs "last_*" reflètent le dernier événement du lot
+            row['last_selected_answer'] = event.selected_answer
+            row['last_is_correct'] = bool(event.is_correct)
+            row['last_answered_at'] = answered_at
+            row['updated_at'] = answered_at
+
+        if event.selected_answer and event.selected_answer.isdigit():
+            key = (event.question_id, int(event.selected_answer))
+            answer_deltas[key] = answer_deltas.get(key, 0) + 1
+
+        if event.quiz_session_id:
+            delta = session_deltas.setdefault(event.quiz_session_id, [0, 0, 0, answered_at])
+            delta[0] += 1
+            delta[1] += success
+            delta[2] += int(event.score or 0) if event.is_correct else 0
+            delta[3] = max(delta[3], answered_at)
+
+    try:
+        _apply_question_deltas(question_deltas)
+        _apply_user_deltas(list(user_deltas.values()))
+        _apply_rollup_deltas(list(user_deltas.values()))
+        _apply_answer_deltas(answer_deltas)
+        _apply_session_deltas(session_deltas)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+
+def _apply_question_deltas(question_deltas: dict[int, list]):
+    if not question_deltas:
+        return
+    t = Question.__table__
+    stmt = (t.update()
+            .where(t.c.id == bindparam('b_id'))
+            .values(times_answered=func.coalesce(t.c.times_answered, 0) + bindparam('b_answered'),
+                    success_count=func.coalesce(t.c.success_count, 0) + bindparam('b_success'),
+                    updated_at=bindparam('b_at')))
+    db.session.execute(stmt, [
+        {'b_id': qid, 'b_answered': answered, 'b_success': success, 'b_at': at}
+        for qid, (answered, success, at) in question_deltas.items()
+    ])
+
+
+def _apply_user_deltas(rows: list[dict]):
+    if not rows:
+        return
+    t = UserQuestionStat.__table__
+    insert = _dialect_insert(t)
+    if insert is not None:
+        stmt = insert.on_conflict_do_update(
+            index_elements=['user_id', 'question_id'],
+            set_={
+                'times_answered': t.c.times_answered + insert.excluded.times_answered,
+                'success_count': t.c.success_count + insert.excluded.success_count,
+                'last_selected_answer': insert.excluded.last_selected_answer,
+                'last_is_correct': insert.excluded.last_is_correct,
+                'last_answered_at': insert.excluded.last_answered_at,
+                'updated_at': insert.excluded.updated_at,
+            })
+        db.session.execute(stmt, rows)
+        return
+
+    # Autres moteurs: UPDATE atomique, puis INSERT si la ligne n'existe pas encore
+    for row in rows:
+        _increment_or_insert(
+            t,
+            keys={'user_id': row['user_id'], 'question_id': row['question_id']},
+            increments={'times_answered': row['times_answered'], 'success_count': row['success_count']},
+            assignments={k: row[k] for k in ('last_selected_answer', 'last_is_correct', 'last_answered_at', 'updated_at')},
+        )
+
+
+def _apply_answer_deltas(answer_deltas: dict[tuple[int, int], int]):
+    if not answer_deltas:
+        return
+    t = QuestionAnswerStat.__table__
+    now = datetime.utcnow()
+    rows = [
+        {'question_id': qid, 'answer_index': idx, 'selected_count': count, 'updated_at': now}
+        for (qid, idx), count in answer_deltas.items()
+    ]
+    insert = _dialect_insert(t)
+    if insert is not None:
+        stmt = insert.on_conflict_do_update(
+            index_elements=['question_id', 'answer_index'],
+            set_={
+                'selected_count': t.c.selected_count + insert.excluded.selected_count,
+                'updated_at': insert.excluded.updated_at,
+            })
+        db.session.execute(stmt, rows)
+        return
+
+    for row in rows:
+        _increment_or_insert(
+            t,
+            keys={'question_id': row['question_id'], 'answer_index': row['answer_index']},
+            increments={'selected_count': row['selected_count']},
+            assignments={'updated_at': row['updated_at']},
+        )
+
+
+def _add_rollup_delta(deltas: dict, user_id: int, dims: tuple, answered: int, success: int, with_total: bool = True):
+    """Ajoute (answered, success) aux dimensions d'une question: dims = (thème, sous-thème, difficulté)."""
+    broad_theme_id, specific_theme_id, difficulty = dims
+    keys = [('broad_theme', broad_theme_id or 0),
+            ('specific_theme', specific_theme_id or 0),
+            ('difficulty', difficulty or 0)]
+    if with_total:
+        keys.insert(0, ('total', 0))
+    for dimension, key in keys:
+        delta = deltas.setdefault((user_id, dimension, key), [0, 0])
+        delta[0] += answered
+        delta[1] += success
+
+
+def _apply_rollup_deltas(user_rows: list[dict]):
+    """Répercute les réponses dans user_stats_rollups (total, thème, sous-thème, difficulté)."""
+    if not user_rows:
+        return
+    question_ids = {row['question_id'] for row in user_rows}
+    dims_by_question = {
+        qid: (broad_theme_id, specific_theme_id, difficulty)
+        for qid, broad_theme_id, specific_theme_id, difficulty in db.session.query(
+            Question.id, Question.broad_theme_id, Question.specific_theme_id, Question.difficulty_level
+        ).filter(Question.id.in_(question_ids))
+    }
+
+    deltas: dict[tuple[int, str, int], list[int]] = {}
+    for row in user_rows:
+        _add_rollup_delta(deltas, row['user_id'], dims_by_question.get(row['question_id'], (None, None, None)),
+                          row['times_answered'], row['success_count'])
+    _upsert_rollup_deltas(deltas)
+
+
+def _upsert_rollup_deltas(deltas: dict[tuple[int, str, int], list[int]]):
+    t = UserStatsRollup.__table__
+    now = datetime.utcnow()
+    rows = [
+        {'user_id': user_id, 'dimension': dimension, 'dim_key': key, 'answered': answered, 'success': success, 'updated_at': now}
+        for (user_id, dimension, key), (answered, success) in deltas.items()
+        if answered or success
+    ]
+    if not rows:
+        return
+    insert = _dialect_insert(t)
+    if insert is not None:
+        stmt = insert.on_conflict_do_update(
+            index_elements=['user_id', 'dimension', 'dim_key'],
+            set_={
+                'answered': t.c.answered + insert.excluded.answered,
+                'success': t.c.success + insert.excluded.success,
+                'updated_at': insert.excluded.updated_at,
+            })
+        db.session.execute(stmt, rows)
+        return
+
+    for row in rows:
+        _increment_or_insert(
+            t,
+            keys={'user_id': row['user_id'], 'dimension': row['dimension'], 'dim_key': row['dim_key']},
+            increments={'answered': row['answered'], 'success': row['success']},
+            assignments={'updated_at': row['updated_at']},
+        )
+
+
+def move_question_rollups(question_id: int, old_dims: tuple, new_dims: tuple | None = None):
+    """Déplace les réponses d'une question d'une dimension à l'autre dans user_stats_rollups (sans commit).
+
+    old_dims / new_dims: (broad_theme_id, specific_theme_id, difficulty_level) avant / après la
+    modification. new_dims=None: la question est supprimée, ses réponses sont retirées (total compris).
+    À appeler dans la transaction qui modifie ou supprime la question, avant de supprimer
+    ses user_question_stats.
+    """
+    answers = (db.session.query(UserQuestionStat.user_id, UserQuestionStat.times_answered, UserQuestionStat.success_count)
+               .filter(UserQuestionStat.question_id == question_id)
+               .all())
+    if not answers:
+        return
+    deltas: dict[tuple[int, str, int], list[int]] = {}
+    for user_id, answered, success in answers:
+        _add_rollup_delta(deltas, user_id, old_dims, -answered, -success, with_total=new_dims is None)
+        if new_dims is not None:
+            _add_rollup_delta(deltas, user_id, new_dims, answered, success, with_total=False)
+    _upsert_rollup_deltas(deltas)
+    # Dimensions vidées: plus de ligne (comme après rebuild_user_stats_rollup)
+    UserStatsRollup.query.filter(
+        UserStatsRollup.user_id.in_({user_id for user_id, _, _ in answers}),
+        UserStatsRollup.answered <= 0,
+    ).delete(synchronize_session=False)
+
+
+def rebuild_user_stats_rollup(user_id: int | None = None) -> int:
+    """Reconstruit user_stats_rollups depuis user_question_stats (tous les utilisateurs si user_id est None).
+    Retourne le nombre de lignes créées.
+    """
+    query = UserStatsRollup.query
+    if user_id is not None:
+        query = query.filter(UserStatsRollup.user_id == user_id)
+    query.delete(synchronize_session=False)
+
+    now = datetime.utcnow()
+    dimensions = (
+        ('total', literal(0)),
+        ('broad_theme', func.coalesce(Question.broad_theme_id, 0)),
+        ('specific_theme', func.coalesce(Question.specific_theme_id, 0)),
+        ('difficulty', func.coalesce(Question.difficulty_level, 0)),
+    )
+    created = 0
+    for dimension, key_expr in dimensions:
+        stmt = select(
+            UserQuestionStat.user_id,
+            literal(dimension),
+            key_expr,
+            func.coalesce(func.sum(UserQuestionStat.times_answered), 0),
+            func.coalesce(func.sum(UserQuestionStat.success_count), 0),
+            literal(now),
+        )
+        if user_id is not None:
+            stmt = stmt.where(UserQuestionStat.user_id == user_id)
+        # Le total (comme l'ancien calcul de /me) ne dépend pas de la question
+        if dimension == 'total':
+            stmt = stmt.group_by(UserQuestionStat.user_id)
+        else:
+            stmt = (stmt.join(Question, Question.id == UserQuestionStat.question_id)
+                    .group_by(UserQuestionStat.user_id, key_expr))
+        result = db.session.execute(UserStatsRollup.__table__.insert().from_select(
+            ['user_id', 'dimension', 'dim_key', 'answered', 'success', 'updated_at'], stmt))
+        created += max(result.rowcount or 0, 0)
+    db.session.commit()
+    return created
+
+
+def _apply_session_deltas(session_deltas: dict[int, list]):
+    if not session_deltas:
+        return
+    t = UserQuizSession.__table__
+    answered = func.coalesce(t.c.answered_count, 0) + bindparam('b_answered')
+    stmt = (t.update()
+            .where(t.c.id == bindparam('b_id'))
+            # Abandonnée: réponse arrivée après la clôture, comptée; terminée: compteurs définitifs
+            .where(t.c.status != 'completed')
+            .values(answered_count=case((answered > t.c.total_questions, t.c.total_questions), else_=answered),
+                    correct_count=func.coalesce(t.c.correct_count, 0) + bindparam('b_correct'),
+                    total_score=func.coalesce(t.c.total_score, 0) + bindparam('b_score'),
+                    updated_at=bindparam('b_at')))
+    db.session.execute(stmt, [
+        {'b_id': sid, 'b_answered': n, 'b_correct': correct, 'b_score': score, 'b_at': at}
+        for sid, (n, correct, score, at) in session_deltas.items()
+    ])
+
+
+class AnswerStatsPipeline:
+    """File d'événements de réponses vidée par un thread de fond (write-behind).
+
+    En mode synchrone (async_mode=False), submit() écrit immédiatement dans la requête.
+    """
+
+    def __init__(self, app, async_mode: bool = False, batch_size: int = 200, flush_interval: float = 1.0):
+        self.app = app
+        self.async_mode = async_mode
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: queue.Queue[AnswerEvent] = queue.Queue()
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._atexit_registered = False
+
+    def submit(self, event: AnswerEvent):
+        """Enregistre une réponse (ajout à la file en mode asynchrone)."""
+        if not self.async_mode:
+            apply_answer_events([event])
+            return
+        self._ensure_worker()
+        self._queue.put(event)
+
+    def _ensure_worker(self):
+        # Démarrage paresseux: un thread démarré avant un fork (serveur multi-processus) ne survivrait pas
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._run, name='answer-stats-writer', daemon=True)
+            self._thread.start()
+            if not self._atexit_registered:
+                atexit.register(self.shutdown)
+                self._atexit_registered = True
+
+    def _next_batch(self, block: bool) -> list[AnswerEvent]:
+        batch = []
+        try:
+            batch.append(self._queue.get(timeout=self.flush_interval) if block else self._queue.get_nowait())
+            while len(batch) < self.batch_size:
+                batch.append(self._queue.get_nowait())
+        except queue.Empty:
+            pass
+        return batch
+
+    def _write_batch(self, batch: list[AnswerEvent]):
+        with self.app.app_context():
+            try:
+                apply_answer_events(batch)
+            except Exception:
+                logger.exception("Erreur lors de l'écriture d'un lot de %s réponses", len(batch))
+
+    def _run(self):
+        while not self._stopping.is_set():
+            batch = self._next_batch(block=True)
+            if batch:
+                self._write_batch(batch)
+
+    def flush(self):
+        """Écrit immédiatement tous les événements en attente (dans le thread appelant)."""
+        while True:
+            batch = self._next_batch(block=False)
+            if not batch:
+                return
+            self._write_batch(batch)
+
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    def shutdown(self, timeout: float = 5.0):
+        """Arrête le thread de fond puis vide la file (appelé à l'arrêt du processus)."""
+        self._stopping.set()
+        thread = self._thread
+        if thread is not None and thread.is_alive():
+            thread.join(timeout)
+        self.flush()
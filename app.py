@@ -1,27 +1,49 @@
-from flask import Flask, render_template, request, send_from_directory, redirect, session, g, url_for, make_response, flash
-from models import db, Question, BroadTheme, SpecificTheme, User, Country, ImageAsset, AnswerImageLink, QuizRuleSet, UserQuestionStat, UserQuizSession, QuestionAnswerStat, Profile, Conversation, ConversationParticipant, ConversationMessage, QuestionReport, ContactMessage, Keyword
+from flask import Flask, render_template, request, redirect, session, g, url_for, make_response, flash, Response, stream_with_context
+from models import db, Question, BroadTheme, SpecificTheme, User, Country, ImageAsset, AnswerImageLink, QuizRuleSet, UserQuestionStat, UserQuizSession, QuestionAnswerStat, Profile, Conversation, ConversationParticipant, ConversationMessage, QuestionReport, ContactMessage, Keyword, UserStatsRollup, normalize_keyword_name, question_keywords
 from datetime import datetime
+import bisect
 import random
 import os
+import logging
 import re
 import json
+import base64
 from werkzeug.security import check_password_hash, generate_password_hash
-from sqlalchemy import func, text, or_
+from sqlalchemy import func, text, or_, and_, literal
+from sqlalchemy.exc import IntegrityError
 from itsdangerous import URLSafeTimedSerializer, BadSignature, SignatureExpired
 import io
-try:
-    from PIL import Image
-except Exception:
-    Image = None
 from unidecode import unidecode
 from email_utils import send_email_optional
 from config import config
+from quiz_index import get_question_index, invalidate_question_index
+from keyword_selection import select_by_keyword_masks
+from quiz_state import create_quiz_state_store, new_quiz_token
+from answer_stats import AnswerStatsPipeline, AnswerEvent, ensure_stats_unique_indexes, rebuild_user_stats_rollup, move_question_rollups
+from question_search import ensure_search_index, search_hits
+from reference_cache import get_reference_data, invalidate_reference_data
+from rule_set_cache import get_rule_set, invalidate_rule_sets
+from fragment_cache import cached_fragment
+from image_variants import apply_variants, remove_variant_files, DEFAULT_VARIANT_WIDTHS
+from image_pipeline import ImageOptimizationPipeline, STATUS_PENDING, STATUS_READY
+from image_storage import sha256_stream, find_image_by_hash, store_upload, is_file_shared
+from static_assets import send_asset, file_fingerprint, is_content_addressed
+from app_logging import setup_logging, get_logger
 
 app = Flask(__name__)
 
 # Configuration selon l'environnement
 config_name = os.environ.get('FLASK_ENV') or 'development'
 app.config.from_object(config[config_name])
+
+# Journalisation non bloquante (file + thread d'écriture), niveaux par sous-système
+setup_logging(app.config['LOG_LEVEL'], app.config['LOG_LEVELS'])
+logger = get_logger('app')
+quiz_logger = get_logger('quiz')
+playlist_logger = get_logger('quiz.playlist')
+shuffle_logger = get_logger('quiz.shuffle')
+contact_logger = get_logger('contact')
+messages_logger = get_logger('messages')
 app.config['UPLOAD_FOLDER'] = os.path.join(os.getcwd(), 'static', 'uploads')
 app.config['MAX_CONTENT_LENGTH'] = 10 * 1024 * 1024  # 10MB
 app.config['SOUNDS_FOLDER'] = os.path.join(os.getcwd(), 'ressources', 'sounds')
@@ -30,6 +52,29 @@ os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
 
 db.init_app(app)
 
+# État des parties de quiz côté serveur (le cookie de session ne porte qu'un jeton opaque)
+quiz_state_store = create_quiz_state_store(
+    app.config['QUIZ_STATE_BACKEND'],
+    app.config['QUIZ_STATE_TTL'],
+    app.config['QUIZ_STATE_MAX_ENTRIES'],
+)
+
+# Statistiques de réponses: écriture immédiate ou différée par lots (ANSWER_STATS_ASYNC)
+answer_stats_pipeline = AnswerStatsPipeline(
+    app,
+    async_mode=app.config['ANSWER_STATS_ASYNC'],
+    batch_size=app.config['ANSWER_STATS_BATCH_SIZE'],
+    flush_interval=app.config['ANSWER_STATS_FLUSH_INTERVAL'],
+)
+
+# Optimisation des images envoyées (WebP, variantes): pool de processus ou dans la requête (IMAGE_OPTIMIZE_ASYNC)
+image_pipeline = ImageOptimizationPipeline(
+    app,
+    async_mode=app.config['IMAGE_OPTIMIZE_ASYNC'],
+    max_workers=app.config['IMAGE_OPTIMIZE_WORKERS'],
+    widths=app.config.get('IMAGE_VARIANT_WIDTHS') or DEFAULT_VARIANT_WIDTHS,
+)
+
 # Créer les tables
 with app.app_context():
     db.create_all()
@@ -59,10 +104,91 @@ with app.app_context():
             if 'is_private' not in existing_cols_questions:
                 db.session.execute(text("ALTER TABLE questions ADD COLUMN is_private BOOLEAN NOT NULL DEFAULT 0"))
             db.session.commit()
+
+            # Migration pour la table keywords: nom normalisé (détection des doublons par index unique)
+            result_keywords = db.session.execute(text("PRAGMA table_info(keywords)"))
+            if 'normalized_name' not in {row[1] for row in result_keywords.fetchall()}:
+                db.session.execute(text("ALTER TABLE keywords ADD COLUMN normalized_name VARCHAR(100)"))
+                db.session.commit()
+            pending = db.session.execute(text("SELECT id, name FROM keywords WHERE normalized_name IS NULL ORDER BY id")).fetchall()
+            if pending:
+                taken = {row[0] for row in db.session.execute(text("SELECT normalized_name FROM keywords WHERE normalized_name IS NOT NULL"))}
+                skipped = 0
+                for keyword_id, keyword_name in pending:
+                    normalized = normalize_keyword_name(keyword_name)
+                    if normalized in taken:
+                        # Doublon existant: laissé à migrate_keyword_normalized_name.py (fusion)
+                        skipped += 1
+                        continue
+                    taken.add(normalized)
+                    db.session.execute(text("UPDATE keywords SET normalized_name = :n WHERE id = :id"), {'n': normalized, 'id': keyword_id})
+                db.session.commit()
+                if skipped:
+                    logger.warning("%s mot(s)-clé(s) en double non normalisé(s), lancer migrate_keyword_normalized_name.py", skipped)
+            db.session.execute(text("CREATE UNIQUE INDEX IF NOT EXISTS ux_keywords_normalized_name ON keywords (normalized_name)"))
+            db.session.commit()
+
+            # Migration pour la table images: dimensions, variantes responsives, placeholder, statut d'optimisation
+            result_images = db.session.execute(text("PRAGMA table_info(images)"))
+            existing_cols_images = {row[1] for row in result_images.fetchall()}
+            for col, col_type in (('width', 'INTEGER'), ('height', 'INTEGER'), ('variants_json', 'TEXT'), ('placeholder', 'TEXT'),
+                                  ('status', "VARCHAR(20) NOT NULL DEFAULT 'ready'"),
+                                  ('content_hash', 'VARCHAR(64)'), ('source_hash', 'VARCHAR(64)')):
+                if col not in existing_cols_images:
+                    db.session.execute(text(f"ALTER TABLE images ADD COLUMN {col} {col_type}"))
+            db.session.commit()
+            # Index des empreintes (déduplication des envois); empreintes des fichiers existants: migrate_image_content_hash.py
+            for index in ImageAsset.__table__.indexes:
+                index.create(bind=db.engine, checkfirst=True)
+
+            # Migration pour la table conversation_participants: compteur de messages non lus
+            result_parts = db.session.execute(text("PRAGMA table_info(conversation_participants)"))
+            existing_cols_parts = {row[1] for row in result_parts.fetchall()}
+            if 'unread_count' not in existing_cols_parts:
+                db.session.execute(text("ALTER TABLE conversation_participants ADD COLUMN unread_count INTEGER NOT NULL DEFAULT 0"))
+                # Initialiser depuis les messages existants (même règle que l'ancien calcul du widget)
+                db.session.execute(text("""
+                    UPDATE conversation_participants SET unread_count = (
+                        SELECT COUNT(*) FROM conversation_messages m
+                        WHERE m.conversation_id = conversation_participants.conversation_id
+                          AND (m.sender_id IS NULL OR m.sender_id != conversation_participants.user_id)
+                          AND (conversation_participants.last_read_at IS NULL
+                               OR m.created_at > conversation_participants.last_read_at)
+                    )
+                """))
+            db.session.execute(text("CREATE INDEX IF NOT EXISTS ix_conversation_participants_user_id ON conversation_participants (user_id)"))
+            # Index de la liste des conversations (tri par activité, dernier message)
+            db.session.execute(text("CREATE INDEX IF NOT EXISTS ix_conversations_updated_at_id ON conversations (updated_at, id)"))
+            db.session.execute(text("CREATE INDEX IF NOT EXISTS ix_conversation_messages_conv_created ON conversation_messages (conversation_id, created_at)"))
+            db.session.commit()
+
+            # Index des clés de tri de la liste des questions
+            for table in (Question.__table__, BroadTheme.__table__, SpecificTheme.__table__):
+                for index in table.indexes:
+                    index.create(bind=db.engine, checkfirst=True)
+
+            # Index uniques requis par les upserts des statistiques de réponses
+            try:
+                ensure_stats_unique_indexes()
+            except Exception as e:
+                db.session.rollback()
+                logger.warning("Index uniques des statistiques non créés (doublons ?), lancer migrate_add_stats_unique_constraints.py: %s", e)
     except Exception:
         # Ne bloque pas l'app; pour autres SGBD, utiliser une migration Alembic
         db.session.rollback()
 
+    # Backfill des agrégats de /me (table user_stats_rollups nouvellement créée)
+    try:
+        if db.session.query(UserStatsRollup.id).first() is None and db.session.query(UserQuestionStat.id).first() is not None:
+            created = rebuild_user_stats_rollup()
+            logger.info("Agrégats de statistiques utilisateurs reconstruits (%s lignes)", created)
+    except Exception as e:
+        db.session.rollback()
+        logger.warning("Reconstruction des agrégats utilisateurs impossible: %s", e)
+
+    # Index plein texte des questions (SQLite FTS5; les autres SGBD gardent la recherche LIKE)
+    ensure_search_index()
+
     # Seed de profils par défaut (idempotent)
     try:
         def ensure_profile(name: str, **perms):
@@ -155,11 +281,11 @@ with app.app_context():
                 )
                 db.session.add(default_admin)
                 db.session.commit()
-                print("[INIT] Administrateur par défaut créé: username='admin', password='admin123'")
+                logger.warning("Administrateur par défaut créé: username='admin', password='admin123'")
 
     except Exception as e:
         db.session.rollback()
-        print(f"[WARN] Erreur lors de l'initialisation des données: {e}")
+        logger.warning("Erreur lors de l'initialisation des données: %s", e)
 
 # ================== Gestion Session / Utilisateur ==================
 
@@ -183,6 +309,33 @@ def _has_perm(perm_attr: str) -> bool:
     return bool(user and user.has_perm(perm_attr))
 
 
+# Permissions des profils (colonnes booléennes can_*)
+_PROFILE_PERMS = tuple(name for name in Profile.__table__.columns.keys() if name.startswith('can_'))
+
+
+def _current_perm_set() -> frozenset:
+    user = getattr(g, 'current_user', None)
+    if not user:
+        return frozenset()
+    return frozenset(name for name in _PROFILE_PERMS if user.has_perm(name))
+
+
+def _render_list_fragment(template: str, tables, load_context, *key) -> str:
+    """Rendu d'une liste HTMX via le cache de fragments
+
+    La clé comprend les versions des `tables` lues par la liste, l'ensemble des
+    permissions de l'utilisateur, l'hôte (URLs absolues) et `key` (filtres).
+    `load_context` n'est appelé (requêtes + rendu) qu'en cas d'absence du cache.
+    """
+    return cached_fragment(
+        template, tables,
+        lambda: render_template(template, **load_context()),
+        key=(_current_perm_set(), request.host_url, *key),
+        max_age=app.config.get('FRAGMENT_CACHE_MAX_AGE'),
+        max_entries=app.config.get('FRAGMENT_CACHE_MAX_ENTRIES', 256),
+    )
+
+
 @app.route('/access-denied')
 def access_denied_page():
     """Page d'explication d'accès refusé."""
@@ -219,34 +372,13 @@ def _deny_access(reason: str):
 
 @app.route('/auth/widget')
 def auth_widget():
-    # Calculer le nombre de messages non lus pour l'utilisateur connecté
+    # Nombre de messages non lus: somme des compteurs de participation (une seule requête)
     unread = 0
     user = getattr(g, 'current_user', None)
     if user and user.password_hash:
-        try:
-            parts = ConversationParticipant.query.filter_by(user_id=user.id).all()
-            print(f"[WIDGET] User {user.username} has {len(parts)} conversation participations")
-            for p in parts:
-                last_read = p.last_read_at or datetime.min
-                # Pour les nouveaux participants (last_read_at=None), compter tous les messages sauf ceux de l'utilisateur
-                if p.last_read_at is None:
-                    count = ConversationMessage.query.filter(
-                        ConversationMessage.conversation_id == p.conversation_id,
-                        or_(ConversationMessage.sender_id.is_(None), ConversationMessage.sender_id != user.id)
-                    ).count()
-                    print(f"[WIDGET] Conversation {p.conversation_id}: NEW participant, messages={count}")
-                else:
-                    count = ConversationMessage.query.filter(
-                        ConversationMessage.conversation_id == p.conversation_id,
-                        ConversationMessage.created_at > last_read,
-                        or_(ConversationMessage.sender_id.is_(None), ConversationMessage.sender_id != user.id)
-                    ).count()
-                    print(f"[WIDGET] Conversation {p.conversation_id}: last_read={p.last_read_at}, messages={count}")
-                unread += count
-            print(f"[WIDGET] Total unread for {user.username}: {unread}")
-        except Exception as e:
-            print(f"[WIDGET] Error calculating unread: {e}")
-            unread = 0
+        unread = (db.session.query(func.coalesce(func.sum(ConversationParticipant.unread_count), 0))
+                  .filter(ConversationParticipant.user_id == user.id)
+                  .scalar()) or 0
     return render_template('auth_widget.html', unread_count=unread)
 
 
@@ -467,94 +599,73 @@ def me_page():
     # Dernières 20 réponses
     stats = (UserQuestionStat.query
              .filter_by(user_id=g.current_user.id)
+             .options(db.joinedload(UserQuestionStat.question).lazyload('*'))
              .order_by(UserQuestionStat.last_answered_at.desc())
              .limit(20)
              .all())
-    # Totaux globaux
-    totals = (db.session.query(
-                    func.coalesce(func.sum(UserQuestionStat.times_answered), 0),
-                    func.coalesce(func.sum(UserQuestionStat.success_count), 0)
-               )
-               .filter(UserQuestionStat.user_id == g.current_user.id)
-               .one())
-    total_answers = totals[0] or 0
-    total_success = totals[1] or 0
-    # Agrégats par thème large
-    agg_broad_rows = (db.session.query(
-                        Question.broad_theme_id,
+    # Agrégats précalculés (user_stats_rollups): une seule requête indexée sur user_id
+    rollup_rows = (db.session.query(
+                        UserStatsRollup.dimension,
+                        UserStatsRollup.dim_key,
+                        UserStatsRollup.answered,
+                        UserStatsRollup.success,
                         BroadTheme.name,
-                        func.coalesce(func.sum(UserQuestionStat.times_answered), 0),
-                        func.coalesce(func.sum(UserQuestionStat.success_count), 0)
-                      )
-                      .join(Question, Question.id == UserQuestionStat.question_id)
-                      .outerjoin(BroadTheme, BroadTheme.id == Question.broad_theme_id)
-                      .filter(UserQuestionStat.user_id == g.current_user.id)
-                      .group_by(Question.broad_theme_id, BroadTheme.name)
-                      .order_by(func.coalesce(func.sum(UserQuestionStat.times_answered), 0).desc())
-                      .all())
-    agg_by_broad = [
-        {
-            'theme_id': row[0],
-            'theme_name': row[1] or 'Sans thème',
-            'answered': int(row[2] or 0),
-            'success': int(row[3] or 0),
-            'rate': (float(row[3]) / float(row[2]) * 100.0) if (row[2] or 0) > 0 else 0.0,
-        }
-        for row in agg_broad_rows
-    ]
-    # Agrégats par thème spécifique
-    agg_spec_rows = (db.session.query(
-                        Question.specific_theme_id,
-                        SpecificTheme.name,
-                        func.coalesce(func.sum(UserQuestionStat.times_answered), 0),
-                        func.coalesce(func.sum(UserQuestionStat.success_count), 0)
-                      )
-                      .join(Question, Question.id == UserQuestionStat.question_id)
-                      .outerjoin(SpecificTheme, SpecificTheme.id == Question.specific_theme_id)
-                      .filter(UserQuestionStat.user_id == g.current_user.id)
-                      .group_by(Question.specific_theme_id, SpecificTheme.name)
-                      .order_by(func.coalesce(func.sum(UserQuestionStat.times_answered), 0).desc())
-                      .all())
-    agg_by_specific = [
-        {
-            'specific_theme_id': row[0],
-            'specific_theme_name': row[1] or 'Sans sous-thème',
-            'answered': int(row[2] or 0),
-            'success': int(row[3] or 0),
-            'rate': (float(row[3]) / float(row[2]) * 100.0) if (row[2] or 0) > 0 else 0.0,
-        }
-        for row in agg_spec_rows
-    ]
-    # Agrégats par difficulté
-    agg_diff_rows = (db.session.query(
-                        Question.difficulty_level,
-                        func.coalesce(func.sum(UserQuestionStat.times_answered), 0),
-                        func.coalesce(func.sum(UserQuestionStat.success_count), 0)
-                      )
-                      .join(Question, Question.id == UserQuestionStat.question_id)
-                      .filter(UserQuestionStat.user_id == g.current_user.id)
-                      .group_by(Question.difficulty_level)
-                      .order_by(Question.difficulty_level)
-                      .all())
-    agg_by_difficulty = [
-        {
-            'difficulty': row[0],
-            'answered': int(row[1] or 0),
-            'success': int(row[2] or 0),
-            'rate': (float(row[2]) / float(row[1]) * 100.0) if (row[1] or 0) > 0 else 0.0,
-        }
-        for row in agg_diff_rows
-    ]
-    # Compteurs de sessions
-    sessions_completed = 0
-    sessions_abandoned = 0
-    if getattr(g, 'current_user', None):
-        sessions_completed = (UserQuizSession.query
-                              .filter_by(user_id=g.current_user.id, status='completed')
-                              .count())
-        sessions_abandoned = (UserQuizSession.query
-                              .filter_by(user_id=g.current_user.id, status='abandoned')
-                              .count())
+                        SpecificTheme.name
+                   )
+                   .outerjoin(BroadTheme, and_(UserStatsRollup.dimension == 'broad_theme',
+                                               BroadTheme.id == UserStatsRollup.dim_key))
+                   .outerjoin(SpecificTheme, and_(UserStatsRollup.dimension == 'specific_theme',
+                                                  SpecificTheme.id == UserStatsRollup.dim_key))
+                   .filter(UserStatsRollup.user_id == g.current_user.id)
+                   .all())
+
+    def _rate(answered, success):
+        return (float(success) / float(answered) * 100.0) if answered > 0 else 0.0
+
+    total_answers = 0
+    total_success = 0
+    agg_by_broad = []
+    agg_by_specific = []
+    agg_by_difficulty = []
+    for dimension, key, answered, success, broad_name, specific_name in rollup_rows:
+        answered = int(answered or 0)
+        success = int(success or 0)
+        if dimension == 'total':
+            total_answers, total_success = answered, success
+        elif dimension == 'broad_theme':
+            agg_by_broad.append({
+                'theme_id': key or None,
+                'theme_name': broad_name or 'Sans thème',
+                'answered': answered,
+                'success': success,
+                'rate': _rate(answered, success),
+            })
+        elif dimension == 'specific_theme':
+            agg_by_specific.append({
+                'specific_theme_id': key or None,
+                'specific_theme_name': specific_name or 'Sans sous-thème',
+                'answered': answered,
+                'success': success,
+                'rate': _rate(answered, success),
+            })
+        elif dimension == 'difficulty':
+            agg_by_difficulty.append({
+                'difficulty': key or None,
+                'answered': answered,
+                'success': success,
+                'rate': _rate(answered, success),
+            })
+    agg_by_broad.sort(key=lambda row: row['answered'], reverse=True)
+    agg_by_specific.sort(key=lambda row: row['answered'], reverse=True)
+    agg_by_difficulty.sort(key=lambda row: row['difficulty'] or 0)
+
+    # Compteurs de sessions (une requête groupée par statut)
+    session_counts = dict(db.session.query(UserQuizSession.status, func.count(UserQuizSession.id))
+                          .filter(UserQuizSession.user_id == g.current_user.id)
+                          .group_by(UserQuizSession.status)
+                          .all())
+    sessions_completed = session_counts.get('completed', 0)
+    sessions_abandoned = session_counts.get('abandoned', 0)
 
     return render_template('me.html',
                            stats=stats,
@@ -618,6 +729,7 @@ def delete_account():
     try:
         # Supprimer explicitement les données liées pour s'assurer qu'elles sont supprimées
         UserQuestionStat.query.filter_by(user_id=user_id).delete()
+        UserStatsRollup.query.filter_by(user_id=user_id).delete()
         UserQuizSession.query.filter_by(user_id=user_id).delete()
 
         # Supprimer l'utilisateur (les foreign keys avec cascade s'occuperont du reste)
@@ -638,16 +750,74 @@ def delete_account():
 
 # ================== Fichiers uploadés (serveur) ==================
 
+# URLs à empreinte (voir static_assets.py): <sha256>.<ext> ou /uploads/v<version>/<id>/, mises en cache un an
+
 @app.route('/uploads/<path:filename>')
 def uploaded_file(filename):
-    return send_from_directory(app.config['UPLOAD_FOLDER'], filename)
+    return send_asset(app.config['UPLOAD_FOLDER'], filename, immutable=is_content_addressed(filename))
+
+
+@app.route('/uploads/v<int:version>/<int:image_id>/<path:filename>')
+def uploaded_file_versioned(version, image_id, filename):
+    # Immutable seulement si la version est celle de l'image; une version périmée
+    # redirige vers l'URL courante, un fichier qui n'est pas celui de l'image est revalidé
+    image = db.session.get(ImageAsset, image_id)
+    if image is None or not image.owns_file(filename):
+        return send_asset(app.config['UPLOAD_FOLDER'], filename)
+    if image.file_version != version:
+        return redirect(image._file_url(filename))
+    return send_asset(app.config['UPLOAD_FOLDER'], filename, immutable=True)
+
+
+@app.route('/uploads/v<int:version>/<path:filename>')
+def uploaded_file_legacy_version(version, filename):
+    # Ancien format sans id d'image (pages déjà en cache): revalidé
+    return send_asset(app.config['UPLOAD_FOLDER'], filename)
 
 
 # ================== Fichiers sons ==================
 @app.route('/sounds/<path:filename>')
 def sounds_file(filename):
     # Sert les fichiers audio depuis ressources/sounds
-    return send_from_directory(app.config['SOUNDS_FOLDER'], filename)
+    return send_asset(app.config['SOUNDS_FOLDER'], filename)
+
+
+@app.route('/sounds/v<version>/<path:filename>')
+def sounds_file_versioned(version, filename):
+    # Une empreinte périmée redirige vers l'URL du contenu courant
+    if version != file_fingerprint(app.config['SOUNDS_FOLDER'], filename):
+        return redirect(sound_url(filename))
+    return send_asset(app.config['SOUNDS_FOLDER'], filename, immutable=True)
+
+
+@app.template_global()
+def sound_url(filename):
+    """URL d'un son portant l'empreinte de son contenu"""
+    return url_for('sounds_file_versioned', filename=filename,
+                   version=file_fingerprint(app.config['SOUNDS_FOLDER'], filename))
+
+
+# ================== Fichiers statiques ==================
+# url_for('static', ...) ajoute ?v=<empreinte>: ces URLs sont servies en cache longue durée
+# tant que l'empreinte correspond au fichier
+
+@app.url_defaults
+def add_static_fingerprint(endpoint, values):
+    if endpoint == 'static' and 'v' not in values and values.get('filename'):
+        values['v'] = file_fingerprint(app.static_folder, values['filename'])
+
+
+def static_file(filename):
+    # ?v= périmé: redirection vers l'URL portant l'empreinte courante; sans ?v=: revalidé
+    version = request.args.get('v')
+    if version is not None and version != file_fingerprint(app.static_folder, filename):
+        return redirect(url_for('static', filename=filename))
+    return send_asset(app.static_folder, filename,
+                      immutable=version is not None,
+                      precompressed=filename in app.config['PRECOMPRESSED_STATIC'])
+
+
+app.view_functions['static'] = static_file
 
 
 # ================== Gestion des Images ==================
@@ -660,6 +830,30 @@ def images_page():
     return render_template('images.html')
 
 
+def _images_list_fragment(search: str = '', selected_id: int | None = None) -> str:
+    def load():
+        query = ImageAsset.query
+        if search:
+            like = f"%{search}%"
+            try:
+                from sqlalchemy import or_
+                query = query.filter(
+                    or_(
+                        ImageAsset.title.like(like),
+                        ImageAsset.filename.like(like),
+                        ImageAsset.alt_text.like(like)
+                    )
+                )
+            except Exception:
+                # Fallback: filtre sur le titre uniquement
+                query = query.filter(ImageAsset.title.like(like))
+        images = query.order_by(ImageAsset.created_at.desc()).all()
+        if selected_id:
+            images.sort(key=lambda img: 0 if img.id == selected_id else 1)
+        return {'images': images}
+    return _render_list_fragment('images_list.html', ('images',), load, search, selected_id)
+
+
 @app.route('/api/images')
 def list_images_api():
     denied = _ensure_perm_api()
@@ -667,25 +861,7 @@ def list_images_api():
         return denied
     search = request.args.get('search', '').strip()
     selected_id = request.args.get('selected_id', type=int)
-    query = ImageAsset.query
-    if search:
-        like = f"%{search}%"
-        try:
-            from sqlalchemy import or_
-            query = query.filter(
-                or_(
-                    ImageAsset.title.like(like),
-                    ImageAsset.filename.like(like),
-                    ImageAsset.alt_text.like(like)
-                )
-            )
-        except Exception:
-            # Fallback: filtre sur le titre uniquement
-            query = query.filter(ImageAsset.title.like(like))
-    images = query.order_by(ImageAsset.created_at.desc()).all()
-    if selected_id:
-        images.sort(key=lambda img: 0 if img.id == selected_id else 1)
-    return render_template('images_list.html', images=images)
+    return _images_list_fragment(search, selected_id)
 
 
 @app.route('/api/images/json')
@@ -697,6 +873,10 @@ def list_images_json():
     search = request.args.get('search', '').strip()
     selected_id = request.args.get('selected_id', type=int)
     query = ImageAsset.query
+    if 'ids' in request.args:
+        # Restreindre aux images demandées (rafraîchissement des selects du formulaire)
+        ids = [int(part) for part in request.args.get('ids', '').split(',') if part.strip().isdigit()]
+        query = query.filter(ImageAsset.id.in_(ids))
     if search:
         like = f"%{search}%"
         try:
@@ -720,6 +900,10 @@ def list_images_json():
         'alt_text': img.alt_text
     } for img in images]
 
+# Nombre d'images par page dans la galerie de sélection
+IMAGES_GALLERY_PAGE_SIZE = 48
+
+
 @app.route('/api/images/gallery')
 def images_gallery_fragment():
     denied = _ensure_perm_api()
@@ -729,11 +913,10 @@ def images_gallery_fragment():
     selected_id = request.args.get('selected_id', type=int)
     select_id = request.args.get('select_id', '')
     partial = request.args.get('partial', '0') == '1'
-    print(f"[DEBUG] /api/images/gallery called with search='{search}', selected_id={selected_id}, select_id='{select_id}', partial={partial}")
+    page = max(request.args.get('page', 1, type=int) or 1, 1)
     query = ImageAsset.query
     if search:
         like = f"%{search}%"
-        print(f"[DEBUG] Filtering with search pattern: {like}")
         try:
             from sqlalchemy import or_
             query = query.filter(
@@ -745,17 +928,33 @@ def images_gallery_fragment():
             )
         except Exception:
             query = query.filter(ImageAsset.title.like(like))
-    images = query.order_by(ImageAsset.created_at.desc()).all()
-    print(f"[DEBUG] Found {len(images)} images after filtering")
-    if selected_id:
-        images.sort(key=lambda img: 0 if img.id == selected_id else 1)
 
+    # L'image sélectionnée est affichée en tête de la première page (et exclue des pages)
+    selected = query.filter(ImageAsset.id == selected_id).first() if selected_id else None
+    if selected:
+        query = query.filter(ImageAsset.id != selected.id)
+    rows = (query.order_by(ImageAsset.created_at.desc(), ImageAsset.id.desc())
+            .offset((page - 1) * IMAGES_GALLERY_PAGE_SIZE)
+            .limit(IMAGES_GALLERY_PAGE_SIZE + 1)
+            .all())
+    images = rows[:IMAGES_GALLERY_PAGE_SIZE]
+    if selected and page == 1:
+        images.insert(0, selected)
+    next_url = None
+    if len(rows) > IMAGES_GALLERY_PAGE_SIZE:
+        next_url = url_for('images_gallery_fragment', partial=1, page=page + 1, search=search or None,
+                           selected_id=selected_id, select_id=select_id or None)
+
+    context = dict(images=images, selected_id=selected_id or 0, select_id=select_id, next_url=next_url)
+    if page > 1:
+        # Page suivante: uniquement les cartes, à la place du bouton "Charger plus"
+        return render_template('images_gallery_cards.html', **context)
     if partial:
         # Retourner seulement la grille d'images pour les mises à jour partielles
-        return render_template('images_gallery_grid.html', images=images, selected_id=selected_id or 0, select_id=select_id)
+        return render_template('images_gallery_grid.html', **context)
     else:
         # Retourner le HTML complet pour l'ouverture initiale
-        return render_template('images_gallery.html', images=images, selected_id=selected_id or 0, select_id=select_id)
+        return render_template('images_gallery.html', **context)
 
 
 @app.route('/image/new')
@@ -779,42 +978,6 @@ def edit_image(image_id: int):
     return render_template('image_form.html', image=image, embedded=embedded, select_id=select_id)
 
 
-def _secure_filename(original_name: str) -> str:
-    # Sécuriser le nom de fichier simplement (remplacer espaces, enlever caractères spéciaux)
-    base = os.path.basename(original_name)
-    base = base.replace(' ', '_')
-    keep = "-_.()abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789"
-    safe = ''.join(ch for ch in base if ch in keep)
-    if not safe:
-        safe = f'image_{int(datetime.utcnow().timestamp())}.bin'
-    return safe
-
-def _optimize_image(file_storage, base_name: str):
-    """Optimise l'image pour le web (resize + WebP). Retourne (bytes, new_ext, mime) ou (None, None, None)."""
-    if Image is None or file_storage is None:
-        return None, None, None
-    try:
-        file_storage.stream.seek(0)
-        img = Image.open(file_storage.stream)
-        # GIF animé: on ne touche pas
-        if bool(getattr(img, 'is_animated', False)):
-            return None, None, None
-
-        has_alpha = (img.mode in ('RGBA', 'LA') or 'transparency' in img.info)
-        img = img.convert('RGBA') if has_alpha else img.convert('RGB')
-
-        # Redimension max 1600px
-        max_size = (1600, 1600)
-        img.thumbnail(max_size, Image.LANCZOS)
-
-        out = io.BytesIO()
-        img.save(out, format='WEBP', quality=80, method=6)
-        data = out.getvalue()
-        return data, '.webp', 'image/webp'
-    except Exception:
-        return None, None, None
-
-
 @app.route('/api/image', methods=['POST'])
 def create_image():
     try:
@@ -831,46 +994,21 @@ def create_image():
         if not file:
             return "Fichier requis", 400
 
-        # Nom de base et optimisation
-        original_secure = _secure_filename(file.filename)
-        base_name, orig_ext = os.path.splitext(original_secure)
-
-        optimized_bytes, new_ext, new_mime = _optimize_image(file, base_name)
-        if optimized_bytes is not None:
-            filename = f"{base_name}{new_ext}"
-            # Unicité DB uniquement
-            counter = 1
-            while ImageAsset.query.filter_by(filename=filename).first() is not None:
-                filename = f"{base_name}_{counter}{new_ext}"
-                counter += 1
-            filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-            with open(filepath, 'wb') as f:
-                f.write(optimized_bytes)
-            size_bytes = len(optimized_bytes)
-            mime_type = new_mime
-        else:
-            # Fallback: sauvegarde brute
-            filename = original_secure
-            filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-            if os.path.exists(filepath):
-                name, ext = os.path.splitext(filename)
-                filename = f"{name}_{int(datetime.utcnow().timestamp())}{ext}"
-                filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-            base_filename = filename
-            counter = 1
-            while ImageAsset.query.filter_by(filename=filename).first() is not None:
-                name, ext = os.path.splitext(base_filename)
-                filename = f"{name}_{counter}{ext}"
-                counter += 1
-            if filename != base_filename:
-                filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-            file.save(filepath)
-            size_bytes = os.path.getsize(filepath)
-            mime_type = file.mimetype
-
-        image = ImageAsset(title=title, filename=filename, mime_type=mime_type, size_bytes=size_bytes, alt_text=alt_text, copyright_credits=copyright_credits, copyright_link=copyright_link)
-        db.session.add(image)
-        db.session.commit()
+        # Contenu déjà présent (même fichier envoyé ou même image optimisée): image existante réutilisée
+        digest = sha256_stream(file.stream)
+        image = find_image_by_hash(digest)
+        duplicate = image is not None
+        if not duplicate:
+            # Fichier brut stocké sous son empreinte: l'optimisation (WebP, variantes) se fait en arrière-plan
+            filename, size_bytes = store_upload(file, app.config['UPLOAD_FOLDER'], digest)
+            status = STATUS_PENDING if image_pipeline.enabled else STATUS_READY
+
+            image = ImageAsset(title=title, filename=filename, mime_type=file.mimetype, size_bytes=size_bytes, alt_text=alt_text, copyright_credits=copyright_credits, copyright_link=copyright_link, status=status,
+                               content_hash=digest, source_hash=digest)
+            db.session.add(image)
+            db.session.commit()
+            if status == STATUS_PENDING:
+                image_pipeline.submit(image.id, filename)
 
         # Si formulaire embarqué (modale au-dessus d'une autre modale): renvoyer JSON
         if request.form.get('embedded') in ('1', 'true', 'yes') or request.args.get('embedded') in ('1', 'true', 'yes'):
@@ -883,11 +1021,11 @@ def create_image():
                     'copyright_credits': image.copyright_credits,
                     'copyright_link': image.copyright_link
                 },
+                'duplicate': duplicate,
                 'select_id': request.form.get('select_id') or request.args.get('select_id') or ''
             }
 
-        images = ImageAsset.query.order_by(ImageAsset.created_at.desc()).all()
-        return render_template('images_list.html', images=images)
+        return _images_list_fragment()
     except Exception as e:
         return f"Erreur: {str(e)}", 400
 
@@ -905,46 +1043,46 @@ def update_image(image_id: int):
         copyright_link = request.form.get('copyright_link', '').strip()
         file = request.files.get('file')
 
+        digest = sha256_stream(file.stream) if file else None
+        if digest in (image.content_hash, image.source_hash):
+            # Même contenu que le fichier actuel: rien à réécrire ni à réencoder
+            file = None
+        elif digest:
+            other = find_image_by_hash(digest, exclude_id=image.id)
+            if other is not None:
+                return f"Image identique déjà présente: #{other.id} « {other.title} »", 409
+
         if title:
             image.title = title
         image.alt_text = alt_text
         image.copyright_credits = copyright_credits
         image.copyright_link = copyright_link
 
+        previous_filename = image.filename
+        # Fichier partagé avec une autre image (même image optimisée): conservé, ainsi que ses variantes
+        previous_shared = is_file_shared(previous_filename, image.id)
         if file:
-            original_secure = _secure_filename(file.filename)
-            base_name, orig_ext = os.path.splitext(original_secure)
-
-            optimized_bytes, new_ext, new_mime = _optimize_image(file, base_name)
-            if optimized_bytes is not None:
-                filename = f"{base_name}{new_ext}"
-                counter = 1
-                while ImageAsset.query.filter_by(filename=filename).first() is not None and filename != image.filename:
-                    filename = f"{base_name}_{counter}{new_ext}"
-                    counter += 1
-                filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-                with open(filepath, 'wb') as f:
-                    f.write(optimized_bytes)
-                image.filename = filename
-                image.mime_type = new_mime
-                image.size_bytes = len(optimized_bytes)
-                image.updated_at = datetime.utcnow()
-            else:
-                filename = original_secure
-                filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-                if os.path.exists(filepath):
-                    name, ext = os.path.splitext(filename)
-                    filename = f"{name}_{int(datetime.utcnow().timestamp())}{ext}"
-                    filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-                file.save(filepath)
-                image.filename = filename
-                image.mime_type = file.mimetype
-                image.size_bytes = os.path.getsize(filepath)
-                image.updated_at = datetime.utcnow()
+            filename, size_bytes = store_upload(file, app.config['UPLOAD_FOLDER'], digest)
+            # Les variantes de l'ancien fichier ne correspondent plus
+            apply_variants(image, app.config['UPLOAD_FOLDER'], None, remove_files=not previous_shared)
+            image.filename = filename
+            image.mime_type = file.mimetype
+            image.size_bytes = size_bytes
+            image.content_hash = image.source_hash = digest
+            image.status = STATUS_PENDING if image_pipeline.enabled else STATUS_READY
+            image.updated_at = datetime.utcnow()
 
         db.session.commit()
-        images = ImageAsset.query.order_by(ImageAsset.created_at.desc()).all()
-        return render_template('images_list.html', images=images)
+        if file and not previous_shared:
+            # L'ancien fichier (nommé par son empreinte) n'est plus référencé
+            try:
+                os.remove(os.path.join(app.config['UPLOAD_FOLDER'], previous_filename))
+            except OSError:
+                pass
+        if file:
+            if image.status == STATUS_PENDING:
+                image_pipeline.submit(image.id, image.filename)
+        return _images_list_fragment()
     except Exception as e:
         return f"Erreur: {str(e)}", 400
 
@@ -960,19 +1098,20 @@ def delete_image(image_id: int):
         if image.questions.count() > 0 or AnswerImageLink.query.filter_by(image_id=image.id).count() > 0:
             return "Impossible de supprimer: image utilisée.", 400
 
-        # Supprimer le fichier physique si présent
-        filepath = os.path.join(app.config['UPLOAD_FOLDER'], image.filename)
-        try:
-            if os.path.exists(filepath):
-                os.remove(filepath)
-        except Exception:
-            pass
+        # Supprimer le fichier physique et ses variantes, sauf s'ils sont partagés avec une autre image
+        if not is_file_shared(image.filename, image.id):
+            filepath = os.path.join(app.config['UPLOAD_FOLDER'], image.filename)
+            try:
+                if os.path.exists(filepath):
+                    os.remove(filepath)
+            except Exception:
+                pass
+            remove_variant_files(app.config['UPLOAD_FOLDER'], image)
 
         db.session.delete(image)
         db.session.commit()
 
-        images = ImageAsset.query.order_by(ImageAsset.created_at.desc()).all()
-        return render_template('images_list.html', images=images)
+        return _images_list_fragment()
     except Exception as e:
         return f"Erreur: {str(e)}", 400
 
@@ -987,20 +1126,17 @@ def index():
 
 @app.route('/contact', methods=['GET', 'POST'])
 def contact_page():
-    print(f"[CONTACT] Method: {request.method}")
     if request.method == 'POST':
         name = (request.form.get('name') or '').strip()
         email = (request.form.get('email') or '').strip()
         message = (request.form.get('message') or '').strip()
-        print(f"[CONTACT] Received: name='{name}', email='{email}', message='{message[:50]}...'")
 
         if not name or not email or not message:
-            print(f"[CONTACT] Validation failed: name={bool(name)}, email={bool(email)}, message={bool(message)}")
+            contact_logger.debug("formulaire incomplet: name=%s email=%s message=%s", bool(name), bool(email), bool(message))
             flash('Tous les champs sont requis.', 'danger')
             return render_template('contact.html')
 
         try:
-            print("[CONTACT] Creating ContactMessage...")
             # Créer le message de contact
             contact_msg = ContactMessage(
                 visitor_name=name,
@@ -1009,36 +1145,28 @@ def contact_page():
             )
             db.session.add(contact_msg)
             db.session.flush()
-            print(f"[CONTACT] ContactMessage created with id={contact_msg.id}")
 
             # Trouver les administrateurs (utilisateurs avec profil "Administrateur")
-            print("[CONTACT] Looking for admin profile...")
             admin_profile = Profile.query.filter_by(name='Administrateur').first()
             admin_users = []
             if admin_profile:
-                print(f"[CONTACT] Found admin profile id={admin_profile.id}")
                 admin_users = User.query.filter_by(profile_id=admin_profile.id, is_active=True).all()
-                print(f"[CONTACT] Found {len(admin_users)} active admin users: {[u.username for u in admin_users]}")
             else:
-                print("[CONTACT] No admin profile found!")
+                contact_logger.warning("profil Administrateur introuvable, message de contact sans conversation")
 
             # Créer une conversation si il y a des admins
             if admin_users:
-                print("[CONTACT] Creating conversation...")
                 subject = f"Contact: Message de {name}"
                 conv = Conversation(subject=subject, context_type='contact_message', context_id=contact_msg.id)
                 db.session.add(conv)
                 db.session.flush()
-                print(f"[CONTACT] Conversation created with id={conv.id}")
 
                 # Ajouter les participants (admins)
                 for admin in admin_users:
-                    print(f"[CONTACT] Adding participant: {admin.username} (id={admin.id})")
-                    db.session.add(ConversationParticipant(conversation_id=conv.id, user_id=admin.id, last_read_at=None))
+                    db.session.add(ConversationParticipant(conversation_id=conv.id, user_id=admin.id, last_read_at=None, unread_count=1))
 
                 # Message initial
                 content = f"Message de contact de {name} ({email}):\n\n{message}"
-                print("[CONTACT] Creating initial message...")
                 msg = ConversationMessage(conversation_id=conv.id, sender_id=None, content=content)  # sender_id=None pour les messages système
                 db.session.add(msg)
 
@@ -1050,7 +1178,6 @@ def contact_page():
                     prefs = admin.get_preferences()
                     notify = prefs.get('notify_email_on_message', False)
                     has_email = bool(admin.email)
-                    print(f"[CONTACT] Admin {admin.username}: notify={notify}, has_email={has_email}")
                     if notify and has_email:
                         try:
                             send_email_optional(
@@ -1058,21 +1185,20 @@ def contact_page():
                                 subject=f"Nouveau message de contact: {subject}",
                                 body=f"Un nouveau message de contact a été reçu de {name}.\n\n{message}\n\nAccéder à la conversation: {request.host_url.rstrip('/')}/messages"
                             )
-                            print(f"[CONTACT] Email sent to {admin.email}")
                         except Exception as e:
-                            print(f"[CONTACT] Email error for {admin.email}: {e}")
+                            contact_logger.warning("échec de l'email de contact à l'administrateur %s: %s", admin.id, e)
 
-            print("[CONTACT] Committing transaction...")
             db.session.commit()
-            print("[CONTACT] Transaction committed successfully")
+            contact_logger.info("message de contact enregistré", extra={'fields': {
+                'contact_id': contact_msg.id, 'conversation_id': contact_msg.conversation_id,
+                'admins': [admin.id for admin in admin_users],
+            }})
             flash('Merci, votre message a été envoyé.', 'success')
             return redirect(url_for('contact_page'))
 
         except Exception as e:
             db.session.rollback()
-            print(f"[CONTACT] Error during contact message creation: {e}")
-            import traceback
-            traceback.print_exc()
+            contact_logger.exception("erreur lors de l'enregistrement du message de contact")
             flash('Une erreur est survenue lors de l\'envoi de votre message.', 'danger')
             return render_template('contact.html')
 
@@ -1095,13 +1221,10 @@ def report_form():
     if not question:
         return "<div class='modal-content'><div class='modal-header'><h3>Signaler un problème</h3></div><div class='alert alert-danger'>Question introuvable.</div></div>", 200
 
-    rule_set_slug = (request.args.get('rule_set') or '').strip()
-    rule_set = None
-    if rule_set_slug:
-        rule_set = QuizRuleSet.query.filter_by(slug=rule_set_slug, is_active=True).first()
+    rule_set = _get_rule_set((request.args.get('rule_set') or '').strip())
 
     author_user = question.author_user
-    rule_creator = rule_set.created_by_user if rule_set else None
+    rule_creator = db.session.get(User, rule_set.created_by_user_id) if rule_set else None
 
     inner = render_template('report_form.html', question=question, rule_set=rule_set, author_user=author_user, rule_creator=rule_creator)
     # Remplacer entièrement le conteneur pour l'afficher
@@ -1128,9 +1251,7 @@ def report_submit():
     if not question:
         return "<div id='modal-root' class='modal-overlay' style='display:flex'><div class='modal-content'><div class='modal-header'><h3>Signaler un problème</h3></div><div class='alert alert-danger'>Question introuvable.</div></div></div>", 200
 
-    rule_set = None
-    if rule_set_slug:
-        rule_set = QuizRuleSet.query.filter_by(slug=rule_set_slug, is_active=True).first()
+    rule_set = _get_rule_set(rule_set_slug)
 
     # Déterminer les destinataires
     to_author = (request.form.get('to_author') == '1')
@@ -1158,9 +1279,9 @@ def report_submit():
         db.session.flush()
 
         # Participants: reporter + destinataires
-        db.session.add(ConversationParticipant(conversation_id=conv.id, user_id=user.id, last_read_at=datetime.utcnow()))
+        db.session.add(ConversationParticipant(conversation_id=conv.id, user_id=user.id, last_read_at=datetime.utcnow(), unread_count=0))
         for rid in recipient_ids:
-            db.session.add(ConversationParticipant(conversation_id=conv.id, user_id=rid, last_read_at=None))
+            db.session.add(ConversationParticipant(conversation_id=conv.id, user_id=rid, last_read_at=None, unread_count=1))
 
         # Message initial
         content = f"Raison: {reason}\n\n{details}"
@@ -1227,42 +1348,66 @@ def messages_home():
     return render_template('messages.html')
 
 
+# Nombre de conversations par page dans la liste des messages
+_MESSAGES_PAGE_SIZE = 30
+
+
+def _encode_conversation_cursor(conv: Conversation) -> str:
+    return f"{conv.updated_at.isoformat()}_{conv.id}"
+
+
+def _decode_conversation_cursor(raw: str):
+    """Retourne (updated_at, id) ou None si le curseur est invalide."""
+    try:
+        ts_raw, id_raw = raw.rsplit('_', 1)
+        return datetime.fromisoformat(ts_raw), int(id_raw)
+    except (ValueError, AttributeError):
+        return None
+
+
 @app.route('/api/messages/list')
 def api_messages_list():
     user = getattr(g, 'current_user', None)
     if not user or not user.password_hash:
         return "<div class='alert alert-warning'>Connectez-vous pour voir vos messages.</div>", 200
 
-    parts = ConversationParticipant.query.filter_by(user_id=user.id).all()
-    # Récupérer conversations et derniers messages
-    items = []
-    for p in parts:
-        conv = Conversation.query.get(p.conversation_id)
-        if not conv:
-            continue
-        last_msg = ConversationMessage.query.filter_by(conversation_id=conv.id).order_by(ConversationMessage.created_at.desc()).first()
-
-        # Calcul des messages non lus (même logique que le widget)
-        if p.last_read_at is None:
-            # Pour les nouveaux participants, compter tous les messages sauf ceux de l'utilisateur
-            unread_count = ConversationMessage.query.filter(
-                ConversationMessage.conversation_id == p.conversation_id,
-                or_(ConversationMessage.sender_id.is_(None), ConversationMessage.sender_id != user.id)
-            ).count()
-        else:
-            # Pour les participants existants, compter les messages après last_read_at
-            unread_count = ConversationMessage.query.filter(
-                ConversationMessage.conversation_id == p.conversation_id,
-                ConversationMessage.created_at > p.last_read_at,
-                or_(ConversationMessage.sender_id.is_(None), ConversationMessage.sender_id != user.id)
-            ).count()
-
-        items.append((conv, last_msg, unread_count))
-
-    # Trier par date du dernier message descendant (plus récent en premier)
-    items.sort(key=lambda x: x[1].created_at if x[1] else datetime.min, reverse=True)
-
-    return render_template('partials/messages_list.html', items=items)
+    # Conversations de l'utilisateur
+    my_conv_ids = (db.session.query(ConversationParticipant.conversation_id)
+                   .filter(ConversationParticipant.user_id == user.id))
+
+    # Dernier message de chaque conversation (fenêtre row_number par conversation)
+    ranked = (db.session.query(
+                  ConversationMessage,
+                  func.row_number().over(
+                      partition_by=ConversationMessage.conversation_id,
+                      order_by=(ConversationMessage.created_at.desc(), ConversationMessage.id.desc())
+                  ).label('rn'))
+              .filter(ConversationMessage.conversation_id.in_(my_conv_ids))
+              .subquery())
+    LastMessage = db.aliased(ConversationMessage, ranked)
+
+    # Une seule requête: conversation + dernier message + compteur de non lus (user-007)
+    query = (db.session.query(Conversation, LastMessage, ConversationParticipant.unread_count)
+             .join(ConversationParticipant, and_(ConversationParticipant.conversation_id == Conversation.id,
+                                                 ConversationParticipant.user_id == user.id))
+             .outerjoin(LastMessage, and_(LastMessage.conversation_id == Conversation.id, ranked.c.rn == 1)))
+
+    # Pagination par curseur sur (updated_at, id), du plus récent au plus ancien
+    cursor = _decode_conversation_cursor((request.args.get('cursor') or '').strip())
+    if cursor:
+        cursor_ts, cursor_id = cursor
+        query = query.filter(or_(Conversation.updated_at < cursor_ts,
+                                 and_(Conversation.updated_at == cursor_ts, Conversation.id < cursor_id)))
+
+    rows = (query.order_by(Conversation.updated_at.desc(), Conversation.id.desc())
+            .limit(_MESSAGES_PAGE_SIZE + 1)
+            .all())
+    items = [(conv, last_msg, unread_count or 0) for conv, last_msg, unread_count in rows[:_MESSAGES_PAGE_SIZE]]
+    next_cursor = _encode_conversation_cursor(items[-1][0]) if len(rows) > _MESSAGES_PAGE_SIZE else None
+
+    # Pages suivantes: uniquement les éléments de liste (ajoutés à la place du bouton "Plus")
+    template = 'partials/messages_list_items.html' if cursor else 'partials/messages_list.html'
+    return render_template(template, items=items, next_cursor=next_cursor)
 
 
 @app.route('/api/messages/thread/<int:conv_id>')
@@ -1279,17 +1424,14 @@ def api_messages_thread(conv_id: int):
     if not conv:
         return "<div class='alert alert-danger'>Conversation introuvable.</div>", 200
 
-    print(f"[THREAD] Loading thread {conv_id} for user {user.username}, last_read_at was: {part.last_read_at}")
-
     # Marquer comme lu
     try:
-        old_last_read = part.last_read_at
         part.last_read_at = datetime.utcnow()
+        part.unread_count = 0
         db.session.commit()
-        print(f"[THREAD] Updated last_read_at from {old_last_read} to {part.last_read_at}")
     except Exception as e:
         db.session.rollback()
-        print(f"[THREAD] Error updating last_read_at: {e}")
+        messages_logger.warning("erreur de mise à jour de last_read_at: %s", e)
 
     messages = ConversationMessage.query.filter_by(conversation_id=conv.id).order_by(ConversationMessage.created_at.asc()).all()
     return render_template('partials/conversation_thread.html', conversation=conv, messages=messages, me=user)
@@ -1306,14 +1448,17 @@ def api_messages_mark_unread(conv_id: int):
         return "Access denied", 403
 
     try:
-        print(f"[MARK_UNREAD] User {user.username} marking conversation {conv_id} as unread")
         part.last_read_at = None  # Remettre à None pour marquer comme non lu
+        # Tous les messages des autres participants redeviennent non lus
+        part.unread_count = ConversationMessage.query.filter(
+            ConversationMessage.conversation_id == conv_id,
+            or_(ConversationMessage.sender_id.is_(None), ConversationMessage.sender_id != user.id)
+        ).count()
         db.session.commit()
-        print(f"[MARK_UNREAD] Successfully marked conversation {conv_id} as unread for user {user.username}")
         return "", 200  # HTMX ne fait rien avec le contenu, juste le statut
     except Exception as e:
         db.session.rollback()
-        print(f"[MARK_UNREAD] Error marking as unread: {e}")
+        messages_logger.warning("erreur lors du marquage comme non lu: %s", e)
         return "Error", 500
 
 
@@ -1330,8 +1475,6 @@ def api_messages_delete(conv_id: int):
         return render_template('messages_content.html')
 
     try:
-        print(f"[DELETE_CONV] User {user.username} deleting conversation {conv_id}")
-
         # Supprimer la participation de l'utilisateur
         db.session.delete(part)
 
@@ -1340,9 +1483,6 @@ def api_messages_delete(conv_id: int):
 
         if remaining_parts == 0:
             # Plus de participants, supprimer complètement la conversation et ses messages
-            print(f"[DELETE_CONV] No more participants, deleting conversation {conv_id} completely")
-
-            # Supprimer les messages
             ConversationMessage.query.filter_by(conversation_id=conv_id).delete()
 
             # Supprimer les rapports/questions liés si c'est un signalement
@@ -1354,11 +1494,11 @@ def api_messages_delete(conv_id: int):
 
             # Supprimer la conversation
             db.session.delete(conv)
-        else:
-            print(f"[DELETE_CONV] {remaining_parts} participants remaining, keeping conversation {conv_id}")
 
         db.session.commit()
-        print(f"[DELETE_CONV] Successfully deleted conversation {conv_id} for user {user.username}")
+        messages_logger.info("conversation retirée", extra={'fields': {
+            'conversation_id': conv_id, 'user_id': user.id, 'remaining_participants': remaining_parts,
+        }})
 
         # Retourner directement le HTML de la page messages rechargée avec un message de succès
         flash("Conversation supprimée de votre boîte de réception.", "success")
@@ -1366,7 +1506,7 @@ def api_messages_delete(conv_id: int):
 
     except Exception as e:
         db.session.rollback()
-        print(f"[DELETE_CONV] Error deleting conversation: {e}")
+        messages_logger.exception("erreur lors de la suppression de la conversation %s", conv_id)
         flash("Erreur lors de la suppression de la conversation.", "danger")
         return render_template('messages_content.html')
 
@@ -1390,6 +1530,14 @@ def api_messages_send():
     try:
         msg = ConversationMessage(conversation_id=conv_id, sender_id=user.id, content=content)
         db.session.add(msg)
+        # La conversation remonte en tête de liste (tri par updated_at)
+        Conversation.query.filter_by(id=conv_id).update({Conversation.updated_at: datetime.utcnow()},
+                                                        synchronize_session=False)
+        # Un message non lu de plus pour les autres participants
+        (ConversationParticipant.query
+         .filter(ConversationParticipant.conversation_id == conv_id, ConversationParticipant.user_id != user.id)
+         .update({ConversationParticipant.unread_count: ConversationParticipant.unread_count + 1},
+                 synchronize_session=False))
         db.session.commit()
 
         # Notifier les autres participants
@@ -1437,10 +1585,7 @@ def list_questions():
     sort_by = request.args.get('sort_by', 'updated_at')
     sort_order = request.args.get('sort_order', 'desc')
 
-    base_query = Question.query.join(User, Question.author_id == User.id).join(BroadTheme, Question.broad_theme_id == BroadTheme.id, isouter=True).join(SpecificTheme, Question.specific_theme_id == SpecificTheme.id, isouter=True)
-
-    questions = _apply_sorting(base_query, sort_by, sort_order).all()
-    return render_template('questions_list.html', questions=questions, view=view, sort_by=sort_by, sort_order=sort_order)
+    return _render_questions_page(_questions_base_query(), view, sort_by, sort_order)
 
 
 # ===== Page d'analyse (Heatmap) =====
@@ -1559,7 +1704,10 @@ def _export_base_query():
 def _apply_export_filters(query):
     # Filtres
     q = (request.args.get('q') or '').strip()
-    if q:
+    hits = search_hits(q) if q else None
+    if hits is not None:
+        query = query.join(hits, hits.c.question_id == Question.id)
+    elif q:
         query = query.filter(
             db.or_(
                 Question.question_text.contains(q),
@@ -1647,6 +1795,127 @@ def _serialize_question_for_export(q: Question):
     }
 
 
+_EXPORT_CSV_HEADER = ['id', 'auteur', 'theme', 'soustheme', 'difficulte', 'question', 'proposition_1', 'proposition_2', 'proposition_3', 'proposition_4', 'proposition_5', 'proposition_6', 'indice', 'reponse_detaillee', 'bonne_reponse_index', 'publie']
+
+_EXPORT_CONTENT_TYPES = {
+    'json': 'application/json; charset=utf-8',
+    'jsonl': 'application/x-ndjson; charset=utf-8',
+    'md': 'text/markdown; charset=utf-8',
+    'csv': 'text/csv; charset=utf-8',
+}
+
+# Taille des lots lus en base et des blocs envoyés en mode streaming
+_EXPORT_YIELD_PER = 500
+_EXPORT_CHUNK_SIZE = 64 * 1024
+
+
+def _export_csv_line(values):
+    import csv
+    from io import StringIO
+    buf = StringIO()
+    csv.writer(buf).writerow(values)
+    return buf.getvalue()
+
+
+def _export_csv_values(r):
+    def flat(value):
+        return (value or '').replace('\r', '').replace('\n', ' ').strip()
+    props = list(r['propositions']) if r['propositions'] else []
+    props = props + [''] * (6 - len(props))  # normaliser sur 6 colonnes max
+    return [
+        r['id'], r['auteur'] or '', r['theme'] or '', r['soustheme'] or '', r['difficulte'] or '',
+        flat(r['question']),
+        flat(props[0]), flat(props[1]), flat(props[2]), flat(props[3]), flat(props[4]), flat(props[5]),
+        flat(r['indice']),
+        flat(r['reponse_detaillee']),
+        r['bonne_reponse_index'] or '',
+        '1' if r['publie'] else '0'
+    ]
+
+
+def _export_md_block(r):
+    def md_escape(text):
+        if text is None:
+            return ''
+        return str(text).replace('\r', '').strip()
+    md_lines = []
+    md_lines.append(f"### Q{r['id']} · D{r['difficulte']} · {r['theme'] or '-'} / {r['soustheme'] or '-'}")
+    md_lines.append('')
+    md_lines.append(md_escape(r['question']))
+    md_lines.append('')
+    for i, ans in enumerate(r['propositions'], start=1):
+        marker = '✅' if str(i) == str(r['bonne_reponse_index'] or '') else '▫️'
+        md_lines.append(f"- {marker} {md_escape(ans)}")
+    if r['indice']:
+        md_lines.append('')
+        md_lines.append(f"Hint: {md_escape(r['indice'])}")
+    if r['reponse_detaillee']:
+        md_lines.append('')
+        md_lines.append(f"Réponse: {md_escape(r['reponse_detaillee'])}")
+    md_lines.append('')
+    md_lines.append('---')
+    md_lines.append('')
+    return md_lines
+
+
+def _export_query():
+    """Requête d'export filtrée, auteur/thème/sous-thème chargés par les jointures existantes"""
+    return (_apply_export_filters(_export_base_query())
+            .options(db.contains_eager(Question.author_user),
+                     db.contains_eager(Question.theme),
+                     db.contains_eager(Question.specific_theme_obj),
+                     # Images, pays, mots-clés: inutiles à l'export (pas de chargement 'subquery')
+                     db.lazyload('*'))
+            .order_by(Question.id.asc()))
+
+
+def _export_stream(fmt, query, total):
+    """Génère l'export complet ligne par ligne, à partir d'un curseur yield_per"""
+    rows = (_serialize_question_for_export(q) for q in query.yield_per(_EXPORT_YIELD_PER))
+    if fmt == 'json':
+        yield '{"total": ' + str(total) + ', "page": "all", "items": ['
+        count = 0
+        for r in rows:
+            yield (',\n' if count else '\n') + json.dumps(r, ensure_ascii=False)
+            count += 1
+        yield '\n], "count": ' + str(count) + '}\n'
+    elif fmt == 'jsonl':
+        for r in rows:
+            yield json.dumps(r, ensure_ascii=False) + '\n'
+    elif fmt == 'md':
+        for r in rows:
+            yield '\n'.join(_export_md_block(r)) + '\n'
+    else:
+        yield _export_csv_line(_EXPORT_CSV_HEADER)
+        for r in rows:
+            yield _export_csv_line(_export_csv_values(r))
+
+
+def _buffered_chunks(chunks, size=_EXPORT_CHUNK_SIZE):
+    """Regroupe les petits morceaux de texte en blocs d'environ `size` octets"""
+    buf, buffered = [], 0
+    for chunk in chunks:
+        data = chunk.encode('utf-8')
+        buf.append(data)
+        buffered += len(data)
+        if buffered >= size:
+            yield b''.join(buf)
+            buf, buffered = [], 0
+    if buf:
+        yield b''.join(buf)
+
+
+def _gzip_chunks(chunks):
+    """Compresse un flux d'octets en gzip à la volée"""
+    import zlib
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # 31: en-tête et pied gzip
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
 @app.route('/api/export/download')
 def export_download():
     denied = _ensure_perm_api()
@@ -1654,14 +1923,36 @@ def export_download():
         return denied
 
     fmt = (request.args.get('format') or 'csv').lower()  # csv, json, jsonl, md
-    page = int(request.args.get('page', 1) or 1)
-    page_size = int(request.args.get('page_size', 200) or 200)
+    if fmt == 'markdown':
+        fmt = 'md'
+    if fmt not in _EXPORT_CONTENT_TYPES:
+        fmt = 'csv'
+
+    query = _export_query()
+
+    # page=all: export complet en streaming (mémoire constante), gzip optionnel
+    if 'all' in request.args.getlist('page'):
+        total = query.order_by(None).count()
+        chunks = _buffered_chunks(_export_stream(fmt, query, total))
+        use_gzip = request.args.get('gzip') in ('1', 'true', 'on') and 'gzip' in (request.headers.get('Accept-Encoding') or '')
+        if use_gzip:
+            chunks = _gzip_chunks(chunks)
+        resp = Response(stream_with_context(chunks), content_type=_EXPORT_CONTENT_TYPES[fmt])
+        resp.headers['Content-Disposition'] = f'attachment; filename="export_questions_all_n{total}.{fmt}"'
+        if use_gzip:
+            resp.headers['Content-Encoding'] = 'gzip'
+        resp.headers['Vary'] = 'Accept-Encoding'
+        return resp
+
+    try:
+        page = int(request.args.get('page', 1) or 1)
+        page_size = int(request.args.get('page_size', 200) or 200)
+    except ValueError:
+        page, page_size = 1, 200
     page = max(page, 1)
     page_size = max(1, min(page_size, 2000))
 
-    query = _apply_export_filters(_export_base_query()).order_by(Question.id.asc())
-
-    total = query.count()
+    total = query.order_by(None).count()
     items = query.offset((page - 1) * page_size).limit(page_size).all()
     rows = [_serialize_question_for_export(q) for q in items]
 
@@ -1669,72 +1960,18 @@ def export_download():
 
     if fmt == 'json':
         data = json.dumps({'total': total, 'page': page, 'page_size': page_size, 'count': len(rows), 'items': rows}, ensure_ascii=False, indent=2)
-        resp = make_response(data)
-        resp.headers['Content-Type'] = 'application/json; charset=utf-8'
-        resp.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
-        return resp
-
-    if fmt == 'jsonl':
-        lines = '\n'.join([json.dumps(r, ensure_ascii=False) for r in rows])
-        resp = make_response(lines)
-        resp.headers['Content-Type'] = 'application/x-ndjson; charset=utf-8'
-        resp.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
-        return resp
-
-    if fmt == 'md' or fmt == 'markdown':
-        def md_escape(text):
-            if text is None:
-                return ''
-            return str(text).replace('\r', '').strip()
+    elif fmt == 'jsonl':
+        data = '\n'.join([json.dumps(r, ensure_ascii=False) for r in rows])
+    elif fmt == 'md':
         md_lines = []
         for r in rows:
-            md_lines.append(f"### Q{r['id']} · D{r['difficulte']} · {r['theme'] or '-'} / {r['soustheme'] or '-'}")
-            md_lines.append('')
-            md_lines.append(md_escape(r['question']))
-            md_lines.append('')
-            for i, ans in enumerate(r['propositions'], start=1):
-                marker = '✅' if str(i) == str(r['bonne_reponse_index'] or '') else '▫️'
-                md_lines.append(f"- {marker} {md_escape(ans)}")
-            if r['indice']:
-                md_lines.append('')
-                md_lines.append(f"Hint: {md_escape(r['indice'])}")
-            if r['reponse_detaillee']:
-                md_lines.append('')
-                md_lines.append(f"Réponse: {md_escape(r['reponse_detaillee'])}")
-            md_lines.append('')
-            md_lines.append('---')
-            md_lines.append('')
+            md_lines.extend(_export_md_block(r))
         data = '\n'.join(md_lines)
-        resp = make_response(data)
-        resp.headers['Content-Type'] = 'text/markdown; charset=utf-8'
-        resp.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
-        return resp
+    else:
+        data = _export_csv_line(_EXPORT_CSV_HEADER) + ''.join(_export_csv_line(_export_csv_values(r)) for r in rows)
 
-    # Par défaut: CSV
-    import csv
-    from io import StringIO
-    csv_buf = StringIO()
-    writer = csv.writer(csv_buf)
-    writer.writerow(['id', 'auteur', 'theme', 'soustheme', 'difficulte', 'question', 'proposition_1', 'proposition_2', 'proposition_3', 'proposition_4', 'proposition_5', 'proposition_6', 'indice', 'reponse_detaillee', 'bonne_reponse_index', 'publie'])
-    for r in rows:
-        props = list(r['propositions']) if r['propositions'] else []
-        props = props + [''] * (6 - len(props))  # normaliser sur 6 colonnes max
-        writer.writerow([
-            r['id'], r['auteur'] or '', r['theme'] or '', r['soustheme'] or '', r['difficulte'] or '',
-            (r['question'] or '').replace('\r', '').replace('\n', ' ').strip(),
-            (props[0] or '').replace('\r', '').replace('\n', ' ').strip(),
-            (props[1] or '').replace('\r', '').replace('\n', ' ').strip(),
-            (props[2] or '').replace('\r', '').replace('\n', ' ').strip(),
-            (props[3] or '').replace('\r', '').replace('\n', ' ').strip(),
-            (props[4] or '').replace('\r', '').replace('\n', ' ').strip(),
-            (props[5] or '').replace('\r', '').replace('\n', ' ').strip(),
-            (r['indice'] or '').replace('\r', '').replace('\n', ' ').strip(),
-            (r['reponse_detaillee'] or '').replace('\r', '').replace('\n', ' ').strip(),
-            r['bonne_reponse_index'] or '',
-            '1' if r['publie'] else '0'
-        ])
-    resp = make_response(csv_buf.getvalue())
-    resp.headers['Content-Type'] = 'text/csv; charset=utf-8'
+    resp = make_response(data)
+    resp.headers['Content-Type'] = _EXPORT_CONTENT_TYPES[fmt]
     resp.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
     return resp
 
@@ -1776,6 +2013,32 @@ def question_stats_page(question_id: int):
                            distribution=distribution)
 
 
+def _question_form_context(question):
+    """Contexte du formulaire de question
+
+    Thèmes, sous-thèmes et pays viennent du cache de référence. Les selects d'images ne
+    contiennent que les images déjà liées à la question: les autres se choisissent dans
+    la galerie paginée (/api/images/gallery).
+    """
+    reference = get_reference_data(max_age=app.config.get('REFERENCE_DATA_MAX_AGE'))
+    images = []
+    if question:
+        linked = {img.id: img for img in question.images}
+        for link in question.answer_image_links:
+            if link.image:
+                linked.setdefault(link.image.id, link.image)
+        if question.detailed_answer_image:
+            linked.setdefault(question.detailed_answer_image.id, question.detailed_answer_image)
+        images = sorted(linked.values(), key=lambda img: img.created_at or datetime.min, reverse=True)
+    return {
+        'question': question,
+        'themes': reference.themes,
+        'specific_themes': reference.specific_themes,
+        'countries': reference.countries,
+        'images': images,
+    }
+
+
 @app.route('/question/new')
 def new_question():
     """Formulaire pour créer une nouvelle question"""
@@ -1784,11 +2047,7 @@ def new_question():
         return resp
     if not _has_perm('can_create_question'):
         return _deny_access("Permission 'can_create_question' requise")
-    themes = BroadTheme.query.order_by(BroadTheme.name).all()
-    specific_themes = SpecificTheme.query.join(BroadTheme).order_by(BroadTheme.name, SpecificTheme.name).all()
-    countries = Country.query.order_by(Country.name).all()
-    images = ImageAsset.query.order_by(ImageAsset.created_at.desc()).all()
-    return render_template('question_form.html', question=None, themes=themes, specific_themes=specific_themes, countries=countries, images=images)
+    return render_template('question_form.html', **_question_form_context(None))
 
 
 @app.route('/question/<int:question_id>')
@@ -1810,11 +2069,7 @@ def edit_question(question_id):
     if not (can_any or (can_own and getattr(g, 'current_user', None) and question.author_id == g.current_user.id)):
         user = getattr(g, 'current_user', None)
         return render_template('access_denied.html', reason="Permission 'can_update_delete_own_question' ou 'can_update_delete_any_question' requise", current_user=user), 200
-    themes = BroadTheme.query.order_by(BroadTheme.name).all()
-    specific_themes = SpecificTheme.query.join(BroadTheme).order_by(BroadTheme.name, SpecificTheme.name).all()
-    countries = Country.query.order_by(Country.name).all()
-    images = ImageAsset.query.order_by(ImageAsset.created_at.desc()).all()
-    return render_template('question_form.html', question=question, themes=themes, specific_themes=specific_themes, countries=countries, images=images)
+    return render_template('question_form.html', **_question_form_context(question))
 
 
 @app.route('/api/question', methods=['POST'])
@@ -1902,10 +2157,10 @@ def create_question():
             db.session.add(AnswerImageLink(question_id=question.id, answer_index=answer_index, image_id=image_id))
 
         db.session.commit()
+        invalidate_question_index()
         
         # Retourner la liste mise à jour
-        questions = Question.query.order_by(Question.updated_at.desc()).all()
-        return render_template('questions_list.html', questions=questions)
+        return _render_questions_page(_questions_base_query(), 'cards', 'updated_at', 'desc')
     
     except Exception as e:
         return f"Erreur: {str(e)}", 400
@@ -1922,7 +2177,7 @@ def get_question_detail(question_id):
         return question.to_dict()
     
     except Exception as e:
-        print(f"Erreur lors de la récupération de la question {question_id}: {e}")
+        logger.exception("Erreur lors de la récupération de la question %s", question_id)
         return {'error': str(e)}, 500
 
 
@@ -1960,6 +2215,9 @@ def update_question(question_id):
                     answer_images_per_answer.append('')
             i += 1
         
+        # Dimensions des agrégats de /me avant modification (user_stats_rollups)
+        old_dims = (question.broad_theme_id, question.specific_theme_id, question.difficulty_level)
+
         # Mettre à jour les champs
         # Changer l'auteur uniquement avec le droit global
         if can_any and (data.get('author_id') or '').isdigit():
@@ -2014,11 +2272,16 @@ def update_question(question_id):
         for answer_index, image_id in links_to_add:
             db.session.add(AnswerImageLink(question_id=question.id, answer_index=answer_index, image_id=image_id))
 
+        # Thème, sous-thème ou difficulté modifiés: déplacer les réponses dans les agrégats de /me
+        new_dims = (question.broad_theme_id, question.specific_theme_id, question.difficulty_level)
+        if new_dims != old_dims:
+            move_question_rollups(question.id, old_dims, new_dims)
+
         db.session.commit()
+        invalidate_question_index()
         
         # Retourner la liste mise à jour
-        questions = Question.query.order_by(Question.updated_at.desc()).all()
-        return render_template('questions_list.html', questions=questions)
+        return _render_questions_page(_questions_base_query(), 'cards', 'updated_at', 'desc')
     
     except Exception as e:
         return f"Erreur: {str(e)}", 400
@@ -2036,12 +2299,16 @@ def delete_question(question_id):
         can_own = _has_perm('can_update_delete_own_question')
         if not (can_any or (can_own and getattr(g, 'current_user', None) and question.author_id == g.current_user.id)):
             return _deny_access("Permission 'can_update_delete_own_question' ou 'can_update_delete_any_question' requise")
+        # Retirer ses réponses des agrégats de /me, puis ses statistiques, dans la même transaction
+        move_question_rollups(question.id, (question.broad_theme_id, question.specific_theme_id, question.difficulty_level))
+        UserQuestionStat.query.filter_by(question_id=question.id).delete(synchronize_session=False)
+        QuestionAnswerStat.query.filter_by(question_id=question.id).delete(synchronize_session=False)
         db.session.delete(question)
         db.session.commit()
+        invalidate_question_index()
 
         # Retourner la liste mise à jour
-        questions = Question.query.order_by(Question.updated_at.desc()).all()
-        return render_template('questions_list.html', questions=questions)
+        return _render_questions_page(_questions_base_query(), 'cards', 'updated_at', 'desc')
 
     except Exception as e:
         return f"Erreur: {str(e)}", 400
@@ -2062,6 +2329,7 @@ def toggle_question_status(question_id):
         question.is_published = not question.is_published
         question.updated_at = datetime.utcnow()
         db.session.commit()
+        invalidate_question_index()
 
         # Retourner uniquement le contenu de la cellule statut mis à jour
         return render_template('question_status_cell.html', question=question)
@@ -2070,46 +2338,134 @@ def toggle_question_status(question_id):
         return f"Erreur: {str(e)}", 400
 
 
-def _apply_sorting(query, sort_by, sort_order):
-    """Appliquer le tri à la requête selon les paramètres donnés"""
-    if sort_by == 'question_text':
-        if sort_order == 'asc':
-            return query.order_by(Question.question_text.asc())
-        else:
-            return query.order_by(Question.question_text.desc())
-    elif sort_by == 'broad_theme':
-        if sort_order == 'asc':
-            return query.order_by(BroadTheme.name.asc().nulls_last())
-        else:
-            return query.order_by(BroadTheme.name.desc().nulls_last())
-    elif sort_by == 'specific_theme':
-        if sort_order == 'asc':
-            return query.order_by(SpecificTheme.name.asc().nulls_last())
-        else:
-            return query.order_by(SpecificTheme.name.desc().nulls_last())
-    elif sort_by == 'difficulty_level':
-        if sort_order == 'asc':
-            return query.order_by(Question.difficulty_level.asc())
-        else:
-            return query.order_by(Question.difficulty_level.desc())
-    elif sort_by == 'is_published':
-        if sort_order == 'asc':
-            return query.order_by(Question.is_published.asc())
-        else:
-            return query.order_by(Question.is_published.desc())
-    elif sort_by == 'created_at':
-        if sort_order == 'asc':
-            return query.order_by(Question.created_at.asc())
-        else:
-            return query.order_by(Question.created_at.desc())
-    elif sort_by == 'author':
-        if sort_order == 'asc':
-            return query.order_by(User.username.asc().nulls_last())
-        else:
-            return query.order_by(User.username.desc().nulls_last())
-    else:
-        # Tri par défaut
-        return query.order_by(Question.updated_at.desc())
+# Nombre de questions par page dans les listes d'administration ("Charger plus" pour la suite)
+QUESTIONS_PAGE_SIZE = 50
+
+# Colonnes de tri de la liste des questions: clé -> (colonne, peut être NULL)
+_QUESTION_SORT_COLUMNS = {
+    'question_text': (Question.question_text, False),
+    'broad_theme': (BroadTheme.name, True),
+    'specific_theme': (SpecificTheme.name, True),
+    'difficulty_level': (Question.difficulty_level, True),
+    'is_published': (Question.is_published, True),
+    'created_at': (Question.created_at, False),
+    'author': (User.username, False),
+}
+
+
+def _questions_base_query():
+    """Requête de base des listes de questions (auteur, thème et sous-thème joints pour le tri)"""
+    return Question.query.join(User, Question.author_id == User.id).join(BroadTheme, Question.broad_theme_id == BroadTheme.id, isouter=True).join(SpecificTheme, Question.specific_theme_id == SpecificTheme.id, isouter=True)
+
+
+def _filter_questions_search(query, query_param):
+    """Filtrer les questions sur le texte, l'auteur, le thème ou le sous-thème
+
+    Retourne (requête, colonne de pertinence). Avec l'index plein texte, la colonne
+    de pertinence est le score bm25 (tri 'relevance'); en repli LIKE elle vaut None.
+    """
+    if not query_param:
+        return query, None
+    hits = search_hits(query_param, columns=('question_text', 'author', 'broad_theme', 'specific_theme'))
+    if hits is not None:
+        return query.join(hits, hits.c.question_id == Question.id), hits.c.rank
+    return query.filter(
+        db.or_(
+            Question.question_text.contains(query_param),
+            User.username.contains(query_param),
+            BroadTheme.name.contains(query_param),
+            SpecificTheme.name.contains(query_param)
+        )
+    ), None
+
+
+def _question_sort_spec(sort_by, sort_order, rank_column=None):
+    """Retourne (colonne, décroissant, peut être NULL) pour une clé de tri"""
+    if sort_by == 'relevance' and rank_column is not None:
+        # bm25: plus le score est petit, plus la question est pertinente
+        return rank_column, False, False
+    if sort_by in _QUESTION_SORT_COLUMNS:
+        column, nullable = _QUESTION_SORT_COLUMNS[sort_by]
+        return column, sort_order != 'asc', nullable
+    # Tri par défaut
+    return Question.updated_at, True, False
+
+
+def _apply_sorting(query, sort_by, sort_order, rank_column=None):
+    """Appliquer le tri à la requête selon les paramètres donnés
+
+    Question.id départage les égalités pour que l'ordre soit total (pagination par curseur).
+    Les valeurs NULL sont toujours en fin de liste.
+    """
+    column, descending, nullable = _question_sort_spec(sort_by, sort_order, rank_column)
+    key = column.desc() if descending else column.asc()
+    if nullable:
+        key = key.nulls_last()
+    return query.order_by(key, Question.id.desc() if descending else Question.id.asc())
+
+
+def _apply_sort_cursor(query, sort_by, sort_order, cursor, rank_column=None):
+    """Ne garder que les questions situées après le curseur (valeur de tri, id) dans l'ordre de tri"""
+    column, descending, nullable = _question_sort_spec(sort_by, sort_order, rank_column)
+    value, last_id = cursor
+    after_id = Question.id < last_id if descending else Question.id > last_id
+    if value is None:
+        # Le curseur est déjà dans les NULL (fin de liste)
+        return query.filter(column.is_(None), after_id)
+    # Paramètre typé: les booléens (is_published) se comparent comme des valeurs ordinaires
+    value = literal(value, column.type)
+    after_value = column < value if descending else column > value
+    condition = or_(after_value, and_(column == value, after_id))
+    if nullable:
+        condition = or_(condition, column.is_(None))
+    return query.filter(condition)
+
+
+def _encode_sort_cursor(value, question_id):
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    raw = json.dumps([value, question_id])
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+
+
+def _decode_sort_cursor(raw, sort_by, sort_order, rank_column=None):
+    """Retourne (valeur de tri, id) ou None si le curseur est absent ou invalide"""
+    if not raw:
+        return None
+    try:
+        value, question_id = json.loads(base64.urlsafe_b64decode(raw.encode('ascii')).decode('utf-8'))
+        column = _question_sort_spec(sort_by, sort_order, rank_column)[0]
+        if value is not None and isinstance(column.type, db.DateTime):
+            value = datetime.fromisoformat(value)
+        return value, int(question_id)
+    except (ValueError, TypeError):
+        return None
+
+
+def _render_questions_page(base_query, view, sort_by, sort_order, query_param='', rank_column=None):
+    """Rendre une page de questions triées
+
+    Sans curseur: la liste complète (en-têtes, grille ou tableau) avec la première page.
+    Avec curseur: uniquement les éléments suivants, qui remplacent le bouton "Charger plus".
+    """
+    cursor = _decode_sort_cursor(request.args.get('cursor', ''), sort_by, sort_order, rank_column)
+    query = _apply_sorting(base_query, sort_by, sort_order, rank_column)
+    if cursor:
+        query = _apply_sort_cursor(query, sort_by, sort_order, cursor, rank_column)
+
+    # La valeur de tri est lue avec la question pour construire le curseur suivant
+    sort_column = _question_sort_spec(sort_by, sort_order, rank_column)[0]
+    rows = query.add_columns(sort_column).limit(QUESTIONS_PAGE_SIZE + 1).all()
+    page = rows[:QUESTIONS_PAGE_SIZE]
+    questions = [question for question, _ in page]
+    next_cursor = None
+    if len(rows) > QUESTIONS_PAGE_SIZE:
+        last_question, last_value = page[-1]
+        next_cursor = _encode_sort_cursor(last_value, last_question.id)
+
+    template = 'questions_page.html' if cursor else 'questions_list.html'
+    return render_template(template, questions=questions, view=view, sort_by=sort_by, sort_order=sort_order,
+                           q=query_param, next_cursor=next_cursor)
 
 
 @app.route('/api/questions/search')
@@ -2120,25 +2476,12 @@ def search_questions():
         return denied
     query_param = request.args.get('q', '').strip()
     view = request.args.get('view', 'cards')
-    sort_by = request.args.get('sort_by', 'updated_at')
+    # Une recherche sans tri explicite est classée par pertinence
+    sort_by = request.args.get('sort_by') or ('relevance' if query_param else 'updated_at')
     sort_order = request.args.get('sort_order', 'desc')
 
-    base_query = Question.query.join(User, Question.author_id == User.id).join(BroadTheme, Question.broad_theme_id == BroadTheme.id, isouter=True).join(SpecificTheme, Question.specific_theme_id == SpecificTheme.id, isouter=True)
-
-    if query_param:
-        base_query = base_query.filter(
-            db.or_(
-                Question.question_text.contains(query_param),
-                User.username.contains(query_param),
-                User.username.contains(query_param),
-                BroadTheme.name.contains(query_param),
-                SpecificTheme.name.contains(query_param)
-            )
-        )
-
-    questions = _apply_sorting(base_query, sort_by, sort_order).all()
-
-    return render_template('questions_list.html', questions=questions, view=view, sort_by=sort_by, sort_order=sort_order)
+    base_query, rank_column = _filter_questions_search(_questions_base_query(), query_param)
+    return _render_questions_page(base_query, view, sort_by, sort_order, query_param, rank_column)
 
 
 @app.route('/api/questions/sort')
@@ -2162,25 +2505,18 @@ def sort_questions():
         # Nouvelle colonne, on commence par ascendant
         sort_order = 'asc'
 
-    base_query = Question.query.join(User, Question.author_id == User.id).join(BroadTheme, Question.broad_theme_id == BroadTheme.id, isouter=True).join(SpecificTheme, Question.specific_theme_id == SpecificTheme.id, isouter=True)
+    base_query, rank_column = _filter_questions_search(_questions_base_query(), query_param)
+    return _render_questions_page(base_query, view, sort_by, sort_order, query_param, rank_column)
 
-    if query_param:
-        base_query = base_query.filter(
-            db.or_(
-                Question.question_text.contains(query_param),
-                User.username.contains(query_param),
-                User.username.contains(query_param),
-                BroadTheme.name.contains(query_param),
-                SpecificTheme.name.contains(query_param)
-            )
-        )
 
-    questions = _apply_sorting(base_query, sort_by, sort_order).all()
-
-    return render_template('questions_list.html', questions=questions, view=view, sort_by=sort_by, sort_order=sort_order)
+# ===== Routes pour les thèmes =====
 
+def _themes_list_fragment() -> str:
+    """Liste hiérarchique thèmes / sous-thèmes (nombre de questions compris)"""
+    def load():
+        return {'themes': BroadTheme.query.order_by(BroadTheme.name).all()}
+    return _render_list_fragment('themes_unified_list.html', ('broad_themes', 'specific_themes', 'questions'), load)
 
-# ===== Routes pour les thèmes =====
 
 @app.route('/api/themes')
 def list_themes():
@@ -2188,8 +2524,7 @@ def list_themes():
     denied = _ensure_perm_api()
     if denied:
         return denied
-    themes = BroadTheme.query.order_by(BroadTheme.name).all()
-    return render_template('themes_unified_list.html', themes=themes)
+    return _themes_list_fragment()
 
 
 @app.route('/api/themes/json')
@@ -2248,6 +2583,7 @@ def create_theme():
         
         db.session.add(theme)
         db.session.commit()
+        invalidate_reference_data()
 
         # Si formulaire embarqué (modale au-dessus d'une autre modale): renvoyer JSON
         if request.form.get('embedded') in ('1', 'true', 'yes'):
@@ -2262,8 +2598,7 @@ def create_theme():
             }
 
         # Retourner la liste mise à jour
-        themes = BroadTheme.query.order_by(BroadTheme.name).all()
-        return render_template('themes_unified_list.html', themes=themes)
+        return _themes_list_fragment()
 
     except Exception as e:
         return f"Erreur: {str(e)}", 400
@@ -2290,9 +2625,10 @@ def update_theme(theme_id):
         
         db.session.commit()
         
+        invalidate_reference_data()
+        
         # Retourner la liste mise à jour
-        themes = BroadTheme.query.order_by(BroadTheme.name).all()
-        return render_template('themes_unified_list.html', themes=themes)
+        return _themes_list_fragment()
 
     except Exception as e:
         return f"Erreur: {str(e)}", 400
@@ -2314,10 +2650,10 @@ def delete_theme(theme_id):
 
         db.session.delete(theme)
         db.session.commit()
+        invalidate_reference_data()
 
         # Retourner la liste mise à jour
-        themes = BroadTheme.query.order_by(BroadTheme.name).all()
-        return render_template('themes_unified_list.html', themes=themes)
+        return _themes_list_fragment()
 
     except Exception as e:
         return f"Erreur: {str(e)}", 400
@@ -2340,8 +2676,7 @@ def list_specific_themes():
     denied = _ensure_perm_api()
     if denied:
         return denied
-    themes = BroadTheme.query.order_by(BroadTheme.name).all()
-    return render_template('themes_unified_list.html', themes=themes)
+    return _themes_list_fragment()
 
 
 @app.route('/specific-theme/new')
@@ -2395,6 +2730,7 @@ def create_specific_theme():
 
         db.session.add(specific_theme)
         db.session.commit()
+        invalidate_reference_data()
 
         # Si formulaire embarqué (modale au-dessus d'une autre modale): renvoyer JSON
         if request.form.get('embedded') in ('1', 'true', 'yes'):
@@ -2410,8 +2746,7 @@ def create_specific_theme():
             }
 
         # Retourner la liste mise à jour
-        themes = BroadTheme.query.order_by(BroadTheme.name).all()
-        return render_template('themes_unified_list.html', themes=themes)
+        return _themes_list_fragment()
 
     except Exception as e:
         return f"Erreur: {str(e)}", 400
@@ -2439,9 +2774,10 @@ def update_specific_theme(specific_theme_id):
 
         db.session.commit()
 
+        invalidate_reference_data()
+
         # Retourner la liste mise à jour
-        themes = BroadTheme.query.order_by(BroadTheme.name).all()
-        return render_template('themes_unified_list.html', themes=themes)
+        return _themes_list_fragment()
 
     except Exception as e:
         return f"Erreur: {str(e)}", 400
@@ -2463,10 +2799,10 @@ def delete_specific_theme(specific_theme_id):
 
         db.session.delete(specific_theme)
         db.session.commit()
+        invalidate_reference_data()
 
         # Retourner la liste mise à jour
-        themes = BroadTheme.query.order_by(BroadTheme.name).all()
-        return render_template('themes_unified_list.html', themes=themes)
+        return _themes_list_fragment()
 
     except Exception as e:
         return f"Erreur: {str(e)}", 400
@@ -2525,25 +2861,34 @@ def create_keyword():
         
         # Vérifier si le mot-clé existe déjà (normalisation pour éviter doublons)
         # Normaliser: enlever accents, espaces, traits d'union, mettre en minuscules
-        normalized_name = unidecode(name.lower()).replace('-', '').replace(' ', '').replace('_', '')
-        
-        existing_keywords = Keyword.query.all()
-        for existing in existing_keywords:
-            existing_normalized = unidecode(existing.name.lower()).replace('-', '').replace(' ', '').replace('_', '')
-            if existing_normalized == normalized_name:
-                return {
-                    'error': 'Un mot-clé similaire existe déjà',
-                    'existing_keyword': existing.to_dict()
-                }, 409
+        normalized_name = normalize_keyword_name(name)
+
+        def duplicate_response():
+            existing = Keyword.query.filter_by(normalized_name=normalized_name).first()
+            if not existing:
+                return None
+            return {
+                'error': 'Un mot-clé similaire existe déjà',
+                'existing_keyword': existing.to_dict()
+            }, 409
+
+        duplicate = duplicate_response()
+        if duplicate:
+            return duplicate
         
-        # Créer le nouveau mot-clé
+        # Créer le nouveau mot-clé (normalized_name est renseigné par l'événement du modèle)
         keyword = Keyword(
             name=name,
             language=language,
             description=description if description else None
         )
         db.session.add(keyword)
-        db.session.commit()
+        try:
+            db.session.commit()
+        except IntegrityError:
+            # Création concurrente du même mot-clé: l'index unique a tranché
+            db.session.rollback()
+            return duplicate_response() or ({'error': 'Un mot-clé similaire existe déjà'}, 409)
         
         return {
             'success': True,
@@ -2569,14 +2914,19 @@ def users_page():
     return render_template('users.html')
 
 
+def _users_list_fragment() -> str:
+    def load():
+        return {'users': User.query.filter_by(is_active=True).order_by(User.username).all()}
+    return _render_list_fragment('users_list.html', ('users', 'questions'), load)
+
+
 @app.route('/api/users')
 def list_users():
     """Retourner la liste des utilisateurs en HTML (pour HTMX)"""
     denied = _ensure_perm_api('can_manage_users')
     if denied:
         return denied
-    users = User.query.filter_by(is_active=True).order_by(User.username).all()
-    return render_template('users_list.html', users=users)
+    return _users_list_fragment()
 
 
 @app.route('/user/new')
@@ -2637,8 +2987,7 @@ def create_user():
         db.session.commit()
 
         # Retourner la liste mise à jour
-        users = User.query.filter_by(is_active=True).order_by(User.username).all()
-        return render_template('users_list.html', users=users)
+        return _users_list_fragment()
 
     except Exception as e:
         return f"Erreur: {str(e)}", 400
@@ -2683,8 +3032,7 @@ def update_user(user_id):
         db.session.commit()
 
         # Retourner la liste mise à jour
-        users = User.query.filter_by(is_active=True).order_by(User.username).all()
-        return render_template('users_list.html', users=users)
+        return _users_list_fragment()
 
     except Exception as e:
         return f"Erreur: {str(e)}", 400
@@ -2709,8 +3057,7 @@ def delete_user(user_id):
         db.session.commit()
 
         # Retourner la liste mise à jour
-        users = User.query.filter_by(is_active=True).order_by(User.username).all()
-        return render_template('users_list.html', users=users)
+        return _users_list_fragment()
 
     except Exception as e:
         return f"Erreur: {str(e)}", 400
@@ -2729,14 +3076,19 @@ def profiles_page():
     return render_template('profiles.html')
 
 
+def _profiles_list_fragment() -> str:
+    def load():
+        return {'profiles': Profile.query.order_by(Profile.name).all()}
+    return _render_list_fragment('profiles_list.html', ('profiles',), load)
+
+
 @app.route('/api/profiles')
 def list_profiles():
     """Retourner la liste des profils en HTML (pour HTMX)"""
     denied = _ensure_perm_api('can_manage_profiles')
     if denied:
         return denied
-    profiles = Profile.query.order_by(Profile.name).all()
-    return render_template('profiles_list.html', profiles=profiles)
+    return _profiles_list_fragment()
 
 
 @app.route('/profile/new')
@@ -2795,8 +3147,7 @@ def create_profile():
         db.session.add(profile)
         db.session.commit()
 
-        profiles = Profile.query.order_by(Profile.name).all()
-        return render_template('profiles_list.html', profiles=profiles)
+        return _profiles_list_fragment()
     except Exception as e:
         return f"Erreur: {str(e)}", 400
 
@@ -2828,8 +3179,7 @@ def update_profile(profile_id: int):
 
         db.session.commit()
 
-        profiles = Profile.query.order_by(Profile.name).all()
-        return render_template('profiles_list.html', profiles=profiles)
+        return _profiles_list_fragment()
     except Exception as e:
         return f"Erreur: {str(e)}", 400
 
@@ -2849,8 +3199,7 @@ def delete_profile(profile_id: int):
         db.session.delete(profile)
         db.session.commit()
 
-        profiles = Profile.query.order_by(Profile.name).all()
-        return render_template('profiles_list.html', profiles=profiles)
+        return _profiles_list_fragment()
     except Exception as e:
         return f"Erreur: {str(e)}", 400
 
@@ -2866,20 +3215,23 @@ def countries():
     return render_template('countries.html')
 
 
+def _countries_list_fragment(search: str = '') -> str:
+    def load():
+        query = Country.query
+        if search:
+            query = query.filter(Country.name.like(f'%{search}%'))
+        return {'countries': query.order_by(Country.name).all()}
+    # Le nombre de questions par pays passe par question_countries, modifiée avec la question
+    return _render_list_fragment('countries_list.html', ('countries', 'questions'), load, search)
+
+
 @app.route('/api/countries')
 def list_countries_api():
     """Retourner la liste des pays en HTML (pour HTMX)"""
     denied = _ensure_perm_api()
     if denied:
         return denied
-    search = request.args.get('search', '')
-    query = Country.query
-    
-    if search:
-        query = query.filter(Country.name.like(f'%{search}%'))
-    
-    countries = query.order_by(Country.name).all()
-    return render_template('countries_list.html', countries=countries)
+    return _countries_list_fragment(request.args.get('search', ''))
 
 
 @app.route('/country/new')
@@ -2923,10 +3275,10 @@ def create_country():
         
         db.session.add(country)
         db.session.commit()
+        invalidate_reference_data()
         
         # Retourner la liste mise à jour
-        countries = Country.query.order_by(Country.name).all()
-        return render_template('countries_list.html', countries=countries)
+        return _countries_list_fragment()
     
     except Exception as e:
         return f"Erreur: {str(e)}", 400
@@ -2953,9 +3305,10 @@ def update_country(country_id):
         
         db.session.commit()
         
+        invalidate_reference_data()
+        
         # Retourner la liste mise à jour
-        countries = Country.query.order_by(Country.name).all()
-        return render_template('countries_list.html', countries=countries)
+        return _countries_list_fragment()
     
     except Exception as e:
         return f"Erreur: {str(e)}", 400
@@ -2977,9 +3330,9 @@ def delete_country(country_id):
         
         db.session.delete(country)
         db.session.commit()
+        invalidate_reference_data()
         
-        countries = Country.query.order_by(Country.name).all()
-        return render_template('countries_list.html', countries=countries)
+        return _countries_list_fragment()
     
     except Exception as e:
         return f"Erreur: {str(e)}", 400
@@ -2997,7 +3350,7 @@ def _apply_quiz_filters(query, params):
     rule_set_slug = (params.get('rule_set') or '').strip()
     if rule_set_slug:
         # Appliquer les règles du set
-        rule_set = QuizRuleSet.query.filter_by(slug=rule_set_slug, is_active=True).first()
+        rule_set = _get_rule_set(rule_set_slug)
         if rule_set:
             # Difficultés autorisées
             allowed_diffs = rule_set.get_allowed_difficulties()
@@ -3005,14 +3358,12 @@ def _apply_quiz_filters(query, params):
                 query = query.filter(Question.difficulty_level.in_(allowed_diffs))
 
             # Thèmes larges
-            if not rule_set.use_all_broad_themes and rule_set.allowed_broad_themes:
-                theme_ids = [t.id for t in rule_set.allowed_broad_themes]
-                query = query.filter(Question.broad_theme_id.in_(theme_ids))
+            if not rule_set.use_all_broad_themes and rule_set.allowed_broad_theme_ids:
+                query = query.filter(Question.broad_theme_id.in_(rule_set.allowed_broad_theme_ids))
 
             # Sous-thèmes
-            if not rule_set.use_all_specific_themes and rule_set.allowed_specific_themes:
-                sub_theme_ids = [st.id for st in rule_set.allowed_specific_themes]
-                query = query.filter(Question.specific_theme_id.in_(sub_theme_ids))
+            if not rule_set.use_all_specific_themes and rule_set.allowed_specific_theme_ids:
+                query = query.filter(Question.specific_theme_id.in_(rule_set.allowed_specific_theme_ids))
 
             # Note: pas de filtre pays pour l'instant dans les sets de règles
     else:
@@ -3036,6 +3387,22 @@ def _apply_quiz_filters(query, params):
     return query
 
 
+def _quiz_index_filters(params) -> dict:
+    """Filtres manuels du quiz (voir _apply_quiz_filters) pour QuestionIndex.eligible_ids()."""
+    filters = {}
+    if (params.get('rule_set') or '').strip():
+        # Set inconnu ou inactif: _apply_quiz_filters n'applique alors aucun filtre
+        return filters
+    for param, name in (('broad_theme_id', 'broad_theme_ids'),
+                        ('specific_theme_id', 'specific_theme_ids'),
+                        ('country_id', 'country_ids'),
+                        ('difficulty_level', 'difficulties')):
+        value = (params.get(param) or '').strip()
+        if value.isdigit():
+            filters[name] = [int(value)]
+    return filters
+
+
 def _interleave_round_robin(lists_by_difficulty):
     """Intercale les listes de questions par difficulté (round-robin) pour varier l'ordre.
     Entrée: dict[int,list[int]]
@@ -3058,166 +3425,71 @@ def _interleave_round_robin(lists_by_difficulty):
     return result
 
 
+def _get_question_index():
+    """Index en mémoire des questions publiées (reconstruit après invalidation ou expiration)."""
+    return get_question_index(max_age=app.config.get('QUIZ_INDEX_MAX_AGE'))
+
+
+def _get_rule_set(slug: str):
+    """Instantané en cache du set de règles actif `slug`, ou None (voir rule_set_cache.py)."""
+    return get_rule_set(slug, max_age=app.config.get('RULE_SET_CACHE_MAX_AGE'))
+
+
 def _quiz_session_keys(rule_set_slug: str):
-    """Construit des clés de session isolées par utilisateur et par set.
-    Retourne (playlist_key, index_key, score_key, correct_key, user_id_str)
+    """Construit la clé de l'état de quiz côté serveur, isolée par navigateur, utilisateur et set.
+    Seul le jeton opaque 'quiz_token' est conservé dans le cookie de session.
+    Retourne (state_key, user_id_str)
     """
+    token = session.get('quiz_token')
+    if not token:
+        token = new_quiz_token()
+        session['quiz_token'] = token
     user_id_str = str(g.current_user.id) if getattr(g, 'current_user', None) else 'anon'
-    prefix = f"{user_id_str}:{rule_set_slug}"
-    playlist_key = f"quiz_playlist:{prefix}"
-    index_key = f"quiz_playlist_index:{prefix}"
-    score_key = f"quiz_score:{prefix}"
-    correct_key = f"quiz_correct_answers:{prefix}"
-    return playlist_key, index_key, score_key, correct_key, user_id_str
+    state_key = f"{token}:{user_id_str}:{rule_set_slug}"
+    return state_key, user_id_str
+
+
+def _load_quiz_state(state_key: str) -> dict:
+    """Charge l'état de la partie (dict vide si absent ou expiré)."""
+    return quiz_state_store.get(state_key) or {}
+
+
+def _save_quiz_state(state_key: str, state: dict):
+    quiz_state_store.set(state_key, state)
+
+
+# Nombre max d'ordres de mélange conservés par état (le plus ancien est retiré)
+_MAX_STORED_SHUFFLES = 20
+
+
+def _remember_shuffle(state: dict, question_id: int, answer_indices: list[int]):
+    shuffles = state.setdefault('shuffles', {})
+    shuffles.pop(str(question_id), None)
+    shuffles[str(question_id)] = answer_indices
+    while len(shuffles) > _MAX_STORED_SHUFFLES:
+        shuffles.pop(next(iter(shuffles)))
 
 
 def _get_user_answered_keywords(user_id: int) -> set[int]:
-    """Récupère les IDs de tous les keywords déjà répondus par l'utilisateur."""
+    """Récupère les IDs de tous les keywords déjà répondus par l'utilisateur.
+
+    Une seule requête (jointure statistiques -> question_keywords), servie par les index
+    uq_user_question et la clé primaire de question_keywords: pas de liste IN côté Python.
+    """
     if not user_id:
         return set()
     
     try:
-        # Récupérer toutes les questions déjà répondues
-        answered_question_ids = {row.question_id for row in 
-                                 UserQuestionStat.query.with_entities(UserQuestionStat.question_id)
-                                 .filter_by(user_id=user_id).all()}
-        
-        if not answered_question_ids:
-            return set()
-        
-        # Récupérer les keywords de ces questions
-        from sqlalchemy import select
-        keyword_ids = set()
-        result = db.session.execute(
-            select(db.literal_column('keyword_id'))
-            .select_from(db.text('question_keywords'))
-            .where(db.literal_column('question_id').in_(answered_question_ids))
-        )
-        keyword_ids = {row[0] for row in result}
-        return keyword_ids
+        rows = (db.session.query(question_keywords.c.keyword_id)
+                .join(UserQuestionStat, UserQuestionStat.question_id == question_keywords.c.question_id)
+                .filter(UserQuestionStat.user_id == user_id)
+                .distinct())
+        return {keyword_id for (keyword_id,) in rows}
     except Exception as e:
-        print(f"[KEYWORDS] Erreur lors de la récupération des keywords répondus: {e}")
+        playlist_logger.warning("Erreur lors de la récupération des keywords répondus: %s", e)
         return set()
 
 
-def _select_questions_with_keyword_logic(
-    candidate_ids: list[int],
-    seen_question_ids: set[int],
-    used_keywords: set[int],
-    answered_keywords: set[int],
-    prevent_duplicate_keywords: bool,
-    quota: int
-) -> tuple[list[int], set[int], dict[str, any]]:
-    """
-    Sélectionne les questions en respectant la logique des keywords.
-    
-    Priorités (par ordre d'importance):
-    1. Condition QuizRuleSet (ABSOLU) - déjà appliqué dans candidate_ids
-    2. Pas de doublons de keywords dans le quiz (si prevent_duplicate_keywords)
-    3. Pas de questions déjà répondues
-    4. Pas de keywords déjà répondus
-    
-    Retourne: (selected_ids, used_keywords_updated, stats)
-    """
-    if not candidate_ids or quota <= 0:
-        return [], used_keywords, {'perfect': True, 'conditions_met': []}
-    
-    # Charger toutes les questions candidates avec leurs keywords
-    candidates = Question.query.filter(Question.id.in_(candidate_ids)).options(
-        db.joinedload(Question.keywords)
-    ).all()
-    
-    # Stats pour le debug
-    stats = {
-        'perfect': True,
-        'total_candidates': len(candidates),
-        'conditions_met': [],
-        'fallback_used': []
-    }
-    
-    selected_ids = []
-    current_used_keywords = set(used_keywords)
-    
-    # Fonction pour scorer une question selon les priorités
-    def score_question(q: Question) -> tuple:
-        """Retourne un tuple de score (plus élevé = meilleur). Format: (prio1, prio2, prio3, prio4)"""
-        q_keywords = {kw.id for kw in q.keywords}
-        
-        # Priorité 1: Pas de doublons de keywords (si activé)
-        if prevent_duplicate_keywords and q_keywords:
-            has_duplicate_keyword = bool(q_keywords & current_used_keywords)
-        else:
-            has_duplicate_keyword = False
-        
-        # Priorité 2: Question non répondue
-        is_unseen = q.id not in seen_question_ids
-        
-        # Priorité 3: Keywords non répondus
-        if q_keywords and answered_keywords:
-            has_unanswered_keywords = bool(q_keywords & answered_keywords)
-        else:
-            has_unanswered_keywords = False
-        
-        # Questions sans keywords ont un bonus (pas de risque de doublon)
-        no_keywords = len(q_keywords) == 0
-        
-        # Retourner score (format: pas de doublon keyword, non vue, pas keyword répondu, sans keyword)
-        return (
-            not has_duplicate_keyword,  # Vrai = 1, Faux = 0 (on veut True en premier)
-            is_unseen,
-            not has_unanswered_keywords,
-            no_keywords
-        )
-    
-    # Trier les candidats par score (du meilleur au pire)
-    sorted_candidates = sorted(candidates, key=score_question, reverse=True)
-    
-    # Sélectionner jusqu'au quota
-    for q in sorted_candidates:
-        if len(selected_ids) >= quota:
-            break
-        
-        q_keywords = {kw.id for kw in q.keywords}
-        
-        # Vérifier si on respecte toutes les conditions
-        conditions_perfect = True
-        
-        # Condition 2: Pas de doublons de keywords
-        if prevent_duplicate_keywords and q_keywords and (q_keywords & current_used_keywords):
-            conditions_perfect = False
-            stats['fallback_used'].append('keyword_duplicate')
-        
-        # Condition 3: Question non répondue
-        if q.id in seen_question_ids:
-            conditions_perfect = False
-            stats['fallback_used'].append('question_already_seen')
-        
-        # Condition 4: Keywords non répondus
-        if q_keywords and answered_keywords and (q_keywords & answered_keywords):
-            conditions_perfect = False
-            stats['fallback_used'].append('keyword_already_answered')
-        
-        if not conditions_perfect:
-            stats['perfect'] = False
-        
-        selected_ids.append(q.id)
-        current_used_keywords.update(q_keywords)
-    
-    # Statistiques finales
-    if stats['perfect']:
-        stats['conditions_met'] = ['Toutes les conditions respectées ✅']
-    else:
-        fallback_counts = {}
-        for fb in stats['fallback_used']:
-            fallback_counts[fb] = fallback_counts.get(fb, 0) + 1
-        stats['conditions_met'] = [
-            f"⚠️ {count}x {reason.replace('_', ' ')}" 
-            for reason, count in fallback_counts.items()
-        ]
-    
-    return selected_ids, current_used_keywords, stats
-
-
 def _generate_quiz_playlist(rule_set: QuizRuleSet, current_user_id: int | None) -> list[int]:
     """
     Génère la playlist (liste d'IDs de questions) pour un quiz à longueur fixe.
@@ -3232,8 +3504,9 @@ def _generate_quiz_playlist(rule_set: QuizRuleSet, current_user_id: int | None)
     En mode 'auto': respecte les quotas par difficulté avec gestion keywords.
     """
     try:
-        print(f"\n[QUIZ PLAYLIST] === Génération playlist pour {rule_set.name} ===")
-        
+        # Bilan de génération: un seul enregistrement structuré (voir app_logging.py)
+        fields = {'rule_set': rule_set.slug, 'user_id': current_user_id}
+
         # Récupérer les IDs déjà vus par l'utilisateur (si connecté)
         seen_ids = set()
         answered_keywords = set()
@@ -3242,50 +3515,53 @@ def _generate_quiz_playlist(rule_set: QuizRuleSet, current_user_id: int | None)
                        UserQuestionStat.query.with_entities(UserQuestionStat.question_id)
                        .filter_by(user_id=current_user_id).all()}
             answered_keywords = _get_user_answered_keywords(current_user_id)
-            print(f"[QUIZ PLAYLIST] Utilisateur {current_user_id}: {len(seen_ids)} questions vues, {len(answered_keywords)} keywords répondus")
+        fields['seen'] = len(seen_ids)
+        fields['answered_keywords'] = len(answered_keywords)
         
         prevent_duplicate_keywords = rule_set.prevent_duplicate_keywords
-        print(f"[QUIZ PLAYLIST] Prévention doublons keywords: {'OUI' if prevent_duplicate_keywords else 'NON'}")
+        fields['prevent_duplicate_keywords'] = bool(prevent_duplicate_keywords)
+
+        # Index en mémoire des questions publiées (thèmes, difficulté, masques de keywords)
+        index = _get_question_index()
+        answered_mask = index.keyword_mask(answered_keywords)
 
         # Mode manuel: partir de la sélection explicite
-        if rule_set.question_selection_mode == 'manual' and rule_set.selected_questions:
-            print(f"[QUIZ PLAYLIST] Mode MANUEL: {len(rule_set.selected_questions)} questions sélectionnées")
-            selected = [q for q in rule_set.selected_questions if q.is_published]
-            candidate_ids = [q.id for q in selected]
+        if rule_set.question_selection_mode == 'manual' and rule_set.selected_question_ids:
+            # L'index ne contient que les questions publiées
+            candidate_ids = [qid for qid in rule_set.selected_question_ids if qid in index]
             
             # Appliquer la logique keywords sur toute la sélection
-            playlist, _, stats = _select_questions_with_keyword_logic(
+            playlist, used_mask, stats = select_by_keyword_masks(
                 candidate_ids=candidate_ids,
+                keyword_masks=index.keyword_masks,
                 seen_question_ids=seen_ids,
-                used_keywords=set(),
-                answered_keywords=answered_keywords,
+                used_mask=0,
+                answered_mask=answered_mask,
                 prevent_duplicate_keywords=prevent_duplicate_keywords,
                 quota=len(candidate_ids)
             )
             
-            # Logs
-            if stats['perfect']:
-                print(f"[QUIZ PLAYLIST] ✅ CONDITIONS PARFAITES: {', '.join(stats['conditions_met'])}")
-            else:
-                print(f"[QUIZ PLAYLIST] ⚠️ COMPROMIS NÉCESSAIRES:")
-                for condition in stats['conditions_met']:
-                    print(f"[QUIZ PLAYLIST]    {condition}")
-            
-            print(f"[QUIZ PLAYLIST] Playlist générée: {len(playlist)} questions")
+            fields.update(mode='manual', selected=len(rule_set.selected_question_ids),
+                          expected=len(candidate_ids), size=len(playlist), perfect=stats['perfect'],
+                          conditions=stats['conditions_met'], unique_keywords=used_mask.bit_count())
+            playlist_logger.info("playlist générée", extra={'fields': fields})
             return playlist
 
         # Mode auto: quotas par difficulté et filtres de thèmes
         qmap = rule_set.get_questions_per_difficulty() or {}
         allowed_diffs = rule_set.get_allowed_difficulties() or [1, 2, 3, 4, 5]
-        print(f"[QUIZ PLAYLIST] Mode AUTO: difficultés {allowed_diffs}, quotas {qmap}")
 
-        # Construire la requête de base selon le set de règles
-        base_params = {'rule_set': rule_set.slug}
-        base_query = _apply_quiz_filters(Question.query.filter(Question.is_published.is_(True)), base_params)
+        # Filtres de thèmes du set de règles (None = pas de restriction)
+        broad_theme_ids = None
+        if not rule_set.use_all_broad_themes and rule_set.allowed_broad_theme_ids:
+            broad_theme_ids = list(rule_set.allowed_broad_theme_ids)
+        specific_theme_ids = None
+        if not rule_set.use_all_specific_themes and rule_set.allowed_specific_theme_ids:
+            specific_theme_ids = list(rule_set.allowed_specific_theme_ids)
 
         # Préparer par difficulté avec logique keywords
         per_diff_ids: dict[int, list[int]] = {}
-        used_keywords_global = set()
+        used_mask_global = 0
         all_stats = []
         
         for d in allowed_diffs:
@@ -3294,20 +3570,19 @@ def _generate_quiz_playlist(rule_set: QuizRuleSet, current_user_id: int | None)
                 per_diff_ids[d] = []
                 continue
 
-            print(f"[QUIZ PLAYLIST] Difficulté {d}: quota={quota}")
-            
-            q_for_diff = base_query.filter(Question.difficulty_level == d)
-            candidates = q_for_diff.with_entities(Question.id).all()
-            candidate_ids = [row.id for row in candidates]
-            
-            print(f"[QUIZ PLAYLIST]   Candidats disponibles: {len(candidate_ids)}")
+            candidate_ids = sorted(index.candidates(
+                difficulties=[d],
+                broad_theme_ids=broad_theme_ids,
+                specific_theme_ids=specific_theme_ids,
+            ))
             
             # Appliquer la logique keywords
-            chosen, used_keywords_global, stats = _select_questions_with_keyword_logic(
+            chosen, used_mask_global, stats = select_by_keyword_masks(
                 candidate_ids=candidate_ids,
+                keyword_masks=index.keyword_masks,
                 seen_question_ids=seen_ids,
-                used_keywords=used_keywords_global,
-                answered_keywords=answered_keywords,
+                used_mask=used_mask_global,
+                answered_mask=answered_mask,
                 prevent_duplicate_keywords=prevent_duplicate_keywords,
                 quota=quota
             )
@@ -3316,45 +3591,26 @@ def _generate_quiz_playlist(rule_set: QuizRuleSet, current_user_id: int | None)
             all_stats.append({
                 'difficulty': d,
                 'quota': quota,
+                'candidates': len(candidate_ids),
                 'selected': len(chosen),
                 'perfect': stats['perfect'],
                 'conditions': stats['conditions_met']
             })
-            
-            print(f"[QUIZ PLAYLIST]   Sélectionnés: {len(chosen)}/{quota}")
-            if not stats['perfect']:
-                for condition in stats['conditions_met']:
-                    print(f"[QUIZ PLAYLIST]     {condition}")
 
         # Intercaler pour varier
         playlist = _interleave_round_robin(per_diff_ids)
         expected_total = sum(int(qmap.get(str(d), 0) or 0) for d in allowed_diffs)
         
-        # Logs finaux
-        print(f"\n[QUIZ PLAYLIST] === RÉSUMÉ FINAL ===")
-        print(f"[QUIZ PLAYLIST] Playlist générée: {len(playlist)}/{expected_total} questions")
-        
-        # Vérifier si toutes les conditions sont parfaites
-        all_perfect = all(stat['perfect'] for stat in all_stats)
-        if all_perfect:
-            print(f"[QUIZ PLAYLIST] ✅ CONDITIONS PARFAITES pour toutes les questions !")
-        else:
-            print(f"[QUIZ PLAYLIST] ⚠️ COMPROMIS NÉCESSAIRES:")
-            for stat in all_stats:
-                if not stat['perfect']:
-                    print(f"[QUIZ PLAYLIST]   Difficulté {stat['difficulty']}: {', '.join(stat['conditions'])}")
-        
-        if len(playlist) < expected_total:
-            print(f"[QUIZ PLAYLIST] ⚠️ Playlist incomplète. Pool insuffisant pour certains quotas.")
-        
-        print(f"[QUIZ PLAYLIST] Keywords uniques utilisés: {len(used_keywords_global)}")
-        print(f"[QUIZ PLAYLIST] ==================\n")
+        # Compromis (conditions non parfaites) et playlist incomplète (pool insuffisant) se lisent dans le bilan
+        fields.update(mode='auto', difficulties=allowed_diffs, expected=expected_total, size=len(playlist),
+                      perfect=all(stat['perfect'] for stat in all_stats), per_difficulty=all_stats,
+                      unique_keywords=used_mask_global.bit_count())
+        playlist_logger.log(logging.INFO if len(playlist) >= expected_total else logging.WARNING,
+                            "playlist générée", extra={'fields': fields})
 
         return playlist
-    except Exception as e:
-        print(f"[QUIZ PLAYLIST] ❌ ERREUR génération playlist: {e}")
-        import traceback
-        traceback.print_exc()
+    except Exception:
+        playlist_logger.exception("erreur de génération de la playlist du set %s", rule_set.slug)
         return []
 
 @app.route('/play')
@@ -3383,49 +3639,152 @@ def play_quiz():
     return render_template('play.html', rule_sets=rule_sets, rule_set=rule_set)
 
 
+def _shuffle_question_answers(question, answer_indices: list[int] | None = None) -> list[int] | None:
+    """Mélange les propositions de réponses pour éviter que la bonne réponse soit toujours à la même position.
+    Renseigne question._shuffled_answers, _shuffled_correct_answer et _original_indices pour le template.
+    `answer_indices`: ordre déjà tiré pour cette question (réaffiché tel quel, ex. fragment préchargé).
+    Retourne l'ordre de mélange (indices originaux, 0-based) ou None si la question ne peut pas être mélangée.
+    """
+    try:
+        original_answers = question.possible_answers.split('|||')
+        num_answers = len(original_answers)
+
+        # Vérifications de sécurité
+        if num_answers == 0:
+            shuffle_logger.debug("question %s sans réponses, pas de mélange", question.id)
+            return None
+
+        # Convertir correct_answer en int si c'est une chaîne
+        try:
+            correct_answer_int = int(question.correct_answer)
+        except (ValueError, TypeError):
+            shuffle_logger.warning("question %s: correct_answer invalide (%r), pas de mélange", question.id, question.correct_answer)
+            return None
+        if correct_answer_int < 1 or correct_answer_int > num_answers:
+            shuffle_logger.warning("question %s: correct_answer %s hors de 1-%s, pas de mélange",
+                                   question.id, question.correct_answer, num_answers)
+            return None
+
+        # Créer une liste d'indices [0, 1, 2, ...] et la mélanger (sauf ordre déjà tiré et valide)
+        if not answer_indices or sorted(answer_indices) != list(range(num_answers)):
+            answer_indices = list(range(num_answers))
+            random.shuffle(answer_indices)
+
+        # Remplacer temporairement les réponses dans l'objet question pour le template
+        question._shuffled_answers = [original_answers[i] for i in answer_indices]
+
+        # Calculer la nouvelle position de la bonne réponse (1-based pour correspondre à correct_answer)
+        new_correct_position = answer_indices.index(correct_answer_int - 1) + 1
+        question._shuffled_correct_answer = new_correct_position
+
+        # Calculer les indices originaux pour chaque position mélangée (pour les images)
+        question._original_indices = answer_indices
+
+        shuffle_logger.debug("question %s: %s réponses mélangées, bonne réponse %s -> %s",
+                             question.id, num_answers, correct_answer_int, new_correct_position)
+        return answer_indices
+    except Exception as e:
+        # En cas d'erreur, on continue sans mélanger
+        shuffle_logger.warning("erreur de mélange de la question %s, pas de mélange: %s", question.id, e)
+        return None
+
+
+def _quiz_question_image_urls(question_id: int) -> list[str]:
+    """URLs des images affichées par quiz_question.html pour cette question (préchargement)"""
+    question = Question.query.options(
+        db.selectinload(Question.images),
+        db.selectinload(Question.answer_image_links).joinedload(AnswerImageLink.image)
+    ).get(question_id)
+    if question is None:
+        return []
+    urls = [img.variant_url(480) for img in question.images]
+    urls += [link.image.variant_url(160) for link in question.answer_image_links if link.image]
+    return urls
+
+
+def _quiz_step(values) -> int | None:
+    """Étape envoyée par le client: nombre de questions déjà répondues dans la partie (0 = nouvelle partie).
+    None si absente ou non numérique (jamais interprétée comme une nouvelle partie).
+    """
+    step = (values.get('step') or '').strip()
+    return int(step) if step.isdigit() else None
+
+
+def _state_step(state: dict) -> int:
+    """Étape tenue côté serveur: nombre de réponses enregistrées dans la partie."""
+    return int(state.get('step', 0) or 0)
+
+
+def _record_answered(state: dict, question_id: int, free_play: bool) -> int:
+    """Compte la réponse dans l'état de la partie et retourne l'étape suivante.
+    En partie libre, la question rejoint l'historique (IDs triés, exclus des tirages suivants);
+    en partie à set de règles, la playlist et son index suffisent.
+    """
+    state['step'] = _state_step(state) + 1
+    if free_play:
+        history = state.setdefault('history', [])
+        # Liste triée (recherche par bisection), bornée: tout le bloc est resérialisé à chaque étape
+        position = bisect.bisect_left(history, question_id)
+        if position == len(history) or history[position] != question_id:
+            if len(history) >= app.config['QUIZ_HISTORY_MAX_IDS']:
+                # Historique plein: nouveau cycle, les questions déjà posées redeviennent tirables
+                history.clear()
+                position = 0
+            history.insert(position, question_id)
+    return state['step']
+
+
+def _quiz_next_url(rule_set, state: dict) -> str | None:
+    """URL du fragment de la question suivante, préchargé depuis la page de résultat
+
+    L'URL porte l'identifiant de partie et l'étape: unique pour une position de la
+    partie, elle peut être servie depuis le cache du navigateur (QUIZ_PREFETCH_MAX_AGE).
+    None si la partie est terminée (la page de fin clôt la session: pas de préchargement).
+    """
+    index = int(state.get('index', 0) or 0)
+    if not state.get('game') or index >= len(state.get('playlist') or []):
+        return None
+    return url_for('next_quiz_question', rule_set=rule_set.slug, game=state['game'],
+                   step=_state_step(state))
+
+
 @app.route('/api/quiz/next')
 def next_quiz_question():
     """Retourne la prochaine question du quiz en consommant une playlist pré-générée.
-    Si aucune playlist n'existe encore pour ce set, la génère et la stocke en session.
+    Si aucune playlist n'existe encore pour ce set, la génère et la stocke dans l'état de quiz côté serveur.
+    L'historique des questions répondues est tenu dans cet état: le client n'envoie que l'étape
+    (nombre de questions répondues, 0 pour démarrer une nouvelle partie).
     """
     try:
         params = request.args
         rule_set_slug = (params.get('rule_set') or '').strip()
-        history_raw = (params.get('history') or '').strip()
+        step = _quiz_step(params)
         quick_double_click = params.get('quick_double_click', 'false').lower() == 'true'
-        history_ids = []
-        if history_raw:
-            for token in history_raw.split(','):
-                token = token.strip()
-                if token.isdigit():
-                    history_ids.append(int(token))
 
-        rule_set = None
-        if rule_set_slug:
-            rule_set = QuizRuleSet.query.filter_by(slug=rule_set_slug, is_active=True).first()
+        rule_set = _get_rule_set(rule_set_slug)
 
-        # Mode playlist: construire/charger la playlist en session (clé par utilisateur)
-        playlist_session_key = None
-        playlist_index_key = None
-        score_session_key = None
-        correct_answers_session_key = None
-        if rule_set:
-            playlist_session_key, playlist_index_key, score_session_key, correct_answers_session_key, user_ns = _quiz_session_keys(rule_set.slug)
+        # État de la partie côté serveur (namespace utilisateur + set)
+        state_key, user_ns = _quiz_session_keys(rule_set.slug if rule_set else '')
+        state = _load_quiz_state(state_key)
+        if step == 0 and not rule_set:
+            # Nouvelle partie libre (étape 0 explicite): historique vidé
+            state = {'history': [], 'shuffles': {}, 'step': 0}
+        elif step != _state_step(state):
+            # Étape absente ou périmée (double clic, onglet en retard): la position du serveur fait foi
+            quiz_logger.debug("next: étape client %s ignorée, étape serveur %s", step, _state_step(state))
 
         question = None
         total_questions = 0
         if rule_set:
-            # Si pas encore de playlist, la générer
-            playlist: list[int] = session.get(playlist_session_key) or []
-            # Si démarrage d'une nouvelle partie (history vide) OU playlist absente, régénérer
-            if (not history_raw) or (not playlist):
+            playlist: list[int] = state.get('playlist') or []
+            # Si démarrage d'une nouvelle partie (étape 0) OU playlist absente, régénérer
+            if step == 0 or not playlist:
                 playlist = _generate_quiz_playlist(rule_set, g.current_user.id if getattr(g, 'current_user', None) else None)
-                session[playlist_session_key] = playlist
-                session[playlist_index_key] = 0
-                # Reset score/correct pour ce namespace utilisateur+set
-                session[score_session_key] = 0
-                session[correct_answers_session_key] = 0
-                print(f"[QUIZ PLAYLIST] Générée (reset={not bool(history_raw)}) pour user={user_ns} set='{rule_set.slug}' (len={len(playlist)}): {playlist}")
+                # Reset progression/score/correct pour ce namespace utilisateur+set
+                # 'game' identifie la partie dans les URLs de préchargement (voir _quiz_next_url)
+                state = {'playlist': playlist, 'index': 0, 'score': 0, 'correct': 0, 'streak': 0, 'session_id': None,
+                         'step': 0, 'shuffles': {}, 'game': new_quiz_token()[:12]}
+                playlist_logger.debug("playlist (reset=%s) user=%s set=%s: %s", step == 0, user_ns, rule_set.slug, playlist)
 
                 # Démarrer une UserQuizSession si utilisateur connecté
                 if getattr(g, 'current_user', None):
@@ -3449,25 +3808,21 @@ def next_quiz_question():
                         )
                         db.session.add(new_session)
                         db.session.commit()
-                        # Stocker l'ID de session dans la session Flask pour ce namespace utilisateur+set
-                        session_key_session_id = f"quiz_session_id:{user_ns}:{rule_set.slug}"
-                        session[session_key_session_id] = new_session.id
+                        state['session_id'] = new_session.id
                     except Exception:
                         db.session.rollback()
 
             total_questions = len(playlist)
-            index = int(session.get(playlist_index_key, 0) or 0)
+            index = int(state.get('index', 0) or 0)
 
             # Si terminé: fin du quiz
             if index >= total_questions:
-                # Récupérer le nombre de bonnes réponses depuis la session
-                total_correct_answers = int(session.get(correct_answers_session_key, 0) or 0)
-                total_score = int(session.get(score_session_key, 0) or 0)
+                total_correct_answers = int(state.get('correct', 0) or 0)
+                total_score = int(state.get('score', 0) or 0)
                 # Clore la UserQuizSession comme completed si présente
                 if getattr(g, 'current_user', None):
                     try:
-                        session_key_session_id = f"quiz_session_id:{user_ns}:{rule_set.slug}"
-                        sess_id = session.get(session_key_session_id)
+                        sess_id = state.get('session_id')
                         if sess_id:
                             s = UserQuizSession.query.get(sess_id)
                             if s and s.status == 'in_progress':
@@ -3479,13 +3834,13 @@ def next_quiz_question():
                                 db.session.commit()
                     except Exception:
                         db.session.rollback()
+                _save_quiz_state(state_key, state)
                 return render_template(
                     'quiz_final.html',
                     rule_set=rule_set,
                     total_questions=total_questions,
                     total_score=total_score,
-                    total_correct_answers=total_correct_answers,
-                    history=history_raw or ''
+                    total_correct_answers=total_correct_answers
                 )
 
             # Charger la prochaine question via l'ID de la playlist
@@ -3496,112 +3851,81 @@ def next_quiz_question():
                 db.joinedload(Question.answer_image_links).joinedload(AnswerImageLink.image)
             ).get(next_question_id)
         else:
-            # Mode sans set explicite: fallback à l'aléatoire historique (comme avant)
-            query = Question.query.filter(Question.is_published.is_(True))
-            query = _apply_quiz_filters(query, params)
-            if history_ids:
-                query = query.filter(~Question.id.in_(history_ids))
-            question = query.options(
+            # Mode sans set explicite: tirage aléatoire uniforme dans l'index en mémoire, hors historique
+            question_options = (
                 db.joinedload(Question.images),
                 db.joinedload(Question.detailed_answer_image),
                 db.joinedload(Question.answer_image_links).joinedload(AnswerImageLink.image)
-            ).order_by(db.func.random()).first()
-
-        # Si on sort du mode set (pas de rule_set), marquer toute session in_progress comme abandonnée
-        if getattr(g, 'current_user', None):
-            try:
-                # Abandonner toutes sessions en cours (tous sets) si l'utilisateur a quitté le set
-                in_prog = UserQuizSession.query.filter_by(user_id=g.current_user.id, status='in_progress').all()
-                for s in in_prog:
-                    s.status = 'abandoned'
-                    s.updated_at = datetime.utcnow()
-                if in_prog:
-                    db.session.commit()
-            except Exception:
-                db.session.rollback()
+            )
+            history_ids = set(state.get('history') or [])
+            question_id = _get_question_index().random_question_id(exclude=history_ids, **_quiz_index_filters(params))
+            if question_id is not None:
+                question = Question.query.options(*question_options).get(question_id)
+                if question is None or not question.is_published:
+                    # Index périmé (écriture d'un autre processus): tirage SQL historique
+                    query = Question.query.filter(Question.is_published.is_(True))
+                    query = _apply_quiz_filters(query, params)
+                    if history_ids:
+                        query = query.filter(~Question.id.in_(history_ids))
+                    question = query.options(*question_options).order_by(db.func.random()).first()
+
+            # Hors mode set: marquer toute session in_progress comme abandonnée
+            if getattr(g, 'current_user', None):
+                try:
+                    in_prog = UserQuizSession.query.filter_by(user_id=g.current_user.id, status='in_progress').all()
+                    for s in in_prog:
+                        s.status = 'abandoned'
+                        s.updated_at = datetime.utcnow()
+                    if in_prog:
+                        db.session.commit()
+                except Exception:
+                    db.session.rollback()
 
-        # Debug logging
-        print(f"[QUIZ NEXT] Rule set: {rule_set_slug}, History: {history_raw}")
-        print(f"[QUIZ NEXT] Selected question ID: {question.id if question else 'None'}")
-        print(f"[QUIZ NEXT] Question difficulty: {question.difficulty_level if question else 'N/A'}")
+        quiz_logger.debug("next: set=%s étape=%s historique=%s question=%s difficulté=%s",
+                          rule_set_slug, step, _state_step(state),
+                          question.id if question else None, question.difficulty_level if question else None)
 
-        # Calculer la progression et le score total (stocké en session)
+        # Calculer la progression et le score total (stockés dans l'état de quiz)
         total_score = 0
         current_question_num = 0
 
         if rule_set:
-            # Gestion du score en session (reset en début de session)
-            if not history_raw:
-                # Note: la playlist réinitialise déjà score/correct au moment de la génération
-                session[score_session_key] = session.get(score_session_key, 0) or 0
-                session[correct_answers_session_key] = session.get(correct_answers_session_key, 0) or 0
-            total_score = int(session.get(score_session_key, 0) or 0)
-
-            # Progression basée sur la playlist
-            playlist = session.get(playlist_session_key) or []
-            index = int(session.get(playlist_index_key, 0) or 0)
+            total_score = int(state.get('score', 0) or 0)
+            index = int(state.get('index', 0) or 0)
             # Affichage utilisateur: index courant (1-based)
-            current_question_num = min(index + 1, len(playlist)) if playlist else 1
-            total_questions = len(playlist)
+            current_question_num = min(index + 1, total_questions) if total_questions else 1
 
-        # Mélanger les propositions de réponses pour éviter que la bonne réponse soit toujours à la même position
+        # Mélanger les propositions et mémoriser l'ordre pour la validation de la réponse.
+        # Un ordre déjà tiré est réutilisé: le fragment préchargé et un rechargement affichent le même.
         if question and question.possible_answers:
-            try:
-                original_answers = question.possible_answers.split('|||')
-                num_answers = len(original_answers)
+            previous_order = (state.get('shuffles') or {}).get(str(question.id)) if rule_set else None
+            answer_indices = _shuffle_question_answers(question, previous_order)
+            if answer_indices is not None:
+                _remember_shuffle(state, question.id, answer_indices)
 
-                # Vérifications de sécurité
-                if num_answers == 0:
-                    print(f"[QUIZ SHUFFLE] Question {question.id} has no answers, skipping shuffle")
-                    return
+        # Images de la question suivante, préchargées par le navigateur pendant la question courante
+        prefetch_image_urls = []
+        if rule_set:
+            index = int(state.get('index', 0) or 0)
+            if index + 1 < total_questions:
+                prefetch_image_urls = _quiz_question_image_urls(state['playlist'][index + 1])
 
-                # Convertir correct_answer en int si c'est une chaîne
-                try:
-                    correct_answer_int = int(question.correct_answer)
-                    if correct_answer_int < 1 or correct_answer_int > num_answers:
-                        print(f"[QUIZ SHUFFLE] Question {question.id} has invalid correct_answer: {question.correct_answer} (should be 1-{num_answers}), skipping shuffle")
-                        return
-                    else:
-                        question.correct_answer = correct_answer_int  # Mettre à jour pour être sûr
-                except (ValueError, TypeError):
-                    print(f"[QUIZ SHUFFLE] Question {question.id} has invalid correct_answer type: {type(question.correct_answer)} value: {question.correct_answer}, skipping shuffle")
-                    return
-
-                # Créer une liste d'indices [0, 1, 2, ...] et la mélanger
-                answer_indices = list(range(num_answers))
-                random.shuffle(answer_indices)
-
-                # Créer les réponses dans l'ordre mélangé
-                shuffled_answers = [original_answers[i] for i in answer_indices]
-
-                # Stocker l'ordre de mélange en session pour cette question (clé par question_id)
-                shuffle_key = f"question_shuffle_{question.id}"
-                session[shuffle_key] = answer_indices
-
-                # Remplacer temporairement les réponses dans l'objet question pour le template
-                question._shuffled_answers = shuffled_answers
-
-                # Calculer la nouvelle position de la bonne réponse (1-based pour correspondre à correct_answer)
-                original_correct_index = question.correct_answer - 1  # 0-based
-                new_correct_position = answer_indices.index(original_correct_index) + 1  # 1-based
-                question._shuffled_correct_answer = new_correct_position
-
-                # Calculer les indices originaux pour chaque position mélangée (pour les images)
-                question._original_indices = answer_indices
-
-                print(f"[QUIZ SHUFFLE] Question {question.id}: shuffled {num_answers} answers, correct answer moved from position {question.correct_answer} to {new_correct_position}")
-            except Exception as e:
-                print(f"[QUIZ SHUFFLE] Error shuffling answers for question {question.id}: {str(e)}, skipping shuffle")
-                # En cas d'erreur, on continue sans mélanger
+        _save_quiz_state(state_key, state)
 
-        return render_template('quiz_question.html',
+        response = make_response(render_template('quiz_question.html',
                              question=question,
-                             history=history_raw,
+                             step=_state_step(state),
                              rule_set=rule_set,
                              current_question_num=current_question_num,
                              total_questions=total_questions,
                              total_score=total_score,
-                             quick_double_click=quick_double_click)
+                             quick_double_click=quick_double_click,
+                             prefetch_image_urls=prefetch_image_urls))
+        if rule_set and params.get('game') and params.get('game') == state.get('game') and step == _state_step(state):
+            # URL de préchargement (unique par partie et par étape): réutilisable depuis le cache du navigateur
+            response.cache_control.private = True
+            response.cache_control.max_age = app.config['QUIZ_PREFETCH_MAX_AGE']
+        return response
     except Exception as e:
         return f"Erreur: {str(e)}", 400
 
@@ -3615,12 +3939,11 @@ def cancel_quiz_session():
         rule_set_slug = (request.form.get('rule_set') or '').strip()
         if not rule_set_slug:
             return "Paramètre 'rule_set' manquant", 400
-        rule_set = QuizRuleSet.query.filter_by(slug=rule_set_slug, is_active=True).first()
+        rule_set = _get_rule_set(rule_set_slug)
         if not rule_set:
             return "Set inconnu", 404
-        _, _, _, _, user_ns = _quiz_session_keys(rule_set.slug)
-        session_key_session_id = f"quiz_session_id:{user_ns}:{rule_set.slug}"
-        sess_id = session.get(session_key_session_id)
+        state_key, _ = _quiz_session_keys(rule_set.slug)
+        sess_id = _load_quiz_state(state_key).get('session_id')
         if not sess_id:
             return "Aucune session en cours", 200
         s = UserQuizSession.query.get(sess_id)
@@ -3628,42 +3951,20 @@ def cancel_quiz_session():
             s.status = 'abandoned'
             s.updated_at = datetime.utcnow()
             db.session.commit()
+        quiz_state_store.delete(state_key)
         return "OK", 200
     except Exception as e:
         db.session.rollback()
         return { 'error': str(e) }, 400
 
 
-def _calculate_score(rule_set, question, is_correct, history_questions):
-    """Calcule le score selon les règles du set."""
-    if not rule_set or not is_correct:
+def _calculate_score(rule_set, question, is_correct, streak):
+    """Calcule le score selon les règles du set (fonction précompilée de l'instantané, voir quiz_scoring.py).
+    streak: bonnes réponses consécutives, réponse courante incluse.
+    """
+    if not rule_set:
         return 0
-
-    score = rule_set.scoring_base_points
-
-    # Bonus selon difficulté
-    if rule_set.scoring_difficulty_bonus_type == 'add':
-        bonus_map = rule_set.get_difficulty_bonus_map()
-        bonus = bonus_map.get(str(question.difficulty_level), 0)
-        score += bonus
-    elif rule_set.scoring_difficulty_bonus_type == 'mult':
-        coeff_map = rule_set.get_difficulty_bonus_map()
-        coeff = coeff_map.get(str(question.difficulty_level), 1.0)
-        score = int(score * coeff)
-
-    # Bonus de combo
-    if rule_set.combo_bonus_enabled and rule_set.combo_step and rule_set.combo_bonus_points:
-        # Compter les bonnes réponses consécutives à la fin
-        consecutive_correct = 0
-        for q in reversed(history_questions):
-            if q.success_count > q.times_answered - q.success_count:  # Simplifié: majorité de succès
-                consecutive_correct += 1
-            else:
-                break
-        combo_count = consecutive_correct // rule_set.combo_step
-        score += combo_count * rule_set.combo_bonus_points
-
-    return score
+    return rule_set.score(question.difficulty_level, is_correct, streak)
 
 
 @app.route('/api/debug/quiz-questions')
@@ -3694,10 +3995,8 @@ def debug_quiz_questions():
                 query = query.filter(~Question.id.in_(seen_ids))
 
         # Appliquer la logique de set de règles si présent
-        rule_set = None
+        rule_set = _get_rule_set(rule_set_slug)
         selected_diff = None
-        if rule_set_slug:
-            rule_set = QuizRuleSet.query.filter_by(slug=rule_set_slug, is_active=True).first()
 
         if rule_set and rule_set.get_questions_per_difficulty():
             # Logique de quotas par difficulté
@@ -3757,14 +4056,11 @@ def debug_quiz_questions():
             }
             debug_data['questions'].append(question_data)
 
-        # Afficher aussi dans la console du serveur
-        print(f"\n=== DEBUG QUIZ QUESTIONS ===")
-        print(f"Rule set: {debug_data['rule_set']} ({rule_set_slug})")
-        print(f"History IDs: {history_ids}")
-        print(f"Selected difficulty: {selected_diff}")
-        print(f"Total available questions: {len(questions)}")
-        print(f"Questions: {[q['id'] for q in debug_data['questions']]}")
-        print("===========================\n")
+        # Tracer aussi côté serveur
+        quiz_logger.debug("debug questions", extra={'fields': {
+            'rule_set': rule_set_slug, 'history': history_ids, 'difficulty': selected_diff,
+            'available': len(questions), 'questions': [q['id'] for q in debug_data['questions']],
+        }})
 
         return debug_data
 
@@ -3778,7 +4074,6 @@ def submit_quiz_answer():
     try:
         question_id_raw = (request.form.get('question_id') or '').strip()
         selected_answer = (request.form.get('selected_answer') or '').strip()
-        history_raw = (request.form.get('history') or '').strip()
         rule_set_slug = (request.form.get('rule_set') or '').strip()
         is_timeout = bool((request.form.get('timeout') or '').strip())
 
@@ -3791,11 +4086,22 @@ def submit_quiz_answer():
             db.joinedload(Question.answer_image_links).joinedload(AnswerImageLink.image)
         ).get_or_404(int(question_id_raw))
 
+        # Charger le set de règles si spécifié
+        rule_set = _get_rule_set(rule_set_slug)
+
+        # État de la partie côté serveur (namespace utilisateur + set)
+        state_key, _ = _quiz_session_keys(rule_set.slug if rule_set else '')
+        state = _load_quiz_state(state_key)
+
+        # L'étape envoyée doit être celle du serveur: une réponse rejouée (double clic, timer et clic,
+        # onglet en retard) n'est ni comptée ni notée une seconde fois
+        if _quiz_step(request.form) != _state_step(state):
+            return "Réponse déjà enregistrée ou partie désynchronisée: relancez le quiz.", 409
+
         # Vérifier si les réponses ont été mélangées pour cette question
-        shuffle_key = f"question_shuffle_{question.id}"
-        shuffle_order = session.get(shuffle_key)
+        shuffle_order = (state.get('shuffles') or {}).get(str(question.id))
 
-        if shuffle_order and selected_answer and selected_answer.isdigit():
+        if shuffle_order and selected_answer.isdigit() and 1 <= int(selected_answer) <= len(shuffle_order):
             # Convertir l'index sélectionné (dans l'ordre mélangé, 1-based) vers l'index original (1-based)
             selected_index_mixed = int(selected_answer) - 1  # 0-based
             original_index = shuffle_order[selected_index_mixed] + 1  # 1-based
@@ -3807,113 +4113,46 @@ def submit_quiz_answer():
         # Si pas de réponse (timer expiré ou non sélection), considérer comme faux
         is_correct = bool(selected_answer_original) and (selected_answer_original == correct_value)
 
-        # Debug logging
-        print(f"[QUIZ ANSWER] Question ID: {question_id_raw}, Selected: '{selected_answer}', Correct: '{correct_value}', Is correct: {is_correct}")
+        quiz_logger.debug("answer: question=%s choisie=%r attendue=%r correcte=%s",
+                          question_id_raw, selected_answer, correct_value, is_correct)
 
-        # Charger le set de règles si spécifié
-        rule_set = None
-        if rule_set_slug:
-            rule_set = QuizRuleSet.query.filter_by(slug=rule_set_slug, is_active=True).first()
-
-        # Calculer le score selon les règles
+        # Calculer le score selon les règles (série de bonnes réponses tenue dans l'état de quiz)
         score = 0
+        streak = 0
         if rule_set:
-            # Récupérer l'historique complet pour le calcul du combo
-            history_ids = []
-            if history_raw:
-                for token in history_raw.split(','):
-                    token = token.strip()
-                    if token.isdigit():
-                        history_ids.append(int(token))
-            history_questions = Question.query.filter(Question.id.in_(history_ids)).all() if history_ids else []
-            score = _calculate_score(rule_set, question, is_correct, history_questions)
-
-        # Mettre à jour les statistiques globales de la question
-        question.times_answered = (question.times_answered or 0) + 1
-        if is_correct:
-            question.success_count = (question.success_count or 0) + 1
-        question.updated_at = datetime.utcnow()
-
-        # Mettre à jour les statistiques utilisateur-question
-        if getattr(g, 'current_user', None):
-            stat = UserQuestionStat.query.filter_by(user_id=g.current_user.id, question_id=question.id).first()
-            if not stat:
-                stat = UserQuestionStat(user_id=g.current_user.id, question_id=question.id)
-                db.session.add(stat)
-            stat.times_answered = (stat.times_answered or 0) + 1
-            if is_correct:
-                stat.success_count = (stat.success_count or 0) + 1
-            stat.last_selected_answer = selected_answer_original
-            stat.last_is_correct = is_correct
-            stat.last_answered_at = datetime.utcnow()
+            streak = int(state.get('streak', 0) or 0) + 1 if is_correct else 0
+            score = _calculate_score(rule_set, question, is_correct, streak)
 
-        # Mettre à jour la distribution des réponses (QuestionAnswerStat)
-        try:
-            if selected_answer_original and selected_answer_original.isdigit():
-                idx = int(selected_answer_original)
-                qa = QuestionAnswerStat.query.filter_by(question_id=question.id, answer_index=idx).first()
-                if not qa:
-                    qa = QuestionAnswerStat(question_id=question.id, answer_index=idx, selected_count=0)
-                    db.session.add(qa)
-                qa.selected_count = (qa.selected_count or 0) + 1
-        except Exception:
-            # Ne pas bloquer la réponse si l'agg échoue
-            db.session.rollback()
-
-        db.session.commit()
+        # Enregistrer la réponse: compteurs de la question, stats utilisateur, distribution des
+        # réponses et progression de la UserQuizSession (écriture différée en mode asynchrone)
+        current_user = getattr(g, 'current_user', None)
+        answer_stats_pipeline.submit(AnswerEvent(
+            question_id=question.id,
+            user_id=current_user.id if current_user else None,
+            selected_answer=selected_answer_original,
+            is_correct=is_correct,
+            score=int(score or 0),
+            quiz_session_id=state.get('session_id') if (rule_set and current_user) else None,
+            answered_at=datetime.utcnow(),
+        ))
 
-        # Mettre à jour le score total et le nombre de bonnes réponses en session (namespace user)
         if rule_set:
-            _, _, score_session_key, correct_answers_session_key, _ = _quiz_session_keys(rule_set.slug)
-            total_score_session = int(session.get(score_session_key, 0) or 0)
+            # Mettre à jour le score total et le nombre de bonnes réponses dans l'état de quiz
             if is_correct and score:
-                total_score_session += int(score)
-            session[score_session_key] = total_score_session
-
-            # Compter les bonnes réponses
-            total_correct_answers_session = int(session.get(correct_answers_session_key, 0) or 0)
+                state['score'] = int(state.get('score', 0) or 0) + int(score)
             if is_correct:
-                total_correct_answers_session += 1
-            session[correct_answers_session_key] = total_correct_answers_session
+                state['correct'] = int(state.get('correct', 0) or 0) + 1
+            state['streak'] = streak
 
-        # Mettre à jour la progression de playlist (si set de règles, namespace user)
-        if rule_set:
-            playlist_session_key, playlist_index_key, score_session_key, correct_answers_session_key, user_ns = _quiz_session_keys(rule_set.slug)
-            index = int(session.get(playlist_index_key, 0) or 0)
-            playlist = session.get(playlist_session_key) or []
-            # Avancer l'index si la question correspond à l'élément courant
+            # Avancer l'index de playlist si la question correspond à l'élément courant
+            index = int(state.get('index', 0) or 0)
+            playlist = state.get('playlist') or []
             if index < len(playlist) and playlist[index] == question.id:
-                session[playlist_index_key] = index + 1
-
-            # Mettre à jour la UserQuizSession si présente
-            if getattr(g, 'current_user', None):
-                try:
-                    session_key_session_id = f"quiz_session_id:{user_ns}:{rule_set.slug}"
-                    sess_id = session.get(session_key_session_id)
-                    if sess_id:
-                        s = UserQuizSession.query.get(sess_id)
-                        if s and s.status == 'in_progress':
-                            s.answered_count = min((s.answered_count or 0) + 1, s.total_questions or 0)
-                            if is_correct:
-                                s.correct_count = (s.correct_count or 0) + 1
-                            # total_score est déjà mis à jour en session; l'appliquer si on a un score crédité
-                            if is_correct and score:
-                                s.total_score = (s.total_score or 0) + int(score)
-                            s.updated_at = datetime.utcnow()
-                            db.session.commit()
-                except Exception:
-                    db.session.rollback()
+                state['index'] = index + 1
 
-        # Mettre à jour l'historique côté client (ajouter la question actuelle)
-        history_ids = []
-        if history_raw:
-            for token in history_raw.split(','):
-                token = token.strip()
-                if token.isdigit():
-                    history_ids.append(int(token))
-        if question.id not in history_ids:
-            history_ids.append(question.id)
-        next_history = ','.join(str(i) for i in history_ids)
+        # Historique de la partie côté serveur: le client ne reçoit que l'étape suivante
+        next_step = _record_answered(state, question.id, free_play=not rule_set)
+        _save_quiz_state(state_key, state)
 
         # Calculer la progression et le score total mis à jour
         total_questions = 0
@@ -3922,28 +4161,26 @@ def submit_quiz_answer():
 
         if rule_set:
             # Progression basée sur la playlist
-            playlist_session_key, playlist_index_key, score_session_key, correct_answers_session_key, user_ns = _quiz_session_keys(rule_set.slug)
-            index = int(session.get(playlist_index_key, 0) or 0)
-            playlist = session.get(playlist_session_key) or []
-            total_questions = len(playlist)
+            index = int(state.get('index', 0) or 0)
+            total_questions = len(state.get('playlist') or [])
             current_question_num = min(index, total_questions)
 
-            # Score total depuis la session
-            score_session_key = score_session_key
-            total_score = int(session.get(score_session_key, 0) or 0)
+            # Score total depuis l'état de quiz
+            total_score = int(state.get('score', 0) or 0)
 
         return render_template(
             'quiz_result.html',
             question=question,
             is_correct=is_correct,
             selected=selected_answer_original,
-            history=next_history,
+            step=next_step,
             rule_set=rule_set,
             score=score,
             current_question_num=current_question_num,
             total_questions=total_questions,
             total_score=total_score,
-            is_timeout=is_timeout
+            is_timeout=is_timeout,
+            next_url=_quiz_next_url(rule_set, state) if rule_set else None
         )
     except Exception as e:
         return f"Erreur: {str(e)}", 400
@@ -3974,14 +4211,19 @@ def quiz_rules_page():
     return render_template('quiz_rules.html')
 
 
+def _quiz_rules_list_fragment() -> str:
+    def load():
+        return {'rules': QuizRuleSet.query.order_by(QuizRuleSet.updated_at.desc()).all()}
+    return _render_list_fragment('quiz_rules_list.html', ('quiz_rule_sets', 'users'), load)
+
+
 @app.route('/api/quiz-rules')
 def list_quiz_rules():
     """Retourner la liste des sets de règles en HTML (pour HTMX)"""
     denied = _ensure_perm_api()
     if denied:
         return denied
-    rules = QuizRuleSet.query.order_by(QuizRuleSet.updated_at.desc()).all()
-    return render_template('quiz_rules_list.html', rules=rules)
+    return _quiz_rules_list_fragment()
 
 
 @app.route('/quiz-rule/<int:rule_id>/stats')
@@ -4041,7 +4283,7 @@ def _load_quiz_rule_defaults():
                 config = json.load(f)
                 return config.get('defaults', {})
     except Exception as e:
-        print(f"Erreur lors du chargement des valeurs par défaut: {e}")
+        logger.warning("Erreur lors du chargement des valeurs par défaut: %s", e)
     
     # Valeurs par défaut en dur si le fichier n'existe pas
     return {
@@ -4214,9 +4456,9 @@ def create_quiz_rule():
 
         db.session.add(rule)
         db.session.commit()
+        invalidate_rule_sets()
 
-        rules = QuizRuleSet.query.order_by(QuizRuleSet.updated_at.desc()).all()
-        return render_template('quiz_rules_list.html', rules=rules)
+        return _quiz_rules_list_fragment()
     except Exception as e:
         return f"Erreur: {str(e)}", 400
 
@@ -4344,9 +4586,9 @@ def update_quiz_rule(rule_id: int):
 
         rule.updated_at = datetime.utcnow()
         db.session.commit()
+        invalidate_rule_sets()
 
-        rules = QuizRuleSet.query.order_by(QuizRuleSet.updated_at.desc()).all()
-        return render_template('quiz_rules_list.html', rules=rules)
+        return _quiz_rules_list_fragment()
     except Exception as e:
         return f"Erreur: {str(e)}", 400
 
@@ -4365,8 +4607,8 @@ def delete_quiz_rule(rule_id: int):
             return _deny_access("Permission 'can_update_delete_own_rule' ou 'can_update_delete_any_rule' requise")
         db.session.delete(rule)
         db.session.commit()
-        rules = QuizRuleSet.query.order_by(QuizRuleSet.updated_at.desc()).all()
-        return render_template('quiz_rules_list.html', rules=rules)
+        invalidate_rule_sets()
+        return _quiz_rules_list_fragment()
     except Exception as e:
         return f"Erreur: {str(e)}", 400
 
@@ -4463,7 +4705,7 @@ def count_questions_for_rule():
         return {'count': count, 'message': message}
 
     except Exception as e:
-        print(f"Erreur lors du comptage des questions: {e}")
+        logger.exception("Erreur lors du comptage des questions")
         return {'count': 0, 'message': 'Erreur lors du calcul'}
 
 
@@ -4510,7 +4752,7 @@ def get_questions_for_selection():
         return {'questions': questions_data, 'count': len(questions_data)}
 
     except Exception as e:
-        print(f"Erreur lors de la récupération des questions: {e}")
+        logger.exception("Erreur lors de la récupération des questions")
         return {'questions': [], 'error': str(e)}
 
 
@@ -0,0 +1,105 @@
+"""
+Journalisation de l'application (module logging), non bloquante et filtrée par sous-système.
+
+Les routes de quiz écrivaient leurs traces avec print(): plusieurs lignes par
+requête (playlists entières comprises), écrites de façon synchrone sur stdout
+dans le chemin critique. Les modules obtiennent désormais leur logger par
+sous-système (get_logger('quiz.playlist'), get_logger('images')...), tous
+enfants du logger 'geoquiz'. Celui-ci n'a qu'un QueueHandler : la requête ne
+fait qu'ajouter l'enregistrement à une file, un QueueListener (thread de fond)
+le met en forme et l'écrit. La file est vidée à l'arrêt du processus (atexit).
+
+Niveaux : LOG_LEVEL pour l'ensemble, LOG_LEVELS pour surcharger par
+sous-système ("quiz=DEBUG,quiz.shuffle=WARNING"). Les traces de détail sont
+au niveau DEBUG avec formatage paresseux (%s) : filtrées, elles ne coûtent
+qu'une comparaison de niveaux.
+
+Enregistrements structurés : les champs passés par extra={'fields': {...}}
+sont ajoutés à la ligne en clé=valeur (valeurs en JSON), par ex. le bilan de
+génération d'une playlist en un seul enregistrement.
+"""
+
+import atexit
+import json
+import logging
+import queue
+import sys
+from logging.handlers import QueueHandler, QueueListener
+
+LOGGER_NAME = 'geoquiz'
+LOG_FORMAT = '%(asctime)s %(levelname)s [%(name)s] %(message)s'
+
+_listener: QueueListener | None = None
+_atexit_registered = False
+
+
+def get_logger(subsystem: str | None = None) -> logging.Logger:
+    """Logger d'un sous-système ('quiz', 'quiz.playlist', 'images'...), enfant de 'geoquiz'."""
+    return logging.getLogger(f"{LOGGER_NAME}.{subsystem}" if subsystem else LOGGER_NAME)
+
+
+class StructuredFormatter(logging.Formatter):
+    """Format texte classique suivi des champs structurés (record.fields) en clé=valeur."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        fields = getattr(record, 'fields', None)
+        if not fields:
+            return line
+        encoded = ' '.join(
+            f"{key}={json.dumps(value, ensure_ascii=False, default=str, separators=(',', ':'))}"
+            for key, value in fields.items()
+        )
+        # Traceback éventuelle après les champs, pour garder l'enregistrement sur sa première ligne
+        first, sep, rest = line.partition('\n')
+        return f"{first} {encoded}{sep}{rest}"
+
+
+def parse_levels(spec: str | None) -> dict[str, int]:
+    """'quiz=DEBUG,quiz.shuffle=WARNING' -> {'quiz': 10, 'quiz.shuffle': 30}; entrées invalides ignorées."""
+    levels = {}
+    for item in (spec or '').split(','):
+        name, _, level = item.partition('=')
+        name, level = name.strip(), level.strip().upper()
+        if name and isinstance(logging.getLevelName(level), int):
+            levels[name] = logging.getLevelName(level)
+    return levels
+
+
+def setup_logging(level: str | int = 'INFO', levels: str | None = None, stream=None) -> QueueListener:
+    """Installe la file et le thread d'écriture (remplace une configuration précédente)."""
+    global _listener, _atexit_registered
+    shutdown_logging()
+
+    handler = logging.StreamHandler(stream or sys.stderr)
+    handler.setFormatter(StructuredFormatter(LOG_FORMAT))
+    log_queue = queue.SimpleQueue()
+
+    root = get_logger()
+    for previous in list(root.handlers):
+        root.removeHandler(previous)
+    root.addHandler(QueueHandler(log_queue))
+    root.setLevel(level.upper() if isinstance(level, str) else level)
+    root.propagate = False
+    # Remettre à zéro les surcharges d'une configuration précédente
+    for name, logger in list(logging.root.manager.loggerDict.items()):
+        if name.startswith(f"{LOGGER_NAME}.") and isinstance(logger, logging.Logger):
+            logger.setLevel(logging.NOTSET)
+    for subsystem, subsystem_level in parse_levels(levels).items():
+        get_logger(subsystem).setLevel(subsystem_level)
+
+    _listener = QueueListener(log_queue, handler, respect_handler_level=True)
+    _listener.start()
+    if not _atexit_registered:
+        atexit.register(shutdown_logging)
+        _atexit_registered = True
+    return _listener
+
+
+def shutdown_logging():
+    """Écrit les enregistrements encore en file et arrête le thread d'écriture."""
+    global _listener
+    # Un listener déjà arrêté n'a plus de thread (stop() n'est pas idempotent avant Python 3.12)
+    if _listener is not None and _listener._thread is not None:
+        _listener.stop()
+    _listener = None
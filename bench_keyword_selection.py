@@ -0,0 +1,100 @@
+"""
+Micro-benchmark: sélection des questions avec gestion des keywords.
+
+Compare l'ancienne approche (tri unique des candidats avec des ensembles Python,
+sans réévaluation après chaque choix) au moteur à masques de bits
+(keyword_selection.select_by_keyword_masks) sur des questions synthétiques.
+
+Aucune base de données n'est nécessaire.
+
+Usage:
+    python bench_keyword_selection.py
+    python bench_keyword_selection.py 10000 100000 250000
+"""
+
+import random
+import sys
+import time
+
+from keyword_selection import mask_for_keywords, select_by_keyword_masks
+
+
+def build_dataset(n_questions: int, seed: int = 42):
+    """Génère des questions synthétiques: 1 à 3 keywords parmi un petit vocabulaire, ~30% déjà vues."""
+    rng = random.Random(seed)
+    n_keywords = max(40, n_questions // 2000)
+    keywords = {}
+    for qid in range(1, n_questions + 1):
+        count = rng.choice((1, 1, 2, 2, 3))
+        keywords[qid] = frozenset(rng.sample(range(1, n_keywords + 1), count))
+    seen = {qid for qid in keywords if rng.random() < 0.3}
+    answered_keywords = {kw for qid in seen for kw in keywords[qid]}
+    return keywords, seen, answered_keywords
+
+
+def legacy_select(candidate_ids, keywords, seen, answered_keywords, prevent, quota):
+    """Reproduction de l'ancien algorithme: score calculé une seule fois, puis tri."""
+    used = set()
+
+    def score(qid):
+        q_keywords = set(keywords[qid])
+        has_duplicate = bool(prevent and q_keywords and (q_keywords & used))
+        has_answered = bool(q_keywords and answered_keywords and (q_keywords & answered_keywords))
+        return (not has_duplicate, qid not in seen, not has_answered, len(q_keywords) == 0)
+
+    selected = []
+    for qid in sorted(candidate_ids, key=score, reverse=True):
+        if len(selected) >= quota:
+            break
+        selected.append(qid)
+        used.update(keywords[qid])
+    return selected
+
+
+def count_duplicates(selected, keywords):
+    used = set()
+    duplicates = 0
+    for qid in selected:
+        if keywords[qid] & used:
+            duplicates += 1
+        used.update(keywords[qid])
+    return duplicates
+
+
+def timed(fn, repeat=5):
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def run(n_questions: int, quota: int = 20):
+    keywords, seen, answered_keywords = build_dataset(n_questions)
+    candidate_ids = sorted(keywords)
+
+    # Préparation des masques (faite une fois lors de la construction de l'index)
+    start = time.perf_counter()
+    keyword_bits = {kw: bit for bit, kw in enumerate(sorted({kw for kws in keywords.values() for kw in kws}))}
+    masks = {qid: mask_for_keywords(kws, keyword_bits) for qid, kws in keywords.items() if kws}
+    answered_mask = mask_for_keywords(answered_keywords, keyword_bits)
+    build_time = time.perf_counter() - start
+
+    legacy_time, legacy = timed(lambda: legacy_select(candidate_ids, keywords, seen, answered_keywords, True, quota))
+    bitset_time, (bitset, _, _) = timed(lambda: select_by_keyword_masks(
+        candidate_ids, masks, seen, 0, answered_mask, True, quota))
+
+    print(f"--- {n_questions} questions, quota={quota} ---")
+    print(f"  Construction des masques : {build_time * 1000:8.1f} ms (une fois par index)")
+    print(f"  Tri unique (ancien)      : {legacy_time * 1000:8.1f} ms, doublons de keywords: {count_duplicates(legacy, keywords)}")
+    print(f"  Masques de bits (glouton): {bitset_time * 1000:8.1f} ms, doublons de keywords: {count_duplicates(bitset, keywords)}")
+    print(f"  Accélération             : x{legacy_time / bitset_time:.1f}")
+
+
+if __name__ == '__main__':
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10_000, 100_000]
+    for size in sizes:
+        run(size)
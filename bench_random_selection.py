@@ -0,0 +1,82 @@
+"""
+Micro-benchmark: tirage aléatoire d'une question (quiz sans set de règles).
+
+Compare ORDER BY RANDOM() sur une table SQLite en mémoire (filtre de difficulté
+et NOT IN sur l'historique, comme l'ancienne requête) au tirage dans la liste
+des candidats mise en cache par l'index (quiz_index.QuestionIndex), sur des
+questions synthétiques publiées.
+
+Usage:
+    python bench_random_selection.py
+    python bench_random_selection.py 10000 100000 250000
+"""
+
+import random
+import sqlite3
+import sys
+import time
+from collections import Counter
+
+from quiz_index import QuestionIndex
+
+
+def build_rows(n_questions: int, seed: int = 42):
+    """(id, difficulté, thème, sous-thème) pour n questions publiées"""
+    rng = random.Random(seed)
+    return [(qid, rng.randint(1, 5), rng.randint(1, 20), rng.randint(1, 200)) for qid in range(1, n_questions + 1)]
+
+
+def build_database(rows):
+    conn = sqlite3.connect(':memory:')
+    conn.execute("CREATE TABLE questions (id INTEGER PRIMARY KEY, difficulty_level INTEGER, broad_theme_id INTEGER, "
+                 "specific_theme_id INTEGER, is_published BOOLEAN NOT NULL)")
+    conn.executemany("INSERT INTO questions VALUES (?, ?, ?, ?, 1)", rows)
+    conn.execute("CREATE INDEX ix_questions_difficulty ON questions (difficulty_level)")
+    conn.commit()
+    return conn
+
+
+def timed(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat
+
+
+def run(n_questions: int, history_len: int = 20, repeat: int = 50):
+    rows = build_rows(n_questions)
+    conn = build_database(rows)
+    rng = random.Random(1)
+    history = rng.sample(range(1, n_questions + 1), history_len)
+    placeholders = ','.join('?' * len(history))
+    sql = (f"SELECT id FROM questions WHERE is_published = 1 AND difficulty_level = ? "
+           f"AND id NOT IN ({placeholders}) ORDER BY RANDOM() LIMIT 1")
+
+    start = time.perf_counter()
+    index = QuestionIndex(1, rows, [], [])
+    build_time = time.perf_counter() - start
+
+    sql_time = timed(lambda: conn.execute(sql, [3, *history]).fetchone(), repeat)
+    first_time = timed(lambda: QuestionIndex(1, rows, [], []).random_question_id(exclude=history, difficulties=[3]), 3)
+    index_time = timed(lambda: index.random_question_id(exclude=history, difficulties=[3]), repeat * 100)
+
+    # Uniformité: 200 000 tirages parmi 50 candidats, historique exclu
+    small = QuestionIndex(1, rows[:60], [], [])
+    excluded = set(range(1, 11))
+    counts = Counter(small.random_question_id(exclude=excluded, rng=rng) for _ in range(200_000))
+    assert not excluded & set(counts)
+    spread = (max(counts.values()) - min(counts.values())) / (200_000 / len(counts))
+
+    print(f"--- {n_questions} questions publiées, historique de {history_len} ---")
+    print(f"  Construction de l'index       : {build_time * 1000:8.1f} ms (une fois par instantané)")
+    print(f"  ORDER BY RANDOM() (ancien)    : {sql_time * 1000:8.3f} ms / tirage")
+    print(f"  Index, 1er tirage (+ liste)   : {first_time * 1000:8.3f} ms (construction incluse)")
+    print(f"  Index, liste en cache         : {index_time * 1000:8.4f} ms / tirage")
+    print(f"  Accélération                  : x{sql_time / index_time:.0f}")
+    print(f"  Uniformité ({len(counts)} candidats)     : écart max-min = {spread:.1%} de la moyenne")
+
+
+if __name__ == '__main__':
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10_000, 100_000]
+    for size in sizes:
+        run(size)
@@ -9,7 +9,44 @@ class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'dev-secret-key-change-in-production'
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URI') or 'sqlite:///geocaching_quiz.db'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
-    
+    # Durée de vie max (secondes) de l'index des questions en mémoire (0 = illimitée).
+    # Borne la péremption quand plusieurs processus servent l'application.
+    QUIZ_INDEX_MAX_AGE = int(os.environ.get('QUIZ_INDEX_MAX_AGE') or 300)
+    # Idem pour le cache des listes de référence des formulaires (thèmes, sous-thèmes, pays)
+    REFERENCE_DATA_MAX_AGE = int(os.environ.get('REFERENCE_DATA_MAX_AGE') or 300)
+    # Idem pour les instantanés des sets de règles actifs (voir rule_set_cache.py)
+    RULE_SET_CACHE_MAX_AGE = int(os.environ.get('RULE_SET_CACHE_MAX_AGE') or 300)
+    # Idem pour les fragments HTML des listes HTMX, et nombre max de fragments gardés
+    FRAGMENT_CACHE_MAX_AGE = int(os.environ.get('FRAGMENT_CACHE_MAX_AGE') or 300)
+    FRAGMENT_CACHE_MAX_ENTRIES = int(os.environ.get('FRAGMENT_CACHE_MAX_ENTRIES') or 256)
+    # Largeurs (px) des variantes responsives des images; la plus grande borne l'image principale
+    IMAGE_VARIANT_WIDTHS = tuple(
+        int(w) for w in (os.environ.get('IMAGE_VARIANT_WIDTHS') or '160,480,960,1600').split(',') if w.strip()
+    )
+    # Optimisation des images envoyées dans un pool de processus (sinon dans la requête)
+    IMAGE_OPTIMIZE_ASYNC = (os.environ.get('IMAGE_OPTIMIZE_ASYNC') or 'true').lower() in ('1', 'true', 'yes', 'on')
+    IMAGE_OPTIMIZE_WORKERS = int(os.environ.get('IMAGE_OPTIMIZE_WORKERS') or 2)
+    # Fichiers de static/ servis en version précompressée (.br/.gz, voir precompress_static.py)
+    PRECOMPRESSED_STATIC = tuple(
+        f.strip() for f in (os.environ.get('PRECOMPRESSED_STATIC') or 'style.css').split(',') if f.strip()
+    )
+    # État des parties de quiz côté serveur: 'sql' (table quiz_states) ou 'memory' (LRU du processus)
+    QUIZ_STATE_BACKEND = os.environ.get('QUIZ_STATE_BACKEND') or 'sql'
+    QUIZ_STATE_TTL = int(os.environ.get('QUIZ_STATE_TTL') or 6 * 3600)
+    QUIZ_STATE_MAX_ENTRIES = int(os.environ.get('QUIZ_STATE_MAX_ENTRIES') or 10000)
+    # Nombre max d'IDs de questions déjà posées gardés en partie libre (au-delà: nouveau cycle)
+    QUIZ_HISTORY_MAX_IDS = int(os.environ.get('QUIZ_HISTORY_MAX_IDS') or 500)
+    # Durée (s) pendant laquelle le navigateur garde le fragment préchargé de la question suivante
+    QUIZ_PREFETCH_MAX_AGE = int(os.environ.get('QUIZ_PREFETCH_MAX_AGE') or 300)
+    # Statistiques de réponses: True = file + thread d'écriture par lots, False = écriture dans la requête
+    ANSWER_STATS_ASYNC = (os.environ.get('ANSWER_STATS_ASYNC') or 'false').lower() in ('1', 'true', 'yes', 'on')
+    ANSWER_STATS_BATCH_SIZE = int(os.environ.get('ANSWER_STATS_BATCH_SIZE') or 200)
+    ANSWER_STATS_FLUSH_INTERVAL = float(os.environ.get('ANSWER_STATS_FLUSH_INTERVAL') or 1.0)
+    # Journalisation (voir app_logging.py): niveau global, et surcharges par sous-système
+    # ex. LOG_LEVELS="quiz=DEBUG,quiz.shuffle=WARNING"
+    LOG_LEVEL = os.environ.get('LOG_LEVEL') or 'INFO'
+    LOG_LEVELS = os.environ.get('LOG_LEVELS') or ''
+
 class DevelopmentConfig(Config):
     """Configuration de développement"""
     DEBUG = True
@@ -0,0 +1,110 @@
+"""
+Cache des fragments HTML des listes HTMX (thèmes, pays, images, utilisateurs, profils, règles).
+
+Chaque liste est rendue une fois puis servie telle quelle tant que les tables
+dont elle dépend n'ont pas changé. La clé d'un fragment contient le template,
+la version de chacune de ces tables et les paramètres fournis par l'appelant
+(ensemble des permissions de l'utilisateur, recherche...).
+
+Les versions sont incrémentées au commit de toute session qui a écrit dans la
+table (insertion, modification, suppression, y compris update/delete en masse
+via l'ORM) : les routes d'écriture invalident ainsi les listes concernées sans
+appel explicite. Un rollback n'invalide rien. Les écritures hors ORM (SQL brut,
+autre processus) sont couvertes par l'expiration (max_age, secondes).
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+_lock = threading.Lock()
+_entries: "OrderedDict[tuple, tuple[float, str]]" = OrderedDict()
+_versions: dict[str, int] = {}
+
+# Clé de session.info où sont accumulées les tables écrites avant le commit
+_PENDING_KEY = 'fragment_cache_tables'
+
+
+def table_versions(tables) -> tuple:
+    """Versions courantes des tables, dans l'ordre donné"""
+    return tuple(_versions.get(name, 0) for name in tables)
+
+
+def invalidate_tables(*tables):
+    """Invalide les fragments qui dépendent de ces tables"""
+    with _lock:
+        for name in tables:
+            _versions[name] = _versions.get(name, 0) + 1
+
+
+def clear_fragments():
+    with _lock:
+        _entries.clear()
+
+
+def cached_fragment(template: str, tables, render, key=(), max_age: float | None = None,
+                    max_entries: int = 256) -> str:
+    """Retourne le fragment en cache, ou l'obtient via render() et le mémorise
+
+    `tables` liste les tables lues par le fragment, `key` les autres paramètres
+    dont dépend le rendu. Les entrées les plus anciennement utilisées sont
+    évincées au-delà de `max_entries`.
+    """
+    cache_key = (template, tuple(tables), table_versions(tables), tuple(key))
+    now = time.monotonic()
+    with _lock:
+        entry = _entries.get(cache_key)
+        if entry and (not max_age or now - entry[0] < max_age):
+            _entries.move_to_end(cache_key)
+            return entry[1]
+
+    html = render()
+    with _lock:
+        # Une écriture commitée pendant le rendu rend ce résultat obsolète: ne pas le garder
+        if table_versions(tables) == cache_key[2]:
+            _entries[cache_key] = (now, html)
+            _entries.move_to_end(cache_key)
+            while len(_entries) > max(max_entries, 1):
+                _entries.popitem(last=False)
+    return html
+
+
+# ---------------------------------------------------------------------------
+# Suivi des écritures ORM
+# ---------------------------------------------------------------------------
+
+def _pending(session) -> set:
+    return session.info.setdefault(_PENDING_KEY, set())
+
+
+@event.listens_for(Session, 'after_flush')
+def _collect_flushed_tables(session, flush_context):
+    pending = _pending(session)
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        table = getattr(obj, '__table__', None)
+        if table is not None:
+            pending.add(table.name)
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _collect_bulk_tables(orm_execute_state):
+    if not (orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    mapper = orm_execute_state.bind_mapper
+    if mapper is not None:
+        _pending(orm_execute_state.session).add(mapper.local_table.name)
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_committed_tables(session):
+    tables = session.info.pop(_PENDING_KEY, None)
+    if tables:
+        invalidate_tables(*tables)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_rolled_back_tables(session):
+    session.info.pop(_PENDING_KEY, None)
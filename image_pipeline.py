@@ -0,0 +1,159 @@
+"""
+Optimisation des images en arrière-plan (pool de processus).
+
+À l'envoi, la requête enregistre le fichier brut et crée l'ImageAsset avec le
+statut 'pending' : l'image est servie telle quelle en attendant. Le décodage,
+le redimensionnement LANCZOS et l'encodage WebP (image principale, variantes,
+placeholder; voir image_variants.py) s'exécutent dans un processus du pool,
+hors des threads du serveur. Le résultat revient au processus principal, qui
+écrit les fichiers sous l'empreinte de l'image optimisée (voir image_storage.py),
+remplace le fichier brut et passe le statut à 'ready' (ou 'failed' si
+l'optimisation a échoué).
+
+En mode synchrone (async_mode=False), l'optimisation a lieu dans la requête.
+Sans Pillow, rien n'est mis en file: les images restent brutes et 'ready'.
+Une image interrompue (arrêt du processus) reste 'pending'; optimize_images.py
+reprend ce reliquat.
+"""
+
+import atexit
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from models import db, ImageAsset
+from image_variants import Image, optimize_image_file, apply_variants, DEFAULT_VARIANT_WIDTHS
+from image_storage import sha256_bytes, content_filename, is_file_shared
+from app_logging import get_logger
+
+logger = get_logger('images')
+
+STATUS_PENDING = 'pending'
+STATUS_READY = 'ready'
+STATUS_FAILED = 'failed'
+
+
+def apply_optimization(image, folder: str, optimized) -> None:
+    """Applique le résultat d'optimize_image_file() à l'image (fichiers + colonnes, sans commit)"""
+    if optimized is None:
+        # GIF animé ou format non lisible par Pillow: servi tel quel
+        image.status = STATUS_READY
+        return
+    previous_shared = is_file_shared(image.filename, image.id)
+    if optimized.data is not None:
+        raw_filename = image.filename
+        digest = sha256_bytes(optimized.data)
+        # Même image optimisée qu'une image existante: le fichier <empreinte>.webp est partagé
+        filename = content_filename(digest, '.webp')
+        path = os.path.join(folder, filename)
+        if not os.path.exists(path):
+            with open(path, 'wb') as f:
+                f.write(optimized.data)
+        if filename != raw_filename and not previous_shared:
+            try:
+                os.remove(os.path.join(folder, raw_filename))
+            except OSError:
+                pass
+        image.filename = filename
+        image.content_hash = digest
+        image.mime_type = 'image/webp'
+        image.size_bytes = len(optimized.data)
+    apply_variants(image, folder, optimized, remove_files=not previous_shared)
+    image.status = STATUS_READY
+
+
+class ImageOptimizationPipeline:
+    """File d'optimisation des images envoyées, exécutée par un pool de processus"""
+
+    def __init__(self, app, async_mode: bool = True, max_workers: int | None = None, widths=DEFAULT_VARIANT_WIDTHS):
+        self.app = app
+        self.async_mode = async_mode
+        self.max_workers = max_workers
+        self.widths = tuple(widths)
+        self._executor: ProcessPoolExecutor | None = None
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._pending = 0
+        self._atexit_registered = False
+
+    @property
+    def enabled(self) -> bool:
+        return Image is not None
+
+    @property
+    def folder(self) -> str:
+        return self.app.config['UPLOAD_FOLDER']
+
+    def submit(self, image_id: int, filename: str, reencode: bool = True) -> bool:
+        """Met en file l'optimisation du fichier `filename` de l'image; False si Pillow est absent"""
+        if not self.enabled:
+            return False
+        path = os.path.join(self.folder, filename)
+        if not self.async_mode:
+            self._finish(image_id, filename, optimize_image_file(path, self.widths, reencode))
+            return True
+        with self._lock:
+            self._pending += 1
+        try:
+            future = self._get_executor().submit(optimize_image_file, path, self.widths, reencode)
+        except Exception:
+            self._done()
+            raise
+        future.add_done_callback(lambda f: self._on_done(image_id, filename, f))
+        return True
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        # Démarrage paresseux: un pool créé avant un fork (serveur multi-processus) ne survivrait pas
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+                if not self._atexit_registered:
+                    atexit.register(self.shutdown)
+                    self._atexit_registered = True
+            return self._executor
+
+    def _on_done(self, image_id: int, filename: str, future):
+        try:
+            error = future.exception()
+            if error is not None:
+                logger.warning("Échec de l'optimisation de l'image #%s: %s", image_id, error)
+                self._finish(image_id, filename, None, failed=True)
+            else:
+                self._finish(image_id, filename, future.result())
+        finally:
+            self._done()
+
+    def _finish(self, image_id: int, filename: str, optimized, failed: bool = False):
+        with self.app.app_context():
+            try:
+                image = db.session.get(ImageAsset, image_id)
+                # Image supprimée, ou fichier remplacé entre-temps (une autre optimisation est en file)
+                if image is None or image.filename != filename:
+                    return
+                if failed:
+                    image.status = STATUS_FAILED
+                else:
+                    apply_optimization(image, self.folder, optimized)
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                logger.exception("Erreur lors de l'enregistrement de l'image #%s optimisée", image_id)
+
+    def _done(self):
+        with self._lock:
+            self._pending -= 1
+            self._idle.notify_all()
+
+    def pending(self) -> int:
+        return self._pending
+
+    def wait(self, timeout: float | None = None) -> bool:
+        """Attend que toutes les optimisations en file soient enregistrées"""
+        with self._lock:
+            return self._idle.wait_for(lambda: self._pending == 0, timeout)
+
+    def shutdown(self, wait: bool = True):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
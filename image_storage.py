@@ -0,0 +1,80 @@
+"""
+Stockage des images adressé par contenu.
+
+Chaque fichier de static/uploads est nommé d'après l'empreinte SHA-256 de ses
+octets (<empreinte>.webp une fois optimisé, <empreinte><ext> pour un fichier
+brut en attente). Deux colonnes indexées d'ImageAsset portent ces empreintes :
+- content_hash : octets du fichier stocké (l'image optimisée quand elle est prête) ;
+- source_hash  : octets du fichier envoyé, avant optimisation.
+
+Un envoi dont l'empreinte correspond à l'une ou l'autre d'une image existante
+est dédupliqué : l'image existante est réutilisée, sans écriture disque ni
+réencodage. Deux fichiers envoyés différents peuvent encore donner la même
+image optimisée : les deux images partagent alors le même fichier (et ses
+variantes), qui n'est supprimé qu'avec la dernière image qui le référence
+(is_file_shared). Voir migrate_image_content_hash.py pour les fichiers
+existants et migrate_image_shared_files.py pour l'index non unique.
+"""
+
+import hashlib
+import os
+import re
+
+from models import db, ImageAsset
+
+_CHUNK_SIZE = 1024 * 1024
+
+
+def sha256_stream(stream) -> str:
+    """Empreinte SHA-256 (hex) d'un flux, lu par blocs puis rembobiné"""
+    digest = hashlib.sha256()
+    stream.seek(0)
+    for chunk in iter(lambda: stream.read(_CHUNK_SIZE), b''):
+        digest.update(chunk)
+    stream.seek(0)
+    return digest.hexdigest()
+
+
+def sha256_bytes(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def sha256_file(path: str) -> str:
+    with open(path, 'rb') as f:
+        return sha256_stream(f)
+
+
+def content_filename(digest: str, ext: str) -> str:
+    """Nom de fichier <empreinte><ext>, l'extension (fournie par le client) réduite à [a-z0-9]"""
+    ext = re.sub(r'[^a-z0-9]', '', (ext or '').lower())[:10]
+    return f"{digest}.{ext}" if ext else digest
+
+
+def find_image_by_hash(digest: str, exclude_id: int | None = None):
+    """Image existante dont le fichier stocké ou le fichier d'origine a cette empreinte"""
+    query = ImageAsset.query.filter(db.or_(ImageAsset.content_hash == digest, ImageAsset.source_hash == digest))
+    if exclude_id is not None:
+        query = query.filter(ImageAsset.id != exclude_id)
+    return query.order_by(ImageAsset.id).first()
+
+
+def is_file_shared(filename: str, image_id: int | None) -> bool:
+    """Le fichier (et ses variantes) est-il aussi celui d'une autre image que `image_id` ?"""
+    query = db.session.query(ImageAsset.id).filter(ImageAsset.filename == filename)
+    if image_id is not None:
+        query = query.filter(ImageAsset.id != image_id)
+    return query.first() is not None
+
+
+def store_upload(file_storage, folder: str, digest: str) -> tuple[str, int]:
+    """Enregistre le fichier envoyé sous son empreinte; retourne (nom, taille)
+
+    Le fichier n'est pas réécrit s'il est déjà présent (mêmes octets, même nom).
+    """
+    _, ext = os.path.splitext(file_storage.filename or '')
+    filename = content_filename(digest, ext)
+    path = os.path.join(folder, filename)
+    if not os.path.exists(path):
+        file_storage.stream.seek(0)
+        file_storage.save(path)
+    return filename, os.path.getsize(path)
@@ -0,0 +1,152 @@
+"""
+Variantes responsives des images (ImageAsset).
+
+À l'envoi d'une image, on produit en WebP :
+- l'image principale, limitée à la plus grande largeur configurée (1600px) ;
+- une variante par largeur plus petite (160/480/960 par défaut, jamais agrandie),
+  stockée à côté de l'image principale sous le nom <nom>_<largeur>w.webp ;
+- un placeholder flouté minuscule (data URI), affiché pendant le chargement.
+
+Les largeurs, hauteurs, noms de fichiers et tailles des variantes sont
+enregistrés dans ImageAsset.variants_json; les templates utilisent
+ImageAsset.srcset et ImageAsset.variant_url(). Sans Pillow, rien n'est
+optimisé et les images sont servies telles quelles.
+"""
+
+import base64
+import io
+import os
+
+try:
+    from PIL import Image, ImageFilter
+except Exception:
+    Image = None
+    ImageFilter = None
+
+DEFAULT_VARIANT_WIDTHS = (160, 480, 960, 1600)
+
+# Largeur du placeholder flouté (agrandi par le navigateur)
+PLACEHOLDER_WIDTH = 16
+
+
+class OptimizedImage:
+    """Image principale encodée et ses variantes (width, height, bytes), plus le placeholder"""
+
+    def __init__(self, data: bytes, width: int, height: int, variants, placeholder: str | None):
+        self.data = data
+        self.width = width
+        self.height = height
+        self.variants = variants
+        self.placeholder = placeholder
+
+
+def _encode_webp(img, quality: int = 80) -> bytes:
+    out = io.BytesIO()
+    img.save(out, format='WEBP', quality=quality, method=6)
+    return out.getvalue()
+
+
+def _resize_to_width(img, width: int):
+    height = max(1, round(img.height * width / img.width))
+    return img.resize((width, height), Image.LANCZOS)
+
+
+def _placeholder_data_uri(img) -> str | None:
+    try:
+        small = _resize_to_width(img, min(PLACEHOLDER_WIDTH, img.width))
+        small = small.filter(ImageFilter.GaussianBlur(1))
+        data = _encode_webp(small, quality=30)
+        return 'data:image/webp;base64,' + base64.b64encode(data).decode('ascii')
+    except Exception:
+        return None
+
+
+def optimize_image(stream, widths=DEFAULT_VARIANT_WIDTHS, reencode: bool = True) -> OptimizedImage | None:
+    """Décode l'image et produit l'image principale et ses variantes
+
+    `reencode=False` garde l'image principale telle quelle (reprise d'images déjà
+    optimisées) et ne calcule que les variantes et le placeholder.
+    Retourne None sans Pillow, pour un GIF animé ou un fichier illisible.
+    """
+    if Image is None or stream is None:
+        return None
+    try:
+        stream.seek(0)
+        img = Image.open(stream)
+        # GIF animé: on ne touche pas
+        if bool(getattr(img, 'is_animated', False)):
+            return None
+
+        has_alpha = (img.mode in ('RGBA', 'LA') or 'transparency' in img.info)
+        img = img.convert('RGBA') if has_alpha else img.convert('RGB')
+
+        widths = sorted(set(int(w) for w in widths if int(w) > 0)) or list(DEFAULT_VARIANT_WIDTHS)
+        if reencode:
+            # Redimension à la plus grande largeur (boîte carrée, comme avant les variantes)
+            img.thumbnail((widths[-1], widths[-1]), Image.LANCZOS)
+            data = _encode_webp(img)
+        else:
+            data = None
+
+        variants = []
+        for width in widths:
+            if width >= img.width:
+                break
+            variant = _resize_to_width(img, width)
+            variants.append((variant.width, variant.height, _encode_webp(variant)))
+        return OptimizedImage(data, img.width, img.height, variants, _placeholder_data_uri(img))
+    except Exception:
+        return None
+
+
+def variant_filename(filename: str, width: int) -> str:
+    name, _ = os.path.splitext(filename)
+    return f"{name}_{width}w.webp"
+
+
+def write_variants(folder: str, filename: str, optimized: OptimizedImage) -> list[dict]:
+    """Écrit les fichiers des variantes; retourne leurs métadonnées (pour variants_json)"""
+    entries = []
+    for width, height, data in optimized.variants:
+        name = variant_filename(filename, width)
+        with open(os.path.join(folder, name), 'wb') as f:
+            f.write(data)
+        entries.append({'width': width, 'height': height, 'filename': name, 'size_bytes': len(data)})
+    return entries
+
+
+def remove_variant_files(folder: str, image) -> None:
+    """Supprime les fichiers des variantes d'une image (l'image principale n'est pas touchée)"""
+    for variant in image.get_variants():
+        try:
+            path = os.path.join(folder, variant['filename'])
+            if os.path.exists(path):
+                os.remove(path)
+        except Exception:
+            pass
+
+
+def apply_variants(image, folder: str, optimized: OptimizedImage | None, remove_files: bool = True) -> None:
+    """Remplace les variantes enregistrées de l'image par celles de `optimized`
+    remove_files=False: les anciens fichiers sont conservés (partagés avec une autre image).
+    """
+    if remove_files:
+        remove_variant_files(folder, image)
+    if optimized is None:
+        image.set_variants([])
+        image.width = image.height = None
+        image.placeholder = None
+        return
+    image.set_variants(write_variants(folder, image.filename, optimized))
+    image.width = optimized.width
+    image.height = optimized.height
+    image.placeholder = optimized.placeholder
+
+
+def optimize_image_file(path: str, widths=DEFAULT_VARIANT_WIDTHS, reencode: bool = True) -> OptimizedImage | None:
+    """optimize_image() sur un fichier; fonction de module, exécutable dans un processus du pool"""
+    try:
+        with open(path, 'rb') as f:
+            return optimize_image(f, widths, reencode)
+    except OSError:
+        return None
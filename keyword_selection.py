@@ -0,0 +1,110 @@
+"""
+Moteur de sélection des questions par masques de bits de mots-clés.
+
+Chaque mot-clé reçoit une position de bit (voir QuestionIndex.keyword_bits) et
+chaque question un entier dont les bits correspondent à ses mots-clés. Tester
+un doublon de mot-clé revient alors à un simple `mask & used_mask`.
+
+La sélection est gloutonne et incrémentale : après chaque choix, les mots-clés
+utilisés sont mis à jour et les candidats suivants sont évalués par rapport à
+cet état (contrairement à un tri unique calculé avant la sélection).
+
+Priorités (par ordre d'importance):
+1. Pas de doublon de mot-clé dans le quiz (si prevent_duplicate_keywords)
+2. Question pas encore répondue par l'utilisateur
+3. Aucun mot-clé déjà répondu par l'utilisateur
+4. Question sans mot-clé
+"""
+
+
+def mask_for_keywords(keyword_ids, keyword_bits: dict[int, int]) -> int:
+    """Convertit un ensemble d'IDs de mots-clés en masque (les IDs inconnus sont ignorés)."""
+    mask = 0
+    for keyword_id in keyword_ids:
+        bit = keyword_bits.get(keyword_id)
+        if bit is not None:
+            mask |= 1 << bit
+    return mask
+
+
+def select_by_keyword_masks(
+    candidate_ids,
+    keyword_masks: dict[int, int],
+    seen_question_ids: set[int],
+    used_mask: int,
+    answered_mask: int,
+    prevent_duplicate_keywords: bool,
+    quota: int
+) -> tuple[list[int], int, dict]:
+    """
+    Sélectionne jusqu'à `quota` questions parmi `candidate_ids` (ordre conservé à
+    priorité égale).
+
+    Les priorités 2 à 4 ne dépendent pas de la sélection en cours: les candidats
+    sont répartis une fois pour toutes dans 8 paquets. La priorité 1 évolue à
+    chaque choix, mais un candidat en conflit le reste (used_mask ne fait que
+    grossir): il est mis de côté et ne sert qu'en repli, dans l'ordre des paquets.
+    Un seul passage suffit donc pour obtenir exactement le choix glouton.
+
+    Retourne: (selected_ids, used_mask_updated, stats)
+    """
+    if not candidate_ids or quota <= 0:
+        return [], used_mask, {'perfect': True, 'conditions_met': []}
+
+    # Paquets par priorité statique: bit 2 = non vue, bit 1 = pas de keyword répondu, bit 0 = sans keyword
+    buckets = [[] for _ in range(8)]
+    total = 0
+    for qid in candidate_ids:
+        mask = keyword_masks.get(qid, 0)
+        priority = ((qid not in seen_question_ids) << 2) | ((not (mask & answered_mask)) << 1) | (mask == 0)
+        buckets[priority].append(qid)
+        total += 1
+
+    selected_ids = []
+    deferred = []  # candidats en conflit de mots-clés, dans l'ordre de priorité
+    for priority in range(7, -1, -1):
+        for qid in buckets[priority]:
+            if len(selected_ids) >= quota:
+                break
+            mask = keyword_masks.get(qid, 0)
+            if prevent_duplicate_keywords and (mask & used_mask):
+                deferred.append(qid)
+                continue
+            selected_ids.append(qid)
+            used_mask |= mask
+        if len(selected_ids) >= quota:
+            break
+
+    # Repli: compléter avec les candidats en conflit si le quota n'est pas atteint
+    duplicates = 0
+    for qid in deferred:
+        if len(selected_ids) >= quota:
+            break
+        selected_ids.append(qid)
+        used_mask |= keyword_masks.get(qid, 0)
+        duplicates += 1
+
+    fallback_counts = {}
+    if duplicates:
+        fallback_counts['keyword_duplicate'] = duplicates
+    for qid in selected_ids:
+        if qid in seen_question_ids:
+            fallback_counts['question_already_seen'] = fallback_counts.get('question_already_seen', 0) + 1
+        if keyword_masks.get(qid, 0) & answered_mask:
+            fallback_counts['keyword_already_answered'] = fallback_counts.get('keyword_already_answered', 0) + 1
+
+    stats = {
+        'perfect': not fallback_counts,
+        'total_candidates': total,
+        'conditions_met': [],
+        'fallback_used': [reason for reason, count in fallback_counts.items() for _ in range(count)]
+    }
+    if stats['perfect']:
+        stats['conditions_met'] = ['Toutes les conditions respectées ✅']
+    else:
+        stats['conditions_met'] = [
+            f"⚠️ {count}x {reason.replace('_', ' ')}"
+            for reason, count in fallback_counts.items()
+        ]
+
+    return selected_ids, used_mask, stats
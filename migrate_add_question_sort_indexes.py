@@ -0,0 +1,52 @@
+"""
+Migration: index des clés de tri de la liste des questions
+
+La liste d'administration des questions est paginée par curseur sur
+(clé de tri, id). Ce script crée un index composite pour chaque clé de tri:
+- questions: updated_at, created_at, question_text, difficulty_level, is_published
+- broad_themes.name et specific_themes.name (tri par thème / sous-thème)
+
+Usage:
+    python migrate_add_question_sort_indexes.py
+"""
+
+from app import app, db
+from sqlalchemy import inspect
+from models import Question, BroadTheme, SpecificTheme
+
+
+def migrate():
+    with app.app_context():
+        print("[MIGRATION] Index de tri de la liste des questions...")
+        try:
+            inspector = inspect(db.engine)
+            for table in (Question.__table__, BroadTheme.__table__, SpecificTheme.__table__):
+                existing = {ix['name'] for ix in inspector.get_indexes(table.name)}
+                for index in table.indexes:
+                    if index.name in existing:
+                        print(f"[OK] Index {index.name} déjà présent")
+                        continue
+                    index.create(bind=db.engine)
+                    print(f"[OK] Index {index.name} créé")
+        except Exception as e:
+            print(f"[ERREUR] Création des index de tri: {e}")
+            raise
+
+
+if __name__ == '__main__':
+    print("=" * 60)
+    print("MIGRATION: Index de tri de la liste des questions")
+    print("=" * 60)
+    print()
+
+    response = input("Voulez-vous continuer avec la migration ? (oui/non): ")
+    if response.lower() in ['oui', 'o', 'yes', 'y']:
+        try:
+            migrate()
+            print("\n[OK] Migration terminée avec succès!")
+        except Exception as e:
+            print(f"\n[ERREUR] Erreur lors de la migration: {e}")
+            import traceback
+            traceback.print_exc()
+    else:
+        print("Migration annulée.")
@@ -0,0 +1,44 @@
+"""
+Migration: création de la table quiz_states (état des parties de quiz côté serveur)
+
+Champs:
+- key (clé primaire: "<jeton>:<utilisateur>:<slug du set>")
+- data_json (playlist, progression, score, mélanges, historique)
+- expires_at (indexé, pour la purge des entrées expirées)
+
+Voir quiz_state.py (QUIZ_STATE_BACKEND='sql').
+
+Usage:
+    python migrate_add_quiz_states.py
+"""
+
+from app import app, db
+from sqlalchemy import text
+
+
+def migrate():
+    with app.app_context():
+        print("[MIGRATION] Début migration quiz_states...")
+        try:
+            db.session.execute(text(
+                """
+                CREATE TABLE IF NOT EXISTS quiz_states (
+                    key VARCHAR(200) NOT NULL PRIMARY KEY,
+                    data_json TEXT NOT NULL DEFAULT '{}',
+                    expires_at DATETIME NOT NULL
+                )
+                """
+            ))
+            db.session.execute(text(
+                "CREATE INDEX IF NOT EXISTS ix_quiz_states_expires_at ON quiz_states (expires_at)"
+            ))
+            db.session.commit()
+            print("[OK] Table quiz_states prête")
+        except Exception as e:
+            db.session.rollback()
+            print(f"[ERREUR] Migration quiz_states: {e}")
+            raise
+
+
+if __name__ == '__main__':
+    migrate()
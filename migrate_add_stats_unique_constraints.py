@@ -0,0 +1,110 @@
+"""
+Migration: contraintes uniques des tables de statistiques de réponses
+
+Les compteurs de réponses sont désormais incrémentés par des upserts
+(INSERT ... ON CONFLICT DO UPDATE), qui exigent un index unique sur:
+- user_question_stats (user_id, question_id)
+- question_answer_stats (question_id, answer_index)
+
+Les bases créées avant ces contraintes peuvent contenir des doublons (mises à
+jour concurrentes perdues). Ce script fusionne les doublons (somme des compteurs,
+dernière réponse conservée) puis crée les index uniques manquants.
+
+Usage:
+    python migrate_add_stats_unique_constraints.py
+"""
+
+from app import app, db
+from sqlalchemy import text
+from answer_stats import ensure_stats_unique_indexes, missing_stats_unique_indexes
+
+
+def merge_user_question_duplicates():
+    """Fusionne les lignes user_question_stats en double pour un même (user_id, question_id)."""
+    groups = db.session.execute(text("""
+        SELECT user_id, question_id
+        FROM user_question_stats
+        GROUP BY user_id, question_id
+        HAVING COUNT(*) > 1
+    """)).fetchall()
+
+    for user_id, question_id in groups:
+        rows = db.session.execute(text("""
+            SELECT id, times_answered, success_count
+            FROM user_question_stats
+            WHERE user_id = :u AND question_id = :q
+            ORDER BY COALESCE(last_answered_at, updated_at) DESC, id DESC
+        """), {'u': user_id, 'q': question_id}).fetchall()
+        # La ligne la plus récente porte les champs last_* et reçoit les totaux
+        keep_id = rows[0][0]
+        times = sum(r[1] or 0 for r in rows)
+        success = sum(r[2] or 0 for r in rows)
+        db.session.execute(text("""
+            UPDATE user_question_stats SET times_answered = :t, success_count = :s WHERE id = :id
+        """), {'t': times, 's': success, 'id': keep_id})
+        for r in rows[1:]:
+            db.session.execute(text("DELETE FROM user_question_stats WHERE id = :id"), {'id': r[0]})
+    db.session.commit()
+    return len(groups)
+
+
+def merge_answer_index_duplicates():
+    """Fusionne les lignes question_answer_stats en double pour un même (question_id, answer_index)."""
+    groups = db.session.execute(text("""
+        SELECT question_id, answer_index, MIN(id), SUM(selected_count)
+        FROM question_answer_stats
+        GROUP BY question_id, answer_index
+        HAVING COUNT(*) > 1
+    """)).fetchall()
+
+    for question_id, answer_index, keep_id, total in groups:
+        db.session.execute(text("UPDATE question_answer_stats SET selected_count = :n WHERE id = :id"),
+                           {'n': total or 0, 'id': keep_id})
+        db.session.execute(text("""
+            DELETE FROM question_answer_stats
+            WHERE question_id = :q AND answer_index = :i AND id <> :id
+        """), {'q': question_id, 'i': answer_index, 'id': keep_id})
+    db.session.commit()
+    return len(groups)
+
+
+def migrate():
+    with app.app_context():
+        print("[MIGRATION] Contraintes uniques des statistiques de réponses...")
+        try:
+            missing = missing_stats_unique_indexes()
+            if not missing:
+                print("[OK] Toutes les contraintes uniques sont déjà présentes")
+                return
+
+            merged = merge_user_question_duplicates()
+            print(f"[OK] user_question_stats: {merged} groupe(s) de doublons fusionné(s)")
+            merged = merge_answer_index_duplicates()
+            print(f"[OK] question_answer_stats: {merged} groupe(s) de doublons fusionné(s)")
+
+            created = ensure_stats_unique_indexes()
+            for name in created:
+                print(f"[OK] Index unique {name} créé")
+        except Exception as e:
+            db.session.rollback()
+            print(f"[ERREUR] Migration des contraintes uniques: {e}")
+            raise
+
+
+if __name__ == '__main__':
+    print("=" * 60)
+    print("MIGRATION: Contraintes uniques des statistiques de réponses")
+    print("=" * 60)
+    print()
+
+    response = input("Voulez-vous continuer avec la migration ? (oui/non): ")
+    if response.lower() in ['oui', 'o', 'yes', 'y']:
+        try:
+            migrate()
+            print("\n[OK] Migration terminée avec succès!")
+        except Exception as e:
+            print(f"\n[ERREUR] Erreur lors de la migration: {e}")
+            import traceback
+            traceback.print_exc()
+    else:
+        print("Migration annulée.")
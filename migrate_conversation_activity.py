@@ -0,0 +1,64 @@
+"""
+Migration: tri des conversations par dernière activité
+
+La liste des conversations est désormais triée et paginée (curseur) sur
+conversations.updated_at, mis à jour à chaque nouveau message. Ce script:
+- recale updated_at sur la date du dernier message des conversations existantes
+- crée les index (updated_at, id) et (conversation_id, created_at)
+
+Usage:
+    python migrate_conversation_activity.py
+"""
+
+from app import app, db
+from sqlalchemy import text
+
+
+def migrate():
+    with app.app_context():
+        print("[MIGRATION] Dernière activité des conversations...")
+        try:
+            result = db.session.execute(text("""
+                UPDATE conversations SET updated_at = (
+                    SELECT MAX(m.created_at) FROM conversation_messages m
+                    WHERE m.conversation_id = conversations.id
+                )
+                WHERE EXISTS (
+                    SELECT 1 FROM conversation_messages m
+                    WHERE m.conversation_id = conversations.id
+                      AND m.created_at > conversations.updated_at
+                )
+            """))
+            print(f"[OK] {result.rowcount} conversation(s) recalée(s) sur leur dernier message")
+
+            db.session.execute(text(
+                "CREATE INDEX IF NOT EXISTS ix_conversations_updated_at_id ON conversations (updated_at, id)"))
+            print("[OK] Index ix_conversations_updated_at_id présent")
+            db.session.execute(text(
+                "CREATE INDEX IF NOT EXISTS ix_conversation_messages_conv_created "
+                "ON conversation_messages (conversation_id, created_at)"))
+            print("[OK] Index ix_conversation_messages_conv_created présent")
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            print(f"[ERREUR] Migration de l'activité des conversations: {e}")
+            raise
+
+
+if __name__ == '__main__':
+    print("=" * 60)
+    print("MIGRATION: Dernière activité des conversations")
+    print("=" * 60)
+    print()
+
+    response = input("Voulez-vous continuer avec la migration ? (oui/non): ")
+    if response.lower() in ['oui', 'o', 'yes', 'y']:
+        try:
+            migrate()
+            print("\n[OK] Migration terminée avec succès!")
+        except Exception as e:
+            print(f"\n[ERREUR] Erreur lors de la migration: {e}")
+            import traceback
+            traceback.print_exc()
+    else:
+        print("Migration annulée.")
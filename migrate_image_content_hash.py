@@ -0,0 +1,159 @@
+"""
+Migration vers le stockage des images adressé par contenu
+
+Cette migration :
+1. Ajoute les colonnes 'content_hash' et 'source_hash' à la table 'images' et leurs index
+2. Calcule l'empreinte SHA-256 du fichier de chaque image
+3. Fusionne les images dont le fichier est identique octet pour octet dans la plus
+   ancienne : questions, images de réponses, explications et règles de quiz
+   pointent désormais vers elle; les doublons et leurs fichiers sont supprimés
+4. Renomme chaque fichier (et ses variantes) en <empreinte>.<ext>
+5. Supprime de static/uploads les fichiers non référencés identiques à une image
+   conservée (copies suffixées par un horodatage des anciens envois)
+
+Usage:
+    python migrate_image_content_hash.py
+"""
+
+import os
+
+from sqlalchemy import text
+
+from app import app, db
+from image_storage import sha256_file, content_filename
+from image_variants import variant_filename, remove_variant_files
+from models import ImageAsset
+
+
+def merge_image(keep_id, duplicate_id):
+    """Reporte les références de l'image `duplicate_id` sur `keep_id` puis la supprime"""
+    db.session.execute(text("""
+        INSERT INTO question_images (question_id, image_id)
+        SELECT question_id, :keep FROM question_images
+        WHERE image_id = :dup
+          AND question_id NOT IN (SELECT question_id FROM question_images WHERE image_id = :keep)
+    """), {'keep': keep_id, 'dup': duplicate_id})
+    db.session.execute(text("DELETE FROM question_images WHERE image_id = :dup"), {'dup': duplicate_id})
+    for table, column in (('answer_image_links', 'image_id'),
+                          ('questions', 'detailed_answer_image_id'),
+                          ('quiz_rule_sets', 'intro_image_id'),
+                          ('quiz_rule_sets', 'success_image_id'),
+                          ('quiz_rule_sets', 'failure_image_id')):
+        db.session.execute(text(f"UPDATE {table} SET {column} = :keep WHERE {column} = :dup"),
+                           {'keep': keep_id, 'dup': duplicate_id})
+    db.session.execute(text("DELETE FROM images WHERE id = :dup"), {'dup': duplicate_id})
+
+
+def rename_image_files(image, folder, digest):
+    """Renomme le fichier principal et les variantes de l'image d'après l'empreinte"""
+    _, ext = os.path.splitext(image.filename)
+    filename = content_filename(digest, ext)
+    if filename != image.filename:
+        source, target = os.path.join(folder, image.filename), os.path.join(folder, filename)
+        if os.path.exists(target):
+            os.remove(source)  # même contenu déjà présent sous ce nom
+        else:
+            os.rename(source, target)
+        variants = []
+        for variant in image.get_variants():
+            name = variant_filename(filename, variant['width'])
+            old_path = os.path.join(folder, variant['filename'])
+            if os.path.exists(old_path):
+                os.replace(old_path, os.path.join(folder, name))
+            variants.append({**variant, 'filename': name})
+        image.set_variants(variants)
+        image.filename = filename
+    image.content_hash = digest
+    if not image.source_hash:
+        image.source_hash = digest
+
+
+def migrate():
+    with app.app_context():
+        folder = app.config['UPLOAD_FOLDER']
+
+        # Colonnes et index
+        print("Ajout des colonnes 'content_hash' et 'source_hash' à 'images'...")
+        existing_cols = {row[1] for row in db.session.execute(text("PRAGMA table_info(images)")).fetchall()}
+        for col in ('content_hash', 'source_hash'):
+            if col not in existing_cols:
+                db.session.execute(text(f"ALTER TABLE images ADD COLUMN {col} VARCHAR(64)"))
+        db.session.commit()
+        for index in ImageAsset.__table__.indexes:
+            index.create(bind=db.engine, checkfirst=True)
+
+        # Empreintes, fusion des doublons, renommage
+        print("Calcul des empreintes et fusion des doublons...")
+        kept = {}
+        merged = renamed = missing = 0
+        for image in ImageAsset.query.order_by(ImageAsset.id).all():
+            path = os.path.join(folder, image.filename)
+            if not os.path.exists(path):
+                print(f"  [WARN] Fichier manquant pour l'image #{image.id}: {image.filename}")
+                missing += 1
+                continue
+            digest = sha256_file(path)
+            if digest in kept:
+                keep = kept[digest]
+                print(f"  '{image.title}' (#{image.id}) fusionnée dans #{keep.id}")
+                if image.filename != keep.filename:
+                    remove_variant_files(folder, image)
+                    os.remove(path)
+                db.session.expunge(image)
+                merge_image(keep.id, image.id)
+                merged += 1
+                continue
+            previous = image.filename
+            rename_image_files(image, folder, digest)
+            renamed += previous != image.filename
+            kept[digest] = image
+            db.session.commit()
+        db.session.commit()
+
+        # Copies orphelines identiques à une image conservée
+        print("Recherche des copies orphelines dans static/uploads...")
+        referenced = set()
+        for image in ImageAsset.query.all():
+            referenced.add(image.filename)
+            referenced.update(v['filename'] for v in image.get_variants())
+        removed = kept_orphans = 0
+        for name in sorted(os.listdir(folder)):
+            path = os.path.join(folder, name)
+            if name in referenced or not os.path.isfile(path):
+                continue
+            if sha256_file(path) in kept:
+                print(f"  Copie supprimée: {name}")
+                os.remove(path)
+                removed += 1
+            else:
+                kept_orphans += 1
+
+        print("✓ Migration terminée avec succès!")
+        print(f"\nStatistiques :")
+        print(f"  - Images : {ImageAsset.query.count()}")
+        print(f"  - Doublons fusionnés : {merged}")
+        print(f"  - Fichiers renommés : {renamed}")
+        print(f"  - Fichiers manquants : {missing}")
+        print(f"  - Copies orphelines supprimées : {removed} (autres fichiers non référencés conservés : {kept_orphans})")
+
+
+if __name__ == '__main__':
+    print("="*70)
+    print("Migration : Stockage des images adressé par contenu (SHA-256)")
+    print("="*70)
+    print()
+    print("Les fichiers de static/uploads seront renommés et les doublons supprimés.")
+    print("Pensez à sauvegarder la base et le dossier static/uploads avant de continuer.")
+    print()
+
+    response = input("Voulez-vous continuer avec cette migration ? (oui/non) : ")
+    if response.lower() in ['oui', 'o', 'yes', 'y']:
+        try:
+            migrate()
+            print("\n✓ Migration réussie !")
+        except Exception as e:
+            print(f"\n✗ Erreur lors de la migration : {e}")
+            import traceback
+            traceback.print_exc()
+    else:
+        print("Migration annulée.")
@@ -0,0 +1,106 @@
+"""
+Migration: images.filename n'est plus unique
+
+Deux fichiers envoyés différents peuvent donner la même image optimisée : les deux
+images partagent alors le fichier <empreinte>.webp (voir image_storage.py) au lieu
+d'une copie suffixée. Cette migration :
+1. Remplace la contrainte UNIQUE(filename) par un index simple ix_images_filename
+   (SQLite : reconstruction de la table; PostgreSQL : suppression de la contrainte)
+2. Rattache les copies suffixées <empreinte>_<n>.webp identiques à <empreinte>.webp
+   au fichier d'origine, et supprime ces copies
+
+Usage:
+    python migrate_image_shared_files.py
+"""
+
+import os
+import re
+
+from sqlalchemy import inspect, text
+from sqlalchemy.schema import CreateTable
+
+from app import app, db
+from image_storage import sha256_file
+from image_variants import variant_filename
+from models import ImageAsset
+
+_SUFFIXED = re.compile(r'^([0-9a-f]{64})_\d+\.webp$')
+
+
+def _filename_is_unique() -> bool:
+    inspector = inspect(db.engine)
+    if any(c['column_names'] == ['filename'] for c in inspector.get_unique_constraints('images')):
+        return True
+    return any(i['column_names'] == ['filename'] and i.get('unique') for i in inspector.get_indexes('images'))
+
+
+def drop_filename_unique():
+    if not _filename_is_unique():
+        print("[OK] images.filename déjà non unique")
+        return
+    dialect = db.engine.dialect.name
+    if dialect == 'sqlite':
+        columns = ', '.join(f'"{c.name}"' for c in ImageAsset.__table__.columns)
+        create = str(CreateTable(ImageAsset.__table__).compile(db.engine)).replace(
+            'CREATE TABLE images', 'CREATE TABLE images_new', 1)
+        db.session.execute(text("PRAGMA foreign_keys=OFF"))
+        db.session.execute(text(create))
+        db.session.execute(text(f"INSERT INTO images_new ({columns}) SELECT {columns} FROM images"))
+        db.session.execute(text("DROP TABLE images"))
+        db.session.execute(text("ALTER TABLE images_new RENAME TO images"))
+        db.session.commit()
+        db.session.execute(text("PRAGMA foreign_keys=ON"))
+        for index in ImageAsset.__table__.indexes:
+            index.create(db.engine, checkfirst=True)
+    else:
+        for constraint in inspect(db.engine).get_unique_constraints('images'):
+            if constraint['column_names'] == ['filename']:
+                db.session.execute(text(f'ALTER TABLE images DROP CONSTRAINT "{constraint["name"]}"'))
+        db.session.commit()
+        db.session.execute(text("CREATE INDEX IF NOT EXISTS ix_images_filename ON images (filename)"))
+        db.session.commit()
+    print("[OK] Contrainte UNIQUE(filename) remplacée par ix_images_filename")
+
+
+def share_suffixed_copies(folder):
+    merged = 0
+    for image in ImageAsset.query.filter(ImageAsset.filename.like('%\\_%.webp', escape='\\')).all():
+        match = _SUFFIXED.match(image.filename)
+        if not match:
+            continue
+        original = f"{match.group(1)}.webp"
+        copy_path, original_path = os.path.join(folder, image.filename), os.path.join(folder, original)
+        if not (os.path.exists(copy_path) and os.path.exists(original_path)):
+            continue
+        if sha256_file(copy_path) != sha256_file(original_path):
+            continue
+        variants = []
+        for variant in image.get_variants():
+            name = variant_filename(original, variant['width'])
+            try:
+                os.remove(os.path.join(folder, variant['filename']))
+            except OSError:
+                pass
+            variants.append({**variant, 'filename': name})
+        os.remove(copy_path)
+        image.filename = original
+        image.set_variants(variants)
+        merged += 1
+    db.session.commit()
+    print(f"[OK] {merged} copie(s) suffixée(s) rattachée(s) au fichier d'origine")
+
+
+def migrate():
+    with app.app_context():
+        print("[MIGRATION] Début migration images.filename partagé...")
+        try:
+            drop_filename_unique()
+            share_suffixed_copies(app.config['UPLOAD_FOLDER'])
+        except Exception as e:
+            db.session.rollback()
+            print(f"[ERREUR] Migration images.filename: {e}")
+            raise
+
+
+if __name__ == '__main__':
+    migrate()
@@ -0,0 +1,98 @@
+"""
+Migration pour ajouter le nom normalisé des mots-clés (détection des doublons)
+
+Cette migration :
+1. Ajoute la colonne 'normalized_name' à la table 'keywords'
+2. Fusionne les mots-clés en double (même nom normalisé) dans le plus ancien :
+   liens vers les questions, liens vers les règles de quiz et traductions
+3. Renseigne 'normalized_name' pour tous les mots-clés
+4. Crée l'index unique 'ux_keywords_normalized_name'
+
+La normalisation est celle de la création de mot-clé (normalize_keyword_name) :
+accents, espaces, traits d'union et underscores retirés, en minuscules.
+
+Usage:
+    python migrate_keyword_normalized_name.py
+"""
+
+from app import app, db
+from models import Keyword, normalize_keyword_name
+from sqlalchemy import text
+
+
+def merge_keyword(keep_id, duplicate_id):
+    """Reporte les liens du mot-clé `duplicate_id` sur `keep_id` puis le supprime"""
+    for table, owner in (('question_keywords', 'question_id'), ('quiz_rule_set_keywords', 'rule_set_id')):
+        db.session.execute(text(f"""
+            INSERT INTO {table} ({owner}, keyword_id)
+            SELECT {owner}, :keep FROM {table}
+            WHERE keyword_id = :dup
+              AND {owner} NOT IN (SELECT {owner} FROM {table} WHERE keyword_id = :keep)
+        """), {'keep': keep_id, 'dup': duplicate_id})
+        db.session.execute(text(f"DELETE FROM {table} WHERE keyword_id = :dup"), {'dup': duplicate_id})
+    db.session.execute(text("UPDATE keywords SET translation_id = :keep WHERE translation_id = :dup"),
+                       {'keep': keep_id, 'dup': duplicate_id})
+    db.session.execute(text("DELETE FROM keywords WHERE id = :dup"), {'dup': duplicate_id})
+
+
+def migrate():
+    with app.app_context():
+        # Ajouter la colonne
+        print("Ajout de la colonne 'normalized_name' à 'keywords'...")
+        try:
+            db.session.execute(text("ALTER TABLE keywords ADD COLUMN normalized_name VARCHAR(100)"))
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            print(f"  Colonne 'normalized_name' déjà existante ou erreur : {e}")
+
+        # Regrouper les mots-clés par nom normalisé (le plus ancien est conservé)
+        print("Recherche des mots-clés en double...")
+        rows = db.session.execute(text("SELECT id, name FROM keywords ORDER BY id")).fetchall()
+        kept = {}
+        merged = 0
+        for keyword_id, name in rows:
+            normalized = normalize_keyword_name(name)
+            if normalized in kept:
+                print(f"  '{name}' (#{keyword_id}) fusionné dans #{kept[normalized]}")
+                merge_keyword(kept[normalized], keyword_id)
+                merged += 1
+            else:
+                kept[normalized] = keyword_id
+
+        # Renseigner le nom normalisé
+        print("Calcul des noms normalisés...")
+        db.session.execute(text("UPDATE keywords SET normalized_name = NULL"))
+        for normalized, keyword_id in kept.items():
+            db.session.execute(text("UPDATE keywords SET normalized_name = :n WHERE id = :id"),
+                               {'n': normalized, 'id': keyword_id})
+
+        # Index unique
+        print("Création de l'index unique 'ux_keywords_normalized_name'...")
+        db.session.execute(text(
+            "CREATE UNIQUE INDEX IF NOT EXISTS ux_keywords_normalized_name ON keywords (normalized_name)"))
+
+        db.session.commit()
+        print("✓ Migration terminée avec succès!")
+
+        print(f"\nStatistiques :")
+        print(f"  - Mots-clés : {db.session.query(Keyword).count()}")
+        print(f"  - Doublons fusionnés : {merged}")
+
+if __name__ == '__main__':
+    print("="*70)
+    print("Migration : Nom normalisé des mots-clés (détection des doublons)")
+    print("="*70)
+    print()
+    
+    response = input("Voulez-vous continuer avec cette migration ? (oui/non) : ")
+    if response.lower() in ['oui', 'o', 'yes', 'y']:
+        try:
+            migrate()
+            print("\n✓ Migration réussie !")
+        except Exception as e:
+            print(f"\n✗ Erreur lors de la migration : {e}")
+            import traceback
+            traceback.print_exc()
+    else:
+        print("Migration annulée.")
@@ -1,7 +1,11 @@
 from datetime import datetime
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event
+from unidecode import unidecode
 import json
 
+from static_assets import is_content_addressed
+
 db = SQLAlchemy()
 
 
@@ -42,6 +46,11 @@ class BroadTheme(db.Model):
     
     # Traduction
     translation_id = db.Column(db.Integer, db.ForeignKey('broad_themes.id'), nullable=True)
+
+    # Tri de la liste des questions par thème
+    __table_args__ = (
+        db.Index('ix_broad_themes_name_id', 'name', 'id'),
+    )
     
     # Relations
     translations = db.relationship('BroadTheme',
@@ -93,6 +102,11 @@ class SpecificTheme(db.Model):
     # Traduction
     translation_id = db.Column(db.Integer, db.ForeignKey('specific_themes.id'), nullable=True)
 
+    # Tri de la liste des questions par sous-thème
+    __table_args__ = (
+        db.Index('ix_specific_themes_name_id', 'name', 'id'),
+    )
+
     # Relations
     translations = db.relationship('SpecificTheme',
                                    backref=db.backref('original', remote_side=[id]),
@@ -139,12 +153,18 @@ class Keyword(db.Model):
 
     # Informations
     name = db.Column(db.String(100), nullable=False)  # Nom du mot-clé/sujet précis
+    # Nom normalisé (voir normalize_keyword_name), renseigné automatiquement: détection des doublons
+    normalized_name = db.Column(db.String(100))
     description = db.Column(db.Text)  # Description optionnelle
     language = db.Column(db.String(10), nullable=False, default='fr')  # Code langue
 
     # Traduction
     translation_id = db.Column(db.Integer, db.ForeignKey('keywords.id'), nullable=True)
 
+    __table_args__ = (
+        db.Index('ux_keywords_normalized_name', 'normalized_name', unique=True),
+    )
+
     # Relations
     translations = db.relationship('Keyword',
                                    backref=db.backref('original', remote_side=[id]),
@@ -171,6 +191,17 @@ class Keyword(db.Model):
         }
 
 
+def normalize_keyword_name(name):
+    """Normaliser un nom de mot-clé: sans accents, espaces, traits d'union ni underscores, en minuscules"""
+    return unidecode((name or '').lower()).replace('-', '').replace(' ', '').replace('_', '')
+
+
+@event.listens_for(Keyword, 'before_insert')
+@event.listens_for(Keyword, 'before_update')
+def _set_keyword_normalized_name(mapper, connection, target):
+    target.normalized_name = normalize_keyword_name(target.name)
+
+
 class User(db.Model):
     __tablename__ = 'users'
 
@@ -400,6 +431,15 @@ class Question(db.Model):
 
     # Image pour la réponse détaillée (optionnelle)
     detailed_answer_image_id = db.Column(db.Integer, db.ForeignKey('images.id'), nullable=True)
+
+    # Un index par clé de tri de la liste d'administration, id en départage (pagination par curseur)
+    __table_args__ = (
+        db.Index('ix_questions_updated_at_id', 'updated_at', 'id'),
+        db.Index('ix_questions_created_at_id', 'created_at', 'id'),
+        db.Index('ix_questions_question_text_id', 'question_text', 'id'),
+        db.Index('ix_questions_difficulty_level_id', 'difficulty_level', 'id'),
+        db.Index('ix_questions_is_published_id', 'is_published', 'id'),
+    )
     
     # Relation pour les traductions
     translations = db.relationship('Question',
@@ -460,11 +500,22 @@ class ImageAsset(db.Model):
 
     # Métadonnées
     title = db.Column(db.String(200), nullable=False)
-    filename = db.Column(db.String(255), nullable=False, unique=True)  # nom de fichier stocké
+    filename = db.Column(db.String(255), nullable=False, index=True)  # nom de fichier stocké (partagé par les images de même contenu)
     mime_type = db.Column(db.String(100))
     size_bytes = db.Column(db.Integer)
     alt_text = db.Column(db.String(255))
 
+    # Dimensions de l'image principale et variantes responsives (voir image_variants.py)
+    width = db.Column(db.Integer)
+    height = db.Column(db.Integer)
+    variants_json = db.Column(db.Text)  # [{"width": 160, "height": 90, "filename": "..._160w.webp", "size_bytes": 1234}, ...]
+    placeholder = db.Column(db.Text)  # data URI WebP flouté de quelques pixels
+    # Optimisation en arrière-plan: 'pending' (fichier brut servi), 'ready' ou 'failed'
+    status = db.Column(db.String(20), nullable=False, default='ready', server_default='ready')
+    # Empreintes SHA-256 du fichier stocké et du fichier envoyé (stockage adressé par contenu, voir image_storage.py)
+    content_hash = db.Column(db.String(64), index=True)
+    source_hash = db.Column(db.String(64), index=True)
+
     # Copyright
     copyright_link = db.Column(db.Text)  # Lien vers la source/origine de l'image
     copyright_credits = db.Column(db.Text)  # Crédits (nom de l'auteur, source, etc.)
@@ -488,13 +539,65 @@ class ImageAsset(db.Model):
             'alt_text': self.alt_text,
             'copyright_link': self.copyright_link,
             'copyright_credits': self.copyright_credits,
+            'status': self.status,
             'created_at': self.created_at.isoformat() if self.created_at else None
         }
 
+    def _file_url(self, filename: str) -> str:
+        """URL d'un fichier de l'image, mise en cache longue durée (voir static_assets.py)
+
+        Un fichier nommé d'après son empreinte est servi sous son nom; les autres
+        (fichiers historiques, variantes) sous /uploads/v<version>/<id>/, la version
+        (updated_at) changeant à chaque modification de l'image.
+        """
+        if is_content_addressed(filename):
+            return f'/uploads/{filename}'
+        if self.id is None:
+            return f'/uploads/v{self.file_version}/{filename}'
+        return f'/uploads/v{self.file_version}/{self.id}/{filename}'
+
+    @property
+    def file_version(self) -> int:
+        """Version des URLs /uploads/v<version>/ (updated_at en secondes)"""
+        return int(self.updated_at.timestamp()) if self.updated_at else 0
+
+    def owns_file(self, filename: str) -> bool:
+        """Le fichier est le fichier principal ou une variante de cette image"""
+        return filename == self.filename or any(v['filename'] == filename for v in self.get_variants())
+
     @property
     def url(self):
         """Retourne l'URL pour accéder à cette image"""
-        return f'/uploads/{self.filename}'
+        return self._file_url(self.filename)
+
+    def get_variants(self) -> list:
+        """Variantes enregistrées, de la plus petite à la plus grande"""
+        try:
+            variants = json.loads(self.variants_json or '[]')
+        except Exception:
+            return []
+        return sorted((v for v in variants if v.get('width') and v.get('filename')), key=lambda v: v['width'])
+
+    def set_variants(self, variants) -> None:
+        self.variants_json = json.dumps(list(variants)) if variants else None
+
+    def variant_url(self, width: int) -> str:
+        """URL de la plus petite variante d'au moins `width` pixels (sinon l'image principale)"""
+        for variant in self.get_variants():
+            if variant['width'] >= width:
+                return self._file_url(variant['filename'])
+        return self.url
+
+    @property
+    def srcset(self) -> str:
+        """Attribut srcset (variantes + image principale), vide si l'image n'a pas de variantes"""
+        variants = self.get_variants()
+        if not variants:
+            return ''
+        candidates = [f"{self._file_url(v['filename'])} {v['width']}w" for v in variants]
+        if self.width:
+            candidates.append(f"{self.url} {self.width}w")
+        return ', '.join(candidates)
 
 
 class AnswerImageLink(db.Model):
@@ -738,6 +841,23 @@ class QuizRuleSet(db.Model):
         else:
             self.allowed_difficulties_csv = ','.join(str(int(d)) for d in sorted(set(difficulties_list)))
 
+    # IDs des relations (utilisés par la génération des playlists et les instantanés de rule_set_cache.py)
+    @property
+    def allowed_broad_theme_ids(self) -> tuple:
+        return tuple(t.id for t in self.allowed_broad_themes)
+
+    @property
+    def allowed_specific_theme_ids(self) -> tuple:
+        return tuple(st.id for st in self.allowed_specific_themes)
+
+    @property
+    def allowed_country_ids(self) -> tuple:
+        return tuple(c.id for c in self.allowed_countries)
+
+    @property
+    def selected_question_ids(self) -> tuple:
+        return tuple(q.id for q in self.selected_questions)
+
     def __repr__(self):
         return f"<QuizRuleSet {self.id}: {self.name} active={self.is_active}>"
 
@@ -776,6 +896,34 @@ class UserQuestionStat(db.Model):
         return f"<UserQuestionStat u={self.user_id} q={self.question_id} times={self.times_answered} success={self.success_count}>"
 
 
+# ===================== Agrégats de statistiques par utilisateur =====================
+
+class UserStatsRollup(db.Model):
+    """Totaux de réponses d'un utilisateur par dimension, maintenus à chaque réponse.
+    dimension: 'total' | 'broad_theme' | 'specific_theme' | 'difficulty'
+    dim_key: ID du thème / niveau de difficulté (0 = total ou sans thème)
+    """
+    __tablename__ = 'user_stats_rollups'
+
+    id = db.Column(db.Integer, primary_key=True)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    dimension = db.Column(db.String(20), nullable=False)
+    dim_key = db.Column(db.Integer, nullable=False, default=0)
+
+    answered = db.Column(db.Integer, nullable=False, default=0)
+    success = db.Column(db.Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        # Sert aussi d'index pour la lecture de /me (WHERE user_id = ?)
+        db.UniqueConstraint('user_id', 'dimension', 'dim_key', name='uq_user_stats_rollup'),
+    )
+
+    def __repr__(self):
+        return f"<UserStatsRollup u={self.user_id} {self.dimension}={self.dim_key} answered={self.answered} success={self.success}>"
+
+
 # ===================== Sessions de quiz par utilisateur =====================
 
 class UserQuizSession(db.Model):
@@ -835,6 +983,21 @@ class QuestionAnswerStat(db.Model):
         return f"<QuestionAnswerStat q={self.question_id} idx={self.answer_index} n={self.selected_count}>"
 
 
+class QuizState(db.Model):
+    """État d'une partie en cours (playlist, progression, score, mélanges), côté serveur.
+    Le cookie de session ne contient qu'un jeton opaque (voir quiz_state.py).
+    """
+    __tablename__ = 'quiz_states'
+
+    # Clé: "<jeton>:<utilisateur>:<slug du set>"
+    key = db.Column(db.String(200), primary_key=True)
+    data_json = db.Column(db.Text, nullable=False, default='{}')
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+
+    def __repr__(self):
+        return f"<QuizState {self.key} expires={self.expires_at}>"
+
+
 # ===================== Messagerie interne =====================
 
 class Conversation(db.Model):
@@ -851,6 +1014,11 @@ class Conversation(db.Model):
     context_type = db.Column(db.String(50))  # ex: 'question_report'
     context_id = db.Column(db.Integer)
 
+    # updated_at = date du dernier message: tri et pagination par curseur de la liste des conversations
+    __table_args__ = (
+        db.Index('ix_conversations_updated_at_id', 'updated_at', 'id'),
+    )
+
     # Relations
     participants = db.relationship('ConversationParticipant', back_populates='conversation', cascade='all, delete-orphan', lazy='dynamic')
     messages = db.relationship('ConversationMessage', back_populates='conversation', cascade='all, delete-orphan', lazy='dynamic', order_by='ConversationMessage.created_at')
@@ -870,10 +1038,12 @@ class ConversationParticipant(db.Model):
 
     # Liens
     conversation_id = db.Column(db.Integer, db.ForeignKey('conversations.id'), nullable=False)
-    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
 
     # Lecture
     last_read_at = db.Column(db.DateTime, nullable=True)
+    # Messages non lus (maintenu à l'envoi, remis à zéro à la lecture)
+    unread_count = db.Column(db.Integer, nullable=False, default=0)
 
     __table_args__ = (
         db.UniqueConstraint('conversation_id', 'user_id', name='uq_conversation_participant'),
@@ -884,7 +1054,7 @@ class ConversationParticipant(db.Model):
     user = db.relationship('User')
 
     def __repr__(self):
-        return f"<ConversationParticipant conv={self.conversation_id} user={self.user_id} last_read_at={self.last_read_at}>"
+        return f"<ConversationParticipant conv={self.conversation_id} user={self.user_id} last_read_at={self.last_read_at} unread={self.unread_count}>"
 
 
 class ConversationMessage(db.Model):
@@ -903,6 +1073,10 @@ class ConversationMessage(db.Model):
     # Contenu
     content = db.Column(db.Text, nullable=False)
 
+    __table_args__ = (
+        db.Index('ix_conversation_messages_conv_created', 'conversation_id', 'created_at'),
+    )
+
     # Relations
     conversation = db.relationship('Conversation', back_populates='messages')
     sender = db.relationship('User')
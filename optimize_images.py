@@ -0,0 +1,68 @@
+"""
+Optimisation en parallèle des images existantes (static/uploads)
+
+Traite, dans un pool de processus :
+- les images en attente ou en échec (statut 'pending' / 'failed', par exemple
+  après un arrêt du serveur) : optimisation complète (WebP, variantes) ;
+- les images optimisées sans variantes (envoyées avant les variantes) :
+  variantes et placeholder seulement, sans réencoder le fichier principal.
+
+Usage:
+    python optimize_images.py                 # reliquat uniquement
+    python optimize_images.py --all           # toutes les images
+    python optimize_images.py --workers 4     # taille du pool (défaut: IMAGE_OPTIMIZE_WORKERS)
+"""
+
+import argparse
+import time
+
+from app import app, db
+from image_pipeline import ImageOptimizationPipeline, STATUS_READY, STATUS_PENDING
+from image_variants import Image, DEFAULT_VARIANT_WIDTHS
+from models import ImageAsset
+
+
+def optimize(regenerate_all=False, workers=None):
+    if Image is None:
+        print("[INFO] Pillow n'est pas installé, aucune image ne peut être optimisée")
+        return
+    pipeline = ImageOptimizationPipeline(
+        app,
+        async_mode=True,
+        max_workers=workers or app.config['IMAGE_OPTIMIZE_WORKERS'],
+        widths=app.config.get('IMAGE_VARIANT_WIDTHS') or DEFAULT_VARIANT_WIDTHS,
+    )
+    with app.app_context():
+        query = ImageAsset.query
+        if not regenerate_all:
+            query = query.filter(db.or_(ImageAsset.status != STATUS_READY,
+                                        db.and_(ImageAsset.variants_json.is_(None), ImageAsset.placeholder.is_(None))))
+        images = [(image.id, image.filename, image.status, image.mime_type)
+                  for image in query.order_by(ImageAsset.id).all()]
+
+    started = time.monotonic()
+    print(f"Optimisation de {len(images)} image(s) sur {pipeline.max_workers} processus...")
+    for image_id, filename, status, mime_type in images:
+        # Un fichier déjà optimisé (WebP prêt) n'est pas réencodé: variantes seulement
+        reencode = status != STATUS_READY or mime_type != 'image/webp'
+        if reencode and status == STATUS_READY:
+            with app.app_context():
+                db.session.get(ImageAsset, image_id).status = STATUS_PENDING
+                db.session.commit()
+        pipeline.submit(image_id, filename, reencode=reencode)
+    pipeline.wait()
+    pipeline.shutdown()
+
+    with app.app_context():
+        ids = [image_id for image_id, *_ in images]
+        counts = dict(db.session.query(ImageAsset.status, db.func.count(ImageAsset.id))
+                      .filter(ImageAsset.id.in_(ids)).group_by(ImageAsset.status).all()) if ids else {}
+    print(f"[OK] {len(images)} image(s) traitée(s) en {time.monotonic() - started:.1f}s: {counts}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Optimise les images existantes en parallèle")
+    parser.add_argument('--all', action='store_true', help="retraiter toutes les images")
+    parser.add_argument('--workers', type=int, default=None, help="nombre de processus")
+    args = parser.parse_args()
+    optimize(regenerate_all=args.all, workers=args.workers)
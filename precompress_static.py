@@ -0,0 +1,48 @@
+"""
+Précompression des fichiers statiques (static/style.css par défaut)
+
+Écrit à côté de chaque fichier de PRECOMPRESSED_STATIC une version gzip (.gz)
+et, si le module brotli est installé, une version Brotli (.br), compressées au
+niveau maximal. Le serveur les sert à la place du fichier d'origine quand le
+client les accepte et qu'elles sont plus récentes que lui (voir static_assets.py) :
+relancer ce script après chaque modification d'un de ces fichiers (déploiement).
+
+Usage:
+    python precompress_static.py
+"""
+
+import gzip
+import os
+
+from config import Config
+
+try:
+    import brotli
+except ImportError:  # optionnel: seul le .gz est produit
+    brotli = None
+
+STATIC_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+
+
+def precompress(filename):
+    path = os.path.join(STATIC_FOLDER, filename)
+    if not os.path.isfile(path):
+        print(f"[WARN] Fichier introuvable: {path}")
+        return
+    with open(path, 'rb') as f:
+        data = f.read()
+    outputs = [('.gz', gzip.compress(data, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        outputs.append(('.br', brotli.compress(data, quality=11)))
+    for suffix, compressed in outputs:
+        with open(path + suffix, 'wb') as f:
+            f.write(compressed)
+        print(f"  {filename}{suffix}: {len(data)} -> {len(compressed)} octets")
+
+
+if __name__ == '__main__':
+    if brotli is None:
+        print("[INFO] Module brotli absent: seules les versions .gz sont produites")
+    for name in Config.PRECOMPRESSED_STATIC:
+        precompress(name)
+    print("[OK] Précompression terminée")
@@ -0,0 +1,194 @@
+"""
+Recherche plein texte des questions (SQLite FTS5).
+
+La table virtuelle questions_fts contient, par question (rowid = questions.id),
+le texte, la réponse détaillée, l'indice, l'auteur, le thème et le sous-thème,
+normalisés comme les mots-clés (unidecode + minuscules) : « Géocache » et
+« geocache » donnent le même terme. Elle est tenue à jour par un écouteur
+after_flush de la session (création/modification de question, renommage d'un
+thème, d'un sous-thème ou d'un auteur) et par un trigger SQL pour les
+suppressions, y compris les suppressions en masse hors ORM.
+
+Les résultats sont classés par bm25. Hors SQLite (ou si FTS5 n'est pas
+disponible), search_hits() retourne None et l'appelant garde son filtre LIKE.
+"""
+
+import re
+
+from sqlalchemy import event, inspect, text, func, literal_column, select, table, column
+from sqlalchemy.orm import Session
+from unidecode import unidecode
+
+from models import db, Question, BroadTheme, SpecificTheme, User
+from app_logging import get_logger
+
+logger = get_logger('search')
+
+
+FTS_TABLE = 'questions_fts'
+
+# Colonnes indexées, dans l'ordre de la table virtuelle
+FTS_COLUMNS = ('question_text', 'detailed_answer', 'hint', 'author', 'broad_theme', 'specific_theme')
+
+# Poids bm25 par colonne (même ordre que FTS_COLUMNS): le texte de la question compte le plus
+_BM25_WEIGHTS = (10.0, 2.0, 2.0, 1.0, 4.0, 4.0)
+
+_fts = table(FTS_TABLE, column('rowid'))
+
+# Activé par ensure_search_index() au démarrage, si la base le permet
+_available = False
+
+
+def normalize_search_text(value) -> str:
+    """Normalisation commune à l'index et aux requêtes (sans accents, en minuscules)"""
+    if not value:
+        return ''
+    return unidecode(str(value)).lower()
+
+
+def build_match_query(query_text: str, columns=None) -> str | None:
+    """Transforme une saisie libre en requête FTS5
+
+    Chaque mot devient un préfixe entre guillemets ("geocach"*), tous les mots
+    doivent être présents. `columns` restreint la recherche à certaines colonnes.
+    Retourne None si la saisie ne contient aucun mot.
+    """
+    terms = re.findall(r'\w+', normalize_search_text(query_text))
+    if not terms:
+        return None
+    match = ' '.join(f'"{term}"*' for term in terms)
+    if columns:
+        match = '{' + ' '.join(columns) + '}: (' + match + ')'
+    return match
+
+
+def search_index_available() -> bool:
+    return _available
+
+
+def ensure_search_index() -> bool:
+    """Crée la table FTS5 si besoin et la remplit à sa création (SQLite uniquement)"""
+    global _available
+    if db.engine.dialect.name != 'sqlite':
+        _available = False
+        return False
+    try:
+        with db.engine.begin() as conn:
+            existed = inspect(conn).has_table(FTS_TABLE)
+            conn.execute(text(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+                f"{', '.join(FTS_COLUMNS)}, tokenize = 'unicode61 remove_diacritics 2')"
+            ))
+            conn.execute(text(
+                f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_delete AFTER DELETE ON questions "
+                f"BEGIN DELETE FROM {FTS_TABLE} WHERE rowid = old.id; END"
+            ))
+        _available = True
+        if not existed:
+            rebuild_search_index()
+    except Exception as e:
+        # FTS5 absent de la build SQLite: la recherche reste en LIKE
+        logger.warning("Index plein texte indisponible, recherche en LIKE: %s", e)
+        _available = False
+    return _available
+
+
+def rebuild_search_index() -> int:
+    """Reconstruit entièrement l'index plein texte; retourne le nombre de questions indexées"""
+    with db.engine.begin() as conn:
+        conn.execute(text(f"DELETE FROM {FTS_TABLE}"))
+        return _index_questions(conn, conn.execute(_question_rows_query()))
+
+
+def _question_rows_query():
+    return (select(Question.id, Question.question_text, Question.detailed_answer, Question.hint,
+                   User.username, BroadTheme.name, SpecificTheme.name)
+            .select_from(Question)
+            .outerjoin(User, Question.author_id == User.id)
+            .outerjoin(BroadTheme, Question.broad_theme_id == BroadTheme.id)
+            .outerjoin(SpecificTheme, Question.specific_theme_id == SpecificTheme.id))
+
+
+def _index_questions(conn, rows) -> int:
+    """Insère les lignes (id, texte, réponse détaillée, indice, auteur, thème, sous-thème) normalisées"""
+    rows = [
+        {'rowid': row[0], **{name: normalize_search_text(value) for name, value in zip(FTS_COLUMNS, row[1:])}}
+        for row in rows
+    ]
+    if rows:
+        conn.execute(text(
+            f"INSERT INTO {FTS_TABLE} (rowid, {', '.join(FTS_COLUMNS)}) "
+            f"VALUES (:rowid, {', '.join(':' + name for name in FTS_COLUMNS)})"
+        ), rows)
+    return len(rows)
+
+
+def search_hits(query_text: str, columns=None):
+    """Sous-requête (question_id, rank) des questions correspondant à la saisie
+
+    rank est le score bm25 (plus petit = plus pertinent). Retourne None si l'index
+    n'est pas disponible ou si la saisie ne contient aucun mot (l'appelant garde
+    alors son filtre LIKE).
+    """
+    if not _available:
+        return None
+    match = build_match_query(query_text, columns)
+    if match is None:
+        return None
+    fts = literal_column(FTS_TABLE)
+    return (select(_fts.c.rowid.label('question_id'),
+                   func.bm25(fts, *_BM25_WEIGHTS).label('rank'))
+            .select_from(_fts)
+            .where(fts.op('MATCH')(match))
+            .subquery('search_hits'))
+
+
+# ---------------------------------------------------------------------------
+# Synchronisation avec les écritures ORM
+# ---------------------------------------------------------------------------
+
+def _name_changed(obj, attr) -> bool:
+    return inspect(obj).attrs[attr].history.has_changes()
+
+
+@event.listens_for(Session, 'after_flush')
+def _sync_search_index(session, flush_context):
+    if not _available:
+        return
+
+    question_ids = set()
+    renamed = {'broad': set(), 'specific': set(), 'author': set()}
+    for obj in session.new:
+        if isinstance(obj, Question):
+            question_ids.add(obj.id)
+    for obj in session.dirty:
+        if isinstance(obj, Question):
+            question_ids.add(obj.id)
+        elif isinstance(obj, BroadTheme) and _name_changed(obj, 'name'):
+            renamed['broad'].add(obj.id)
+        elif isinstance(obj, SpecificTheme) and _name_changed(obj, 'name'):
+            renamed['specific'].add(obj.id)
+        elif isinstance(obj, User) and _name_changed(obj, 'username'):
+            renamed['author'].add(obj.id)
+
+    conditions = []
+    if question_ids:
+        conditions.append(Question.id.in_(question_ids))
+    if renamed['broad']:
+        conditions.append(Question.broad_theme_id.in_(renamed['broad']))
+    if renamed['specific']:
+        conditions.append(Question.specific_theme_id.in_(renamed['specific']))
+    if renamed['author']:
+        conditions.append(Question.author_id.in_(renamed['author']))
+    if not conditions:
+        return
+
+    conn = session.connection()
+    if conn.dialect.name != 'sqlite':
+        return
+    rows = conn.execute(_question_rows_query().where(db.or_(*conditions))).all()
+    if not rows:
+        return
+    # Les questions réindexées sont d'abord retirées de l'index
+    conn.execute(text(f"DELETE FROM {FTS_TABLE} WHERE rowid IN ({', '.join(str(int(row[0])) for row in rows)})"))
+    _index_questions(conn, rows)
@@ -0,0 +1,191 @@
+"""
+Index en mémoire des questions publiées, utilisé pour générer les playlists de quiz.
+
+L'index est local au processus et versionné : chaque écriture sur une question
+(création, modification, suppression, changement de statut) appelle
+invalidate_question_index() et la lecture suivante reconstruit l'index en trois
+requêtes. Les candidats d'une playlist sont ensuite obtenus par intersection
+d'ensembles (difficulté, thème, sous-thème, pays), sans aller-retour SQL.
+
+Le tirage aléatoire d'une question (quiz sans set de règles) s'appuie sur la
+liste triée des candidats, mise en cache par combinaison de filtres dans
+l'instantané : un tirage uniforme coûte O(1) en moyenne, au lieu d'un
+ORDER BY RANDOM() qui trie toute la table filtrée à chaque question.
+"""
+
+import random
+import threading
+import time
+
+from models import db, Question, question_keywords, question_countries
+from keyword_selection import mask_for_keywords
+
+
+_EMPTY = frozenset()
+
+# Nombre max de combinaisons de filtres dont la liste de candidats est gardée par instantané
+_MAX_CACHED_FILTERS = 256
+
+# Tirages rejetés (question déjà vue) avant de basculer sur la liste des candidats restants
+_MAX_REJECTIONS = 32
+
+
+class QuestionIndex:
+    """Instantané immuable des questions publiées et de leurs mots-clés (en masques de bits)."""
+
+    def __init__(self, version: int, question_rows, keyword_rows, country_rows):
+        self.version = version
+        self.built_at = time.monotonic()
+
+        keywords: dict[int, set[int]] = {}
+        for question_id, keyword_id in keyword_rows:
+            keywords.setdefault(question_id, set()).add(keyword_id)
+
+        countries: dict[int, set[int]] = {}
+        for question_id, country_id in country_rows:
+            countries.setdefault(question_id, set()).add(country_id)
+
+        by_difficulty: dict[int, set[int]] = {}
+        by_broad_theme: dict[int, set[int]] = {}
+        by_specific_theme: dict[int, set[int]] = {}
+        by_country: dict[int, set[int]] = {}
+        all_ids = set()
+        for question_id, difficulty, broad_theme_id, specific_theme_id in question_rows:
+            all_ids.add(question_id)
+            by_difficulty.setdefault(difficulty, set()).add(question_id)
+            by_broad_theme.setdefault(broad_theme_id, set()).add(question_id)
+            by_specific_theme.setdefault(specific_theme_id, set()).add(question_id)
+            for country_id in countries.get(question_id, ()):
+                by_country.setdefault(country_id, set()).add(question_id)
+
+        self.all_ids = frozenset(all_ids)
+        # Une position de bit par mot-clé, et un masque de mots-clés par question publiée
+        self.keyword_bits = {kw_id: bit for bit, kw_id in enumerate(sorted({kw for kws in keywords.values() for kw in kws}))}
+        self.keyword_masks = {
+            qid: mask_for_keywords(kws, self.keyword_bits)
+            for qid, kws in keywords.items() if qid in self.all_ids
+        }
+        self._by_difficulty = {k: frozenset(v) for k, v in by_difficulty.items()}
+        self._by_broad_theme = {k: frozenset(v) for k, v in by_broad_theme.items()}
+        self._by_specific_theme = {k: frozenset(v) for k, v in by_specific_theme.items()}
+        self._by_country = {k: frozenset(v) for k, v in by_country.items()}
+        # Listes triées des candidats par combinaison de filtres (voir eligible_ids)
+        self._eligible: dict[tuple, tuple[int, ...]] = {}
+
+    def __len__(self):
+        return len(self.all_ids)
+
+    def __contains__(self, question_id):
+        return question_id in self.all_ids
+
+    def keyword_mask(self, keyword_ids) -> int:
+        """Masque de bits correspondant à un ensemble d'IDs de mots-clés."""
+        return mask_for_keywords(keyword_ids, self.keyword_bits)
+
+    def candidates(self, difficulties=None, broad_theme_ids=None, specific_theme_ids=None, country_ids=None) -> set[int]:
+        """Retourne les IDs des questions publiées correspondant aux filtres.
+        Un filtre à None n'est pas appliqué; une liste vide ne laisse passer aucune question.
+        """
+        result = None
+        for mapping, keys in ((self._by_difficulty, difficulties),
+                              (self._by_broad_theme, broad_theme_ids),
+                              (self._by_specific_theme, specific_theme_ids),
+                              (self._by_country, country_ids)):
+            if keys is None:
+                continue
+            subset = set()
+            for key in keys:
+                subset.update(mapping.get(key, _EMPTY))
+            result = subset if result is None else (result & subset)
+            if not result:
+                return set()
+        return set(self.all_ids) if result is None else result
+
+    def eligible_ids(self, difficulties=None, broad_theme_ids=None, specific_theme_ids=None, country_ids=None) -> tuple[int, ...]:
+        """Comme candidates(), en tuple trié mis en cache pour la durée de vie de l'instantané."""
+        key = tuple(None if keys is None else tuple(sorted(set(keys)))
+                    for keys in (difficulties, broad_theme_ids, specific_theme_ids, country_ids))
+        ids = self._eligible.get(key)
+        if ids is None:
+            ids = tuple(sorted(self.candidates(*key)))
+            if len(self._eligible) >= _MAX_CACHED_FILTERS:
+                self._eligible.clear()
+            self._eligible[key] = ids
+        return ids
+
+    def random_question_id(self, exclude=(), rng=random, **filters) -> int | None:
+        """Tire uniformément une question publiée correspondant aux filtres, hors `exclude`.
+        Retourne None si toutes les questions candidates sont exclues.
+        """
+        return sample_excluding(self.eligible_ids(**filters), exclude, rng)
+
+
+def sample_excluding(ids, exclude=(), rng=random) -> int | None:
+    """Élément tiré uniformément dans la séquence `ids`, hors `exclude` (None si aucun)
+
+    Tirage par rejet: tant que l'historique ne couvre qu'une petite partie des
+    candidats, quelques tirages suffisent. Au-delà de _MAX_REJECTIONS échecs, le
+    tirage se fait parmi les candidats restants (O(n), toujours uniforme).
+    """
+    if not ids:
+        return None
+    exclude = exclude if isinstance(exclude, (set, frozenset)) else set(exclude)
+    for _ in range(_MAX_REJECTIONS):
+        question_id = ids[rng.randrange(len(ids))]
+        if question_id not in exclude:
+            return question_id
+    remaining = [question_id for question_id in ids if question_id not in exclude]
+    return rng.choice(remaining) if remaining else None
+
+
+def _load_index(version: int) -> QuestionIndex:
+    published = Question.is_published.is_(True)
+    question_rows = (db.session.query(Question.id, Question.difficulty_level,
+                                      Question.broad_theme_id, Question.specific_theme_id)
+                     .filter(published)
+                     .all())
+    keyword_rows = (db.session.query(question_keywords.c.question_id, question_keywords.c.keyword_id)
+                    .join(Question, Question.id == question_keywords.c.question_id)
+                    .filter(published)
+                    .all())
+    country_rows = (db.session.query(question_countries.c.question_id, question_countries.c.country_id)
+                    .join(Question, Question.id == question_countries.c.question_id)
+                    .filter(published)
+                    .all())
+    return QuestionIndex(version, question_rows, keyword_rows, country_rows)
+
+
+_lock = threading.Lock()
+_index: QuestionIndex | None = None
+_version = 0
+
+
+def _is_fresh(index: QuestionIndex | None, max_age: float | None) -> bool:
+    if index is None or index.version != _version:
+        return False
+    return not max_age or (time.monotonic() - index.built_at) < max_age
+
+
+def get_question_index(max_age: float | None = None) -> QuestionIndex:
+    """Retourne l'index courant, en le reconstruisant s'il a été invalidé.
+    max_age (secondes) borne la durée de vie de l'index, pour que les autres
+    processus finissent par voir les écritures qu'ils n'ont pas invalidées eux-mêmes.
+    """
+    global _index
+    index = _index
+    if _is_fresh(index, max_age):
+        return index
+    with _lock:
+        index = _index
+        if not _is_fresh(index, max_age):
+            index = _load_index(_version)
+            _index = index
+    return index
+
+
+def invalidate_question_index():
+    """Invalide l'index: la prochaine lecture le reconstruira depuis la base."""
+    global _index, _version
+    with _lock:
+        _version += 1
+        _index = None
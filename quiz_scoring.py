@@ -0,0 +1,52 @@
+"""
+Calcul du score d'une réponse, précompilé par set de règles.
+
+compile_scoring() lit une seule fois les paramètres de score du set (points de
+base, bonus additif ou multiplicatif par difficulté, combo) et retourne une
+fonction score(difficulté, correcte, série) qui ne fait plus qu'une recherche
+dans une table : O(1) quelle que soit la longueur du quiz. La série (bonnes
+réponses consécutives, réponse courante incluse) est tenue dans l'état de la
+partie côté serveur (state['streak']), sans relire l'historique des questions.
+
+L'instantané du set (rule_set_cache.RuleSetSnapshot) compile sa fonction à sa
+construction : elle est recompilée quand le set est modifié.
+"""
+
+
+def _points_by_difficulty(rule_set) -> tuple[dict[int, int | float], int | float]:
+    """Points d'une bonne réponse par niveau de difficulté, et valeur par défaut"""
+    base = rule_set.scoring_base_points
+    bonus_type = rule_set.scoring_difficulty_bonus_type
+    if bonus_type not in ('add', 'mult'):
+        return {}, base
+    table = {}
+    for key, value in rule_set.get_difficulty_bonus_map().items():
+        if not str(key).isdigit():
+            continue
+        if bonus_type == 'add':
+            table[int(key)] = base + value
+        else:
+            table[int(key)] = int(base * value)
+    return table, base
+
+
+def compile_scoring(rule_set):
+    """Retourne score(difficulty_level, is_correct, streak) pour ce set de règles
+
+    streak: nombre de bonnes réponses consécutives, réponse courante incluse.
+    Combo: combo_bonus_points par palier de combo_step bonnes réponses consécutives.
+    """
+    table, default = _points_by_difficulty(rule_set)
+    combo_step = combo_points = 0
+    if rule_set.combo_bonus_enabled and rule_set.combo_step and rule_set.combo_bonus_points:
+        combo_step, combo_points = rule_set.combo_step, rule_set.combo_bonus_points
+
+    def score(difficulty_level, is_correct: bool, streak: int = 0):
+        if not is_correct:
+            return 0
+        points = table.get(difficulty_level, default)
+        if combo_step:
+            points += (streak // combo_step) * combo_points
+        return points
+
+    return score
@@ -0,0 +1,146 @@
+"""
+Stockage côté serveur de l'état des parties de quiz.
+
+Le cookie de session Flask ne contient plus qu'un jeton opaque (`quiz_token`);
+la playlist, la progression, le score et l'ordre de mélange des réponses sont
+conservés dans un store, sous une clé "<jeton>:<utilisateur>:<slug du set>".
+
+Deux backends interchangeables (configuration QUIZ_STATE_BACKEND):
+- 'sql'    : table quiz_states (partagée entre processus, survit aux redémarrages)
+- 'memory' : LRU en mémoire du processus (un seul worker, développement, tests)
+
+Les entrées expirent après QUIZ_STATE_TTL secondes sans écriture.
+"""
+
+import json
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+from sqlalchemy import select
+
+from models import db, QuizState
+
+
+def new_quiz_token() -> str:
+    """Génère un jeton opaque pour identifier le navigateur dans le store."""
+    return secrets.token_urlsafe(16)
+
+
+class MemoryQuizStateStore:
+    """Store LRU en mémoire du processus, avec expiration."""
+
+    def __init__(self, ttl_seconds: int, max_entries: int = 10000):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[float, str]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> dict | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, data_json = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+        # Sérialisé comme pour le backend SQL: l'appelant reçoit toujours une copie
+        return json.loads(data_json)
+
+    def set(self, key: str, data: dict):
+        data_json = json.dumps(data)
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, data_json)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: str):
+        with self._lock:
+            self._entries.pop(key, None)
+
+
+class SqlQuizStateStore:
+    """Store basé sur la table quiz_states.
+
+    Lectures et écritures passent par leur propre connexion (db.engine), hors de la
+    session SQLAlchemy de la requête : enregistrer l'état ne valide ni n'annule le
+    travail en cours de la route, et une lecture ne renvoie jamais un objet périmé
+    de la carte d'identité de la session. L'écriture est un upsert
+    (INSERT ... ON CONFLICT(key) DO UPDATE) : un double clic ne lève pas d'erreur.
+    SQLite n'admet qu'un écrivain à la fois : les routes enregistrent l'état après
+    avoir validé leurs propres écritures.
+    """
+
+    # Purge des entrées expirées toutes les N écritures
+    PURGE_EVERY = 200
+
+    def __init__(self, ttl_seconds: int):
+        self.ttl_seconds = ttl_seconds
+        self._writes = 0
+
+    def get(self, key: str) -> dict | None:
+        t = QuizState.__table__
+        with db.engine.connect() as conn:
+            row = conn.execute(select(t.c.data_json, t.c.expires_at).where(t.c.key == key)).first()
+        if row is None or row.expires_at < datetime.utcnow():
+            return None
+        try:
+            return json.loads(row.data_json or '{}')
+        except ValueError:
+            return None
+
+    def set(self, key: str, data: dict):
+        t = QuizState.__table__
+        values = {
+            'data_json': json.dumps(data),
+            'expires_at': datetime.utcnow() + timedelta(seconds=self.ttl_seconds),
+        }
+        with db.engine.begin() as conn:
+            insert = _dialect_insert(conn, t)
+            if insert is not None:
+                stmt = insert.values(key=key, **values)
+                conn.execute(stmt.on_conflict_do_update(index_elements=['key'], set_=values))
+            elif not conn.execute(t.update().where(t.c.key == key).values(**values)).rowcount:
+                # Autres moteurs: UPDATE, puis INSERT si la clé n'existe pas encore
+                conn.execute(t.insert().values(key=key, **values))
+
+        self._writes += 1
+        if self._writes % self.PURGE_EVERY == 0:
+            self.purge_expired()
+
+    def delete(self, key: str):
+        t = QuizState.__table__
+        with db.engine.begin() as conn:
+            conn.execute(t.delete().where(t.c.key == key))
+
+    def purge_expired(self) -> int:
+        t = QuizState.__table__
+        with db.engine.begin() as conn:
+            return conn.execute(t.delete().where(t.c.expires_at < datetime.utcnow())).rowcount
+
+
+def _dialect_insert(conn, table):
+    """INSERT du dialecte de la connexion s'il supporte ON CONFLICT DO UPDATE, sinon None."""
+    dialect = conn.dialect.name
+    if dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+    elif dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        return None
+    return insert(table)
+
+
+def create_quiz_state_store(backend: str, ttl_seconds: int, max_entries: int = 10000):
+    """Instancie le backend configuré ('sql' ou 'memory')."""
+    backend = (backend or 'sql').strip().lower()
+    if backend == 'memory':
+        return MemoryQuizStateStore(ttl_seconds, max_entries=max_entries)
+    if backend == 'sql':
+        return SqlQuizStateStore(ttl_seconds)
+    raise ValueError(f"Backend d'état de quiz inconnu: {backend!r} (attendu: 'sql' ou 'memory')")
@@ -0,0 +1,26 @@
+"""
+Reconstruction de l'index plein texte des questions (table questions_fts)
+
+L'index est tenu à jour automatiquement à chaque écriture ORM. Ce script le
+recalcule entièrement, par exemple après une modification directe de la base
+(import SQL, mise à jour en masse hors ORM).
+
+Usage:
+    python rebuild_search_index.py
+"""
+
+from app import app
+from question_search import rebuild_search_index, search_index_available
+
+
+def rebuild():
+    with app.app_context():
+        if not search_index_available():
+            print("[INFO] Index plein texte indisponible (SQLite FTS5 requis), rien à faire")
+            return
+        indexed = rebuild_search_index()
+        print(f"[OK] Index plein texte reconstruit: {indexed} questions")
+
+
+if __name__ == '__main__':
+    rebuild()
@@ -0,0 +1,33 @@
+"""
+Reconstruction des agrégats de statistiques utilisateurs (table user_stats_rollups)
+
+Les agrégats affichés sur /me (totaux, par thème, par sous-thème, par difficulté)
+sont maintenus à chaque réponse. Ce script les recalcule depuis user_question_stats,
+par exemple après une migration, une correction manuelle des statistiques ou
+un changement de thème/difficulté de questions déjà répondues.
+
+Usage:
+    python rebuild_user_stats.py              # tous les utilisateurs
+    python rebuild_user_stats.py --user 42    # un seul utilisateur
+"""
+
+import argparse
+
+from app import app, answer_stats_pipeline
+from answer_stats import rebuild_user_stats_rollup
+
+
+def rebuild(user_id=None):
+    with app.app_context():
+        # Écrire d'abord les réponses encore en file d'attente
+        answer_stats_pipeline.flush()
+        created = rebuild_user_stats_rollup(user_id)
+        scope = f"utilisateur {user_id}" if user_id is not None else "tous les utilisateurs"
+        print(f"[OK] Agrégats reconstruits pour {scope}: {created} lignes")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Reconstruit la table user_stats_rollups")
+    parser.add_argument('--user', type=int, default=None, help="ID de l'utilisateur (par défaut: tous)")
+    args = parser.parse_args()
+    rebuild(args.user)
@@ -0,0 +1,82 @@
+"""
+Cache en mémoire des données de référence des formulaires (thèmes, sous-thèmes, pays).
+
+Les formulaires de question relisaient ces listes complètes à chaque affichage.
+Elles changent rarement : elles sont chargées une fois, figées en instantanés
+immuables (détachés de la session SQLAlchemy) et versionnées comme l'index des
+questions. Les routes CRUD des thèmes, sous-thèmes et pays appellent
+invalidate_reference_data() après commit.
+"""
+
+import threading
+import time
+from types import SimpleNamespace
+
+from models import BroadTheme, SpecificTheme, Country
+
+
+class ReferenceData:
+    """Instantané des listes de référence, dans l'ordre d'affichage des formulaires."""
+
+    def __init__(self, version: int, themes, specific_themes, countries):
+        self.version = version
+        self.built_at = time.monotonic()
+        self.themes = themes
+        self.specific_themes = specific_themes
+        self.countries = countries
+
+
+def _snapshot(obj, *attrs, **extra):
+    return SimpleNamespace(**{attr: getattr(obj, attr) for attr in attrs}, **extra)
+
+
+def _load_reference_data(version: int) -> ReferenceData:
+    themes = tuple(
+        _snapshot(theme, 'id', 'name', 'language', 'icon', 'color')
+        for theme in BroadTheme.query.order_by(BroadTheme.name).all()
+    )
+    by_id = {theme.id: theme for theme in themes}
+    specific_themes = tuple(
+        _snapshot(specific_theme, 'id', 'name', 'language', 'icon', 'color', 'broad_theme_id',
+                  broad_theme=by_id.get(specific_theme.broad_theme_id))
+        for specific_theme in (SpecificTheme.query.join(BroadTheme)
+                               .order_by(BroadTheme.name, SpecificTheme.name).all())
+    )
+    countries = tuple(
+        _snapshot(country, 'id', 'name', 'code', 'flag')
+        for country in Country.query.order_by(Country.name).all()
+    )
+    return ReferenceData(version, themes, specific_themes, countries)
+
+
+_lock = threading.Lock()
+_data: ReferenceData | None = None
+_version = 0
+
+
+def _is_fresh(data: ReferenceData | None, max_age: float | None) -> bool:
+    if data is None or data.version != _version:
+        return False
+    return not max_age or (time.monotonic() - data.built_at) < max_age
+
+
+def get_reference_data(max_age: float | None = None) -> ReferenceData:
+    """Retourne les listes de référence, rechargées après invalidation ou expiration (max_age, secondes)."""
+    global _data
+    data = _data
+    if _is_fresh(data, max_age):
+        return data
+    with _lock:
+        data = _data
+        if not _is_fresh(data, max_age):
+            data = _load_reference_data(_version)
+            _data = data
+    return data
+
+
+def invalidate_reference_data():
+    """Invalide le cache: la prochaine lecture rechargera les listes depuis la base."""
+    global _data, _version
+    with _lock:
+        _version += 1
+        _data = None
@@ -0,0 +1,107 @@
+"""
+Cache en mémoire des sets de règles actifs, par slug.
+
+Chaque requête de partie (/api/quiz/next, /api/quiz/answer, /api/quiz/cancel,
+signalements) relisait le set de règles et ses relations chargées en
+sous-requêtes (thèmes, pays, questions sélectionnées, images). Les sets changent
+rarement : ils sont figés en instantanés immuables (valeurs JSON/CSV déjà
+décodées, IDs des relations, images détachées de la session) et versionnés comme
+l'index des questions. Les routes de création, modification et suppression des
+sets appellent invalidate_rule_sets() après commit; un instantané est aussi
+périmé dès qu'un commit a écrit dans les tables des sets ou des images (versions
+de fragment_cache.py : nouvelle image, fichier optimisé en arrière-plan...).
+Un slug inconnu ou inactif est aussi mis en cache (None).
+"""
+
+import threading
+import time
+
+from models import QuizRuleSet, ImageAsset
+from fragment_cache import table_versions
+from quiz_scoring import compile_scoring
+
+_IMAGE_RELATIONS = ('intro_image', 'success_image', 'failure_image')
+
+# Tables dont une écriture commitée périme les instantanés
+_TABLES = ('quiz_rule_sets', 'images')
+
+
+def _detached_image(image):
+    """Copie transitoire d'une image (url, srcset... restent disponibles pour les templates)"""
+    if image is None:
+        return None
+    return ImageAsset(**{column.key: getattr(image, column.key) for column in ImageAsset.__table__.columns})
+
+
+class RuleSetSnapshot:
+    """Instantané d'un set de règles: mêmes attributs et accesseurs que QuizRuleSet pour les parties."""
+
+    def __init__(self, version: int, rule_set: QuizRuleSet):
+        self.version = version
+        self.built_at = time.monotonic()
+        for column in QuizRuleSet.__table__.columns:
+            setattr(self, column.key, getattr(rule_set, column.key))
+        for relation in _IMAGE_RELATIONS:
+            setattr(self, relation, _detached_image(getattr(rule_set, relation)))
+        self.allowed_broad_theme_ids = rule_set.allowed_broad_theme_ids
+        self.allowed_specific_theme_ids = rule_set.allowed_specific_theme_ids
+        self.allowed_country_ids = rule_set.allowed_country_ids
+        self.selected_question_ids = rule_set.selected_question_ids
+        self._allowed_difficulties = tuple(rule_set.get_allowed_difficulties())
+        self._questions_per_difficulty = dict(rule_set.get_questions_per_difficulty())
+        self._difficulty_bonus_map = dict(rule_set.get_difficulty_bonus_map())
+        # score(difficulty_level, is_correct, streak), voir quiz_scoring.py
+        self.score = compile_scoring(self)
+
+    # Copies: l'instantané est partagé entre les requêtes
+    def get_allowed_difficulties(self):
+        return list(self._allowed_difficulties)
+
+    def get_questions_per_difficulty(self):
+        return dict(self._questions_per_difficulty)
+
+    def get_difficulty_bonus_map(self):
+        return dict(self._difficulty_bonus_map)
+
+    def __repr__(self):
+        return f"<RuleSetSnapshot {self.id}: {self.name} v{self.version}>"
+
+
+_lock = threading.Lock()
+_entries: dict[str, tuple[tuple, float, RuleSetSnapshot | None]] = {}
+_version = 0
+
+
+def _current_version() -> tuple:
+    return (_version, table_versions(_TABLES))
+
+
+def _is_fresh(entry, max_age: float | None) -> bool:
+    if entry is None or entry[0] != _current_version():
+        return False
+    return not max_age or (time.monotonic() - entry[1]) < max_age
+
+
+def get_rule_set(slug: str, max_age: float | None = None) -> RuleSetSnapshot | None:
+    """Instantané du set de règles actif `slug` (None s'il n'existe pas ou est inactif)."""
+    if not slug:
+        return None
+    entry = _entries.get(slug)
+    if _is_fresh(entry, max_age):
+        return entry[2]
+    with _lock:
+        entry = _entries.get(slug)
+        if not _is_fresh(entry, max_age):
+            version = _current_version()
+            rule_set = QuizRuleSet.query.filter_by(slug=slug, is_active=True).first()
+            entry = (version, time.monotonic(), RuleSetSnapshot(version, rule_set) if rule_set else None)
+            _entries[slug] = entry
+    return entry[2]
+
+
+def invalidate_rule_sets():
+    """Invalide le cache: les prochaines lectures rechargeront les sets depuis la base."""
+    global _version
+    with _lock:
+        _version += 1
+        _entries.clear()
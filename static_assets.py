@@ -0,0 +1,99 @@
+"""
+Service des fichiers statiques, images envoyées et sons avec cache HTTP.
+
+Les URLs générées par l'application portent une empreinte du contenu :
+- images envoyées : le nom de fichier lui-même (<sha256>.<ext>, voir image_storage.py),
+  ou /uploads/v<version>/<id>/<nom> pour les autres fichiers (version = updated_at) ;
+- sons : /sounds/v<empreinte>/<nom> ;
+- fichiers de static/ : ?v=<empreinte>.
+Ces URLs changent avec le contenu : elles sont servies avec
+Cache-Control: public, max-age=1 an, immutable, seulement si l'empreinte (ou la
+version) demandée est celle du fichier courant ; une empreinte périmée redirige
+vers l'URL courante (voir app.py). Les URLs sans empreinte restent
+revalidées (ETag / Last-Modified, réponses 304). Les requêtes conditionnelles
+et partielles (Range, pour l'audio) sont gérées par send_from_directory.
+
+Pour les fichiers listés dans PRECOMPRESSED_STATIC (static/style.css), une
+version précompressée (.br, puis .gz) est servie si le client l'accepte et
+qu'elle est à jour (voir precompress_static.py).
+"""
+
+import hashlib
+import mimetypes
+import os
+import re
+import threading
+
+from flask import request, send_from_directory
+from werkzeug.security import safe_join
+
+# Durée de cache des URLs à empreinte (1 an)
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+# Nom de fichier adressé par contenu: <sha256>.<ext>
+_CONTENT_ADDRESSED = re.compile(r'^[0-9a-f]{64}\.[a-z0-9]+$')
+
+# Encodages précompressés, par ordre de préférence
+_PRECOMPRESSED = (('br', '.br'), ('gzip', '.gz'))
+
+_fingerprints: dict[str, tuple[tuple, str]] = {}
+_lock = threading.Lock()
+
+
+def is_content_addressed(filename: str) -> bool:
+    return bool(_CONTENT_ADDRESSED.match(filename or ''))
+
+
+def file_fingerprint(folder: str, filename: str) -> str:
+    """Empreinte courte du contenu d'un fichier (recalculée si sa date ou sa taille change)"""
+    path = safe_join(folder, filename)
+    try:
+        stat = os.stat(path)
+    except (OSError, TypeError):
+        return '0'
+    key = (stat.st_mtime_ns, stat.st_size)
+    cached = _fingerprints.get(path)
+    if cached and cached[0] == key:
+        return cached[1]
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    fingerprint = digest.hexdigest()[:12]
+    with _lock:
+        _fingerprints[path] = (key, fingerprint)
+    return fingerprint
+
+
+def _precompressed_variant(folder: str, filename: str):
+    """(encodage, nom) de la meilleure version précompressée acceptée et à jour, sinon None"""
+    path = safe_join(folder, filename)
+    if path is None or not os.path.isfile(path):
+        return None
+    mtime = os.path.getmtime(path)
+    for encoding, suffix in _PRECOMPRESSED:
+        if not request.accept_encodings[encoding]:
+            continue
+        candidate = path + suffix
+        if os.path.isfile(candidate) and os.path.getmtime(candidate) >= mtime:
+            return encoding, filename + suffix
+    return None
+
+
+def send_asset(folder: str, filename: str, immutable: bool = False, precompressed: bool = False):
+    """send_from_directory avec cache longue durée (immutable) et versions précompressées"""
+    max_age = IMMUTABLE_MAX_AGE if immutable else None
+    variant = _precompressed_variant(folder, filename) if precompressed else None
+    if variant:
+        encoding, served = variant
+        mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        response = send_from_directory(folder, served, mimetype=mimetype, max_age=max_age)
+        response.headers['Content-Encoding'] = encoding
+    else:
+        response = send_from_directory(folder, filename, max_age=max_age)
+    if precompressed:
+        response.vary.add('Accept-Encoding')
+    if immutable:
+        response.cache_control.public = True
+        response.cache_control.immutable = True
+    return response
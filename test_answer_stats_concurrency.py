@@ -0,0 +1,165 @@
+"""
+Test de concurrence des compteurs de réponses
+
+Plusieurs threads répondent en même temps à la même question; les compteurs
+(questions, user_question_stats, question_answer_stats) doivent être exacts,
+en mode synchrone comme via la file d'écriture différée.
+Les réponses sont faites par un utilisateur jetable, supprimé avec ses agrégats
+(user_stats_rollups) à la fin: les totaux de /me des vrais comptes ne bougent pas.
+Une réponse écrite après l'abandon de sa session y est comptée; une session
+terminée garde ses compteurs définitifs.
+
+Usage:
+    python test_answer_stats_concurrency.py
+"""
+
+import threading
+
+from app import app, db
+from models import Question, User, UserQuestionStat, QuestionAnswerStat, UserStatsRollup, UserQuizSession
+from answer_stats import AnswerEvent, AnswerStatsPipeline, apply_answer_events
+
+THREADS = 8
+ANSWERS_PER_THREAD = 25
+
+
+def _create_question():
+    user = User(username="zzconcurrence", is_active=False)
+    db.session.add(user)
+    db.session.flush()
+    question = Question(
+        author_id=user.id,
+        question_text="Question de test (concurrence)",
+        possible_answers="A|||B|||C",
+        correct_answer="2",
+        difficulty_level=1,
+        is_published=False,
+    )
+    db.session.add(question)
+    db.session.commit()
+    return question.id, user.id
+
+
+def _cleanup(question_id, user_id):
+    UserQuestionStat.query.filter_by(question_id=question_id).delete()
+    QuestionAnswerStat.query.filter_by(question_id=question_id).delete()
+    UserStatsRollup.query.filter_by(user_id=user_id).delete()
+    UserQuizSession.query.filter_by(user_id=user_id).delete()
+    Question.query.filter_by(id=question_id).delete()
+    User.query.filter_by(id=user_id).delete()
+    db.session.commit()
+
+
+def _event(question_id, user_id, n):
+    # Réponses 1, 2, 3 en alternance; la 2 est la bonne
+    answer = str(n % 3 + 1)
+    return AnswerEvent(question_id=question_id, user_id=user_id, selected_answer=answer, is_correct=(answer == "2"))
+
+
+def _hammer(target):
+    errors = []
+
+    def worker(offset):
+        try:
+            for i in range(ANSWERS_PER_THREAD):
+                target(offset + i)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(t * ANSWERS_PER_THREAD,)) for t in range(THREADS)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return errors
+
+
+def _assert_exact_counts(question_id, user_id):
+    total = THREADS * ANSWERS_PER_THREAD
+    expected = {i: sum(1 for n in range(total) if n % 3 + 1 == i) for i in (1, 2, 3)}
+
+    db.session.expire_all()
+    question = db.session.get(Question, question_id)
+    assert question.times_answered == total, question.times_answered
+    assert question.success_count == expected[2], question.success_count
+
+    stats = UserQuestionStat.query.filter_by(user_id=user_id, question_id=question_id).all()
+    assert len(stats) == 1, f"{len(stats)} lignes pour (user, question)"
+    assert stats[0].times_answered == total
+    assert stats[0].success_count == expected[2]
+
+    counts = {qa.answer_index: qa.selected_count for qa in QuestionAnswerStat.query.filter_by(question_id=question_id)}
+    assert counts == expected, counts
+    print(f"✅ {total} réponses concurrentes comptées exactement: {counts}")
+
+
+def test_concurrent_sync_answers():
+    """Écritures synchrones depuis plusieurs threads (une transaction par réponse)"""
+    print("\n=== Test : réponses synchrones concurrentes ===")
+    with app.app_context():
+        question_id, user_id = _create_question()
+    try:
+        def answer(n):
+            with app.app_context():
+                apply_answer_events([_event(question_id, user_id, n)])
+
+        errors = _hammer(answer)
+        assert not errors, errors
+        with app.app_context():
+            _assert_exact_counts(question_id, user_id)
+    finally:
+        with app.app_context():
+            _cleanup(question_id, user_id)
+
+
+def test_concurrent_async_answers():
+    """File d'écriture différée alimentée par plusieurs threads puis vidée à l'arrêt"""
+    print("\n=== Test : réponses via la file d'écriture différée ===")
+    with app.app_context():
+        question_id, user_id = _create_question()
+    pipeline = AnswerStatsPipeline(app, async_mode=True, batch_size=50, flush_interval=0.05)
+    try:
+        errors = _hammer(lambda n: pipeline.submit(_event(question_id, user_id, n)))
+        assert not errors, errors
+        pipeline.shutdown()
+        assert pipeline.pending() == 0
+        with app.app_context():
+            _assert_exact_counts(question_id, user_id)
+    finally:
+        with app.app_context():
+            _cleanup(question_id, user_id)
+
+
+def test_late_answers_after_closing_session():
+    """Réponses écrites après la clôture: comptées si abandonnée, ignorées si terminée"""
+    print("\n=== Test : réponses en file après la clôture d'une session ===")
+    with app.app_context():
+        question_id, user_id = _create_question()
+        sessions = [UserQuizSession(user_id=user_id, status=status, total_questions=10)
+                    for status in ('abandoned', 'completed')]
+        db.session.add_all(sessions)
+        db.session.commit()
+        sessions[1].answered_count, sessions[1].correct_count, sessions[1].total_score = 10, 7, 70
+        db.session.commit()
+        session_ids = [s.id for s in sessions]
+    pipeline = AnswerStatsPipeline(app, async_mode=True, batch_size=50, flush_interval=0.05)
+    try:
+        for session_id in session_ids:
+            for n in range(3):
+                pipeline.submit(_event(question_id, user_id, n)._replace(quiz_session_id=session_id, score=10))
+        pipeline.shutdown()
+        with app.app_context():
+            abandoned, completed = (db.session.get(UserQuizSession, sid) for sid in session_ids)
+            assert (abandoned.answered_count, abandoned.correct_count, abandoned.total_score) == (3, 1, 10)
+            assert (completed.answered_count, completed.correct_count, completed.total_score) == (10, 7, 70)
+        print("✅ Session abandonnée complétée, session terminée inchangée")
+    finally:
+        pipeline.shutdown()
+        with app.app_context():
+            _cleanup(question_id, user_id)
+
+
+if __name__ == '__main__':
+    test_concurrent_sync_answers()
+    test_concurrent_async_answers()
+    test_late_answers_after_closing_session()
@@ -0,0 +1,97 @@
+"""
+Test de l'export complet en streaming (/api/export/download?page=all)
+
+- le contenu streamé est identique à l'export paginé (CSV, JSONL, JSON)
+- la compression gzip à la volée donne le même contenu une fois décompressée
+- le nombre de requêtes SQL ne dépend pas du nombre de questions exportées
+
+Usage:
+    python test_export_streaming.py
+"""
+
+import gzip
+import json
+
+from sqlalchemy import event
+
+from app import app, db
+from models import Question, User, Profile
+
+MARKER = "zzexportstream"
+COUNT = 120
+
+
+def _create_questions():
+    profile = Profile.query.filter_by(name='Administrateur').first()
+    admin = User.query.filter_by(profile_id=profile.id, is_active=True).first()
+    for n in range(COUNT):
+        db.session.add(Question(author_id=admin.id, question_text=f"{MARKER} question {n}",
+                                possible_answers="A|||B|||C", correct_answer="2", difficulty_level=n % 5 + 1))
+    db.session.commit()
+    return admin.id
+
+
+def _cleanup():
+    Question.query.filter(Question.question_text.startswith(MARKER)).delete(synchronize_session=False)
+    db.session.commit()
+
+
+def _download(client, query, headers=None):
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', count)
+    try:
+        resp = client.get(f"/api/export/download?author_filter=all&q={MARKER}&{query}", headers=headers or {})
+        body = resp.get_data()
+    finally:
+        event.remove(engine, 'before_cursor_execute', count)
+    assert resp.status_code == 200, resp.status_code
+    return resp, body, len(statements)
+
+
+def test_streaming_export():
+    print("\n=== Test : export complet en streaming ===")
+    with app.app_context():
+        admin_id = _create_questions()
+    try:
+        client = app.test_client()
+        with client.session_transaction() as sess:
+            sess['user_id'] = admin_id
+
+        for fmt in ('csv', 'jsonl'):
+            _, paged, _ = _download(client, f"format={fmt}&page=1&page_size=2000")
+            resp, streamed, queries = _download(client, f"format={fmt}&page=all")
+            assert 'Content-Length' not in resp.headers  # réponse générée au fil de l'eau
+            assert streamed.rstrip(b'\n') == paged.rstrip(b'\n'), fmt
+            print(f"✅ {fmt}: export streamé identique à l'export paginé ({queries} requêtes)")
+
+        _, paged, _ = _download(client, "format=json&page=1&page_size=2000")
+        _, streamed, _ = _download(client, "format=json&page=all")
+        paged, streamed = json.loads(paged), json.loads(streamed)
+        assert streamed['items'] == paged['items']
+        assert streamed['total'] == streamed['count'] == COUNT
+        print("✅ json: mêmes éléments, total et nombre cohérents")
+
+        resp, body, _ = _download(client, "format=csv&page=all&gzip=1", {'Accept-Encoding': 'gzip'})
+        assert resp.headers.get('Content-Encoding') == 'gzip'
+        _, plain, _ = _download(client, "format=csv&page=all")
+        assert gzip.decompress(body) == plain
+        print(f"✅ gzip à la volée: {len(plain)} -> {len(body)} octets")
+
+        # Aucune requête par ligne: même nombre de requêtes pour 1 ou 120 questions
+        _, _, few = _download(client, "format=csv&page=all&created_before=2000-01-01")
+        _, _, many = _download(client, "format=csv&page=all")
+        assert few == many, (few, many)
+        print(f"✅ Requêtes constantes: {few} (0 question) / {many} ({COUNT} questions)")
+    finally:
+        with app.app_context():
+            _cleanup()
+
+
+if __name__ == '__main__':
+    test_streaming_export()
@@ -0,0 +1,95 @@
+"""
+Test du cache des fragments HTML des listes HTMX
+
+- Un second affichage de la liste des pays ne fait aucune requête SQL.
+- La création d'un pays (route d'écriture) rafraîchit la liste.
+- Une question ajoutée invalide la liste des thèmes (nombre de questions).
+- Une suppression en masse invalide la liste; un rollback n'invalide rien.
+
+Usage:
+    python test_fragment_cache.py
+"""
+
+from sqlalchemy import event
+
+from app import app, db
+from fragment_cache import table_versions
+from models import Country, Profile, Question, User
+
+MARKER = "zzfragment"
+
+
+def _admin_client():
+    profile = Profile.query.filter_by(name='Administrateur').first()
+    admin = User.query.filter_by(profile_id=profile.id, is_active=True).first()
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess['user_id'] = admin.id
+    return client, admin.id
+
+
+def _get(client, url):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        resp = client.get(url)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+    assert resp.status_code == 200, resp.status_code
+    return resp.get_data(as_text=True), statements
+
+
+def _list_queries(statements, table):
+    return [s for s in statements if f'FROM {table}' in s]
+
+
+def test_list_fragments_cached_and_invalidated():
+    print("\n=== Test : cache des fragments de listes HTMX ===")
+    with app.app_context():
+        client, admin_id = _admin_client()
+        try:
+            first_html, _ = _get(client, '/api/countries')
+            html, statements = _get(client, '/api/countries')
+            assert html == first_html
+            assert not _list_queries(statements, 'countries'), statements
+            print("✅ 2e affichage de la liste des pays servi depuis le cache")
+
+            resp = client.post('/api/country', data={'name': f"{MARKER} pays", 'code': 'ZZ'})
+            assert resp.status_code == 200, resp.status_code
+            assert f"{MARKER} pays" in resp.get_data(as_text=True)
+            html, statements = _get(client, '/api/countries')
+            assert f"{MARKER} pays" in html and not _list_queries(statements, 'countries')
+            print("✅ La route d'écriture rafraîchit la liste (et la remet en cache)")
+
+            _get(client, '/api/themes')
+            db.session.add(Question(author_id=admin_id, question_text=f"{MARKER} question",
+                                    possible_answers="A|||B", correct_answer="1"))
+            db.session.commit()
+            _, statements = _get(client, '/api/themes')
+            assert _list_queries(statements, 'broad_themes'), "la liste des thèmes doit être recalculée"
+            print("✅ Une nouvelle question invalide la liste des thèmes")
+
+            versions = table_versions(('countries',))
+            db.session.add(Country(name=f"{MARKER} annulé"))
+            db.session.flush()
+            db.session.rollback()
+            assert table_versions(('countries',)) == versions
+            print("✅ Un rollback n'invalide pas le cache")
+
+            Country.query.filter(Country.name.startswith(MARKER)).delete(synchronize_session=False)
+            db.session.commit()
+            html, statements = _get(client, '/api/countries')
+            assert MARKER not in html and _list_queries(statements, 'countries')
+            print("✅ Une suppression en masse invalide la liste")
+        finally:
+            Question.query.filter(Question.question_text.startswith(MARKER)).delete(synchronize_session=False)
+            Country.query.filter(Country.name.startswith(MARKER)).delete(synchronize_session=False)
+            db.session.commit()
+
+
+if __name__ == '__main__':
+    test_list_fragments_cached_and_invalidated()
@@ -0,0 +1,177 @@
+"""
+Test des variantes responsives des images
+
+- variant_url() retourne la plus petite variante suffisante, srcset liste
+  variantes et image principale; sans variantes, l'image principale est servie.
+- L'envoi enregistre le fichier brut; avec Pillow, l'optimisation (pool de
+  processus) produit les variantes plus petites que l'image (jamais agrandies)
+  et un placeholder flouté, puis passe le statut de 'pending' à 'ready'.
+- Deux envois différents optimisés en la même image partagent le fichier
+  <empreinte>.webp (pas de copie suffixée); il est supprimé avec la dernière image.
+
+Usage:
+    python test_image_variants.py
+"""
+
+import hashlib
+import io
+import os
+
+from app import app, db, image_pipeline
+from image_pipeline import apply_optimization
+from image_variants import Image, OptimizedImage, optimize_image, variant_filename
+from models import ImageAsset, Profile, User
+
+MARKER = "zzvariants"
+
+
+def test_variant_helpers():
+    print("\n=== Test : helpers srcset / variant_url ===")
+    image = ImageAsset(title="t", filename="photo.webp", width=1200, height=800)
+    assert image.srcset == '' and image.variant_url(480) == '/uploads/v0/photo.webp'
+    image.set_variants([
+        {'width': 480, 'height': 320, 'filename': 'photo_480w.webp', 'size_bytes': 10},
+        {'width': 160, 'height': 107, 'filename': 'photo_160w.webp', 'size_bytes': 5},
+    ])
+    assert image.variant_url(100) == '/uploads/v0/photo_160w.webp'
+    assert image.variant_url(300) == '/uploads/v0/photo_480w.webp'
+    assert image.variant_url(960) == '/uploads/v0/photo.webp'
+    assert image.srcset == ('/uploads/v0/photo_160w.webp 160w, /uploads/v0/photo_480w.webp 480w, '
+                            '/uploads/v0/photo.webp 1200w'), image.srcset
+    assert variant_filename('photo.webp', 160) == 'photo_160w.webp'
+    print("✅ srcset et variant_url corrects, repli sur l'image principale")
+
+
+def _upload(client, data: bytes, name: str):
+    resp = client.post('/api/image', data={'title': f"{MARKER} image", 'file': (io.BytesIO(data), name)},
+                       content_type='multipart/form-data')
+    assert resp.status_code == 200, resp.status_code
+    return ImageAsset.query.filter(ImageAsset.title == f"{MARKER} image").order_by(ImageAsset.id.desc()).first()
+
+
+def test_upload_generates_variants():
+    print("\n=== Test : variantes générées à l'envoi ===")
+    folder = app.config['UPLOAD_FOLDER']
+    with app.app_context():
+        profile = Profile.query.filter_by(name='Administrateur').first()
+        admin = User.query.filter_by(profile_id=profile.id, is_active=True).first()
+        client = app.test_client()
+        with client.session_transaction() as sess:
+            sess['user_id'] = admin.id
+        if Image is None:
+            assert optimize_image(io.BytesIO(b'not an image')) is None
+            image = _upload(client, b'raw bytes', f"{MARKER}.png")
+            try:
+                assert image.status == 'ready'
+                assert image.filename == hashlib.sha256(b'raw bytes').hexdigest() + '.png', image.filename
+                assert os.path.exists(os.path.join(folder, image.filename))
+                assert image_pipeline.pending() == 0
+                print("✅ Pillow absent: fichier brut enregistré et servi tel quel")
+            finally:
+                client.delete(f'/api/image/{image.id}')
+            return
+
+        buffer = io.BytesIO()
+        Image.new('RGB', (1000, 500), (200, 120, 40)).save(buffer, format='PNG')
+        image = _upload(client, buffer.getvalue(), f"{MARKER}.png")
+        variants = []
+        try:
+            assert image.status in ('pending', 'ready'), image.status
+            assert image_pipeline.wait(60)
+            db.session.expire_all()
+            image = db.session.get(ImageAsset, image.id)
+            assert image.status == 'ready' and image.filename == f"{image.content_hash}.webp", (image.status, image.filename)
+            assert image.source_hash == hashlib.sha256(buffer.getvalue()).hexdigest()
+            assert not os.path.exists(os.path.join(folder, f"{image.source_hash}.png"))
+            variants = image.get_variants()
+            assert [v['width'] for v in variants] == [160, 480, 960], variants
+            assert (image.width, image.height) == (1000, 500)
+            assert image.placeholder.startswith('data:image/webp;base64,')
+            for variant in variants:
+                assert os.path.exists(os.path.join(folder, variant['filename']))
+            print(f"✅ {len(variants)} variantes + placeholder ({len(image.placeholder)} octets)")
+        finally:
+            client.delete(f'/api/image/{image.id}')
+            for variant in variants:
+                assert not os.path.exists(os.path.join(folder, variant['filename']))
+
+
+def test_duplicate_upload_reuses_image():
+    print("\n=== Test : déduplication des envois par empreinte ===")
+    data = b'zzdedupe ' + os.urandom(16)
+    with app.app_context():
+        profile = Profile.query.filter_by(name='Administrateur').first()
+        admin = User.query.filter_by(profile_id=profile.id, is_active=True).first()
+        client = app.test_client()
+        with client.session_transaction() as sess:
+            sess['user_id'] = admin.id
+        image = _upload(client, data, "original.png")
+        try:
+            path = os.path.join(app.config['UPLOAD_FOLDER'], image.filename)
+            mtime = os.path.getmtime(path)
+            resp = client.post('/api/image', data={'title': "copie", 'embedded': '1',
+                                                   'file': (io.BytesIO(data), "copie_1761377973.png")},
+                               content_type='multipart/form-data')
+            payload = resp.get_json()
+            assert payload['duplicate'] is True and payload['created_image']['id'] == image.id, payload
+            assert ImageAsset.query.filter(ImageAsset.content_hash == image.content_hash).count() == 1
+            assert os.path.getmtime(path) == mtime
+            print("✅ Renvoi du même fichier: image existante réutilisée, rien d'écrit")
+
+            other = _upload(client, data + b'!', "autre.png")
+            resp = client.post(f'/api/image/{other.id}', data={'title': "autre", 'file': (io.BytesIO(data), "x.png")},
+                               content_type='multipart/form-data')
+            assert resp.status_code == 409, resp.status_code
+            client.delete(f'/api/image/{other.id}')
+            print("✅ Remplacement par le contenu d'une autre image refusé (409)")
+        finally:
+            client.delete(f'/api/image/{image.id}')
+
+
+def test_same_optimized_image_shares_file():
+    print("\n=== Test : même image optimisée pour deux envois ===")
+    folder = app.config['UPLOAD_FOLDER']
+    webp = b'zzshared webp ' + os.urandom(16)
+    shared = hashlib.sha256(webp).hexdigest() + '.webp'
+    with app.app_context():
+        profile = Profile.query.filter_by(name='Administrateur').first()
+        admin = User.query.filter_by(profile_id=profile.id, is_active=True).first()
+        images = []
+        for raw in (b'zzshared a ' + os.urandom(8), b'zzshared b ' + os.urandom(8)):
+            filename = hashlib.sha256(raw).hexdigest() + '.png'
+            with open(os.path.join(folder, filename), 'wb') as f:
+                f.write(raw)
+            images.append(ImageAsset(title=f"{MARKER} partagée", filename=filename, status='pending'))
+        db.session.add_all(images)
+        db.session.commit()
+        client = app.test_client()
+        with client.session_transaction() as sess:
+            sess['user_id'] = admin.id
+        try:
+            raw_files = [image.filename for image in images]
+            for image in images:
+                apply_optimization(image, folder, OptimizedImage(webp, 20, 10, [(8, 4, b'variant')], None))
+                db.session.commit()
+            assert [image.filename for image in images] == [shared, shared]
+            assert not any(os.path.exists(os.path.join(folder, name)) for name in raw_files)
+            assert not os.path.exists(os.path.join(folder, shared.replace('.webp', '_1.webp')))
+            variant = os.path.join(folder, variant_filename(shared, 8))
+            assert os.path.exists(variant)
+            print("✅ Fichier et variantes partagés, sans copie suffixée")
+
+            assert client.delete(f'/api/image/{images[0].id}').status_code == 200
+            assert os.path.exists(os.path.join(folder, shared)) and os.path.exists(variant)
+            assert client.delete(f'/api/image/{images[1].id}').status_code == 200
+            assert not os.path.exists(os.path.join(folder, shared)) and not os.path.exists(variant)
+            print("✅ Fichier supprimé avec la dernière image qui le référence")
+        finally:
+            db.session.rollback()
+            ImageAsset.query.filter(ImageAsset.title == f"{MARKER} partagée").delete()
+            db.session.commit()
+
+
+if __name__ == '__main__':
+    test_variant_helpers()
+    test_upload_generates_variants()
+    test_duplicate_upload_reuses_image()
+    test_same_optimized_image_shares_file()
@@ -0,0 +1,86 @@
+"""
+Test du moteur de sélection par masques de mots-clés (keyword_selection.py)
+
+- Pas de doublon de mot-clé quand prevent_duplicate_keywords (glouton incrémental).
+- Ordre des priorités: question non vue > aucun mot-clé répondu > sans mot-clé.
+- Repli sur les candidats en conflit quand le quota n'est pas atteint (signalé).
+- Quota supérieur au nombre de candidats: playlist plus courte, sans erreur.
+
+Usage:
+    python test_keyword_selection.py
+"""
+
+from keyword_selection import mask_for_keywords, select_by_keyword_masks
+
+# Bits: 0 = "pont", 1 = "église", 2 = "château"
+PONT, EGLISE, CHATEAU = 1, 2, 4
+
+
+def _select(candidates, masks, quota, seen=(), answered=0, used=0, prevent=True):
+    return select_by_keyword_masks(candidate_ids=candidates, keyword_masks=masks, seen_question_ids=set(seen),
+                                   used_mask=used, answered_mask=answered,
+                                   prevent_duplicate_keywords=prevent, quota=quota)
+
+
+def test_mask_for_keywords():
+    print("\n=== Test : masques de mots-clés ===")
+    assert mask_for_keywords([10, 30, 99], {10: 0, 20: 1, 30: 2}) == PONT | CHATEAU
+    assert mask_for_keywords([], {10: 0}) == 0
+    print("✅ IDs convertis en bits, IDs inconnus ignorés")
+
+
+def test_duplicate_keyword_prevention():
+    print("\n=== Test : prévention des doublons de mots-clés ===")
+    masks = {1: PONT, 2: PONT | EGLISE, 3: EGLISE, 4: CHATEAU}
+    selected, used, stats = _select([1, 2, 3, 4], masks, quota=3)
+    assert selected == [1, 3, 4] and used == PONT | EGLISE | CHATEAU, selected
+    assert stats['perfect']
+    # Mots-clés déjà pris par une autre difficulté (used_mask partagé)
+    selected, _, _ = _select([1, 3, 4], masks, quota=2, used=PONT)
+    assert selected == [3, 4]
+    # Sans prévention: ordre des candidats conservé, doublons acceptés
+    selected, _, stats = _select([1, 2, 3, 4], masks, quota=3, prevent=False)
+    assert selected == [1, 2, 3] and stats['perfect']
+    print("✅ Aucun mot-clé en double, état partagé entre appels")
+
+
+def test_priority_buckets():
+    print("\n=== Test : priorités ===")
+    masks = {1: EGLISE, 2: PONT, 3: 0, 4: CHATEAU, 5: 0}
+    # 5 vue; 1 a un mot-clé déjà répondu; 3 sans mot-clé passe avant 2 et 4 (avec mots-clés)
+    selected, _, stats = _select([5, 1, 2, 3, 4], masks, quota=5, seen={5}, answered=EGLISE)
+    assert selected == [3, 2, 4, 1, 5], selected
+    assert not stats['perfect']
+    assert sorted(stats['fallback_used']) == ['keyword_already_answered', 'question_already_seen']
+    # Quota atteint avec les meilleurs paquets: conditions parfaites
+    selected, _, stats = _select([5, 1, 2, 3, 4], masks, quota=3, seen={5}, answered=EGLISE)
+    assert selected == [3, 2, 4] and stats['perfect']
+    print("✅ Non vue > aucun mot-clé répondu > sans mot-clé, ordre conservé à égalité")
+
+
+def test_deferred_fallback():
+    print("\n=== Test : repli sur les doublons ===")
+    masks = {1: PONT, 2: PONT, 3: PONT | EGLISE, 4: EGLISE}
+    selected, used, stats = _select([1, 2, 3, 4], masks, quota=3)
+    assert selected == [1, 4, 2], selected
+    assert used == PONT | EGLISE
+    assert stats['fallback_used'] == ['keyword_duplicate']
+    assert stats['conditions_met'] == ['⚠️ 1x keyword duplicate']
+    print("✅ Candidats en conflit utilisés en dernier, dans l'ordre des priorités")
+
+
+def test_quota_larger_than_pool():
+    print("\n=== Test : quota supérieur au nombre de candidats ===")
+    selected, used, stats = _select([7, 8], {7: PONT}, quota=5)
+    assert selected == [8, 7] and used == PONT and stats['total_candidates'] == 2
+    assert _select([], {}, quota=3) == ([], 0, {'perfect': True, 'conditions_met': []})
+    assert _select([7], {7: PONT}, quota=0, used=EGLISE)[:2] == ([], EGLISE)
+    print("✅ Playlist plus courte que le quota, sans erreur")
+
+
+if __name__ == '__main__':
+    test_mask_for_keywords()
+    test_duplicate_keyword_prevention()
+    test_priority_buckets()
+    test_deferred_fallback()
+    test_quota_larger_than_pool()
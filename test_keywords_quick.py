@@ -121,6 +121,34 @@ def test_database_tables():
         except Exception as e:
             print(f"❌ Erreur : {e}")
 
+def test_keyword_normalized_duplicates():
+    """Test 5 : Détection des doublons par nom normalisé"""
+    print("\n=== Test 5 : Doublons de mots-clés (nom normalisé) ===")
+    client = app.test_client()
+    resp = client.post('/api/keyword', data={'name': 'Zz-Géo Cache', 'language': 'fr'})
+    assert resp.status_code == 201, resp.status_code
+    keyword_id = resp.get_json()['keyword']['id']
+    try:
+        with app.app_context():
+            assert db.session.get(Keyword, keyword_id).normalized_name == 'zzgeocache'
+        print("✅ Nom normalisé renseigné à la création : zzgeocache")
+
+        resp = client.post('/api/keyword', data={'name': 'zz_geocache', 'language': 'fr'})
+        assert resp.status_code == 409, resp.status_code
+        assert resp.get_json()['existing_keyword']['id'] == keyword_id
+        print("✅ Doublon refusé (409) avec le mot-clé existant")
+
+        with app.app_context():
+            keyword = db.session.get(Keyword, keyword_id)
+            keyword.name = 'Zz Géocaché Renommé'
+            db.session.commit()
+            assert keyword.normalized_name == 'zzgeocacherenomme'
+        print("✅ Nom normalisé recalculé au renommage")
+    finally:
+        with app.app_context():
+            Keyword.query.filter_by(id=keyword_id).delete()
+            db.session.commit()
+
 def test_all():
     """Exécuter tous les tests"""
     print("=" * 70)
@@ -132,6 +160,7 @@ def test_all():
         test_keyword_creation()
         test_keyword_model()
         test_question_keyword_relation()
+        test_keyword_normalized_duplicates()
         
         print("\n" + "=" * 70)
         print("✅ Tous les tests sont terminés !")
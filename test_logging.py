@@ -0,0 +1,84 @@
+"""
+Test de la journalisation (app_logging.py)
+
+- Le logger 'geoquiz' n'écrit que dans une file; le thread d'écriture met en forme
+  les enregistrements, champs structurés compris (clé=valeur).
+- Niveau global et surcharges par sous-système (LOG_LEVELS).
+- La génération d'une playlist produit un seul enregistrement structuré.
+
+Usage:
+    python test_logging.py
+"""
+
+import io
+import logging
+from logging.handlers import QueueHandler
+
+from app import app, _generate_quiz_playlist
+from app_logging import get_logger, parse_levels, setup_logging
+from models import QuizRuleSet
+
+
+class _Collect(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+def test_queue_levels_and_fields():
+    print("\n=== Test : file, niveaux par sous-système, champs structurés ===")
+    assert parse_levels("quiz=debug, quiz.shuffle=WARNING,bad=LOUD,=INFO") == {'quiz': 10, 'quiz.shuffle': 30}
+    stream = io.StringIO()
+    try:
+        listener = setup_logging('WARNING', 'quiz=DEBUG,quiz.shuffle=ERROR', stream=stream)
+        assert [type(h) for h in get_logger().handlers] == [QueueHandler]
+        get_logger('quiz').debug("trace %s", 1)
+        get_logger('quiz.playlist').info("playlist générée", extra={'fields': {'size': 3, 'perfect': True}})
+        get_logger('quiz.shuffle').warning("filtré")
+        get_logger('images').info("filtré")
+        get_logger('images').warning("image %s", 7)
+        listener.stop()
+        lines = stream.getvalue().splitlines()
+        assert len(lines) == 3, lines
+        assert lines[0].endswith("DEBUG [geoquiz.quiz] trace 1")
+        assert lines[1].endswith('[geoquiz.quiz.playlist] playlist générée size=3 perfect=true')
+        assert lines[2].endswith("WARNING [geoquiz.images] image 7")
+        print("✅ Niveaux respectés, champs en clé=valeur, écriture par le thread de la file")
+
+        # Une nouvelle configuration remet les surcharges à zéro
+        stream = io.StringIO()
+        listener = setup_logging('INFO', stream=stream)
+        get_logger('quiz').debug("filtré")
+        listener.stop()
+        assert stream.getvalue() == ''
+    finally:
+        setup_logging(app.config['LOG_LEVEL'], app.config['LOG_LEVELS'])
+
+
+def test_playlist_single_record():
+    print("\n=== Test : bilan de playlist en un enregistrement ===")
+    collect = _Collect()
+    logger = get_logger('quiz.playlist')
+    logger.addHandler(collect)
+    try:
+        with app.app_context():
+            rule = QuizRuleSet(name="zzlogging", slug="zzlogging", question_selection_mode='auto')
+            rule.set_allowed_difficulties([1, 2])
+            rule.set_questions_per_difficulty({'1': 2, '2': 1})
+            playlist = _generate_quiz_playlist(rule, None)
+    finally:
+        logger.removeHandler(collect)
+    assert len(collect.records) == 1, collect.records
+    fields = collect.records[0].fields
+    assert fields['mode'] == 'auto' and fields['expected'] == 3 and fields['size'] == len(playlist)
+    assert [stat['difficulty'] for stat in fields['per_difficulty']] == [1, 2]
+    assert collect.records[0].levelno == (logging.INFO if len(playlist) == 3 else logging.WARNING)
+    print("✅ Un seul enregistrement avec quotas, sélection et conditions par difficulté")
+
+
+if __name__ == '__main__':
+    test_queue_levels_and_fields()
+    test_playlist_single_record()
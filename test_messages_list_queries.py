@@ -0,0 +1,126 @@
+"""
+Test de non-régression: nombre de requêtes SQL de la liste des conversations
+
+La liste (/api/messages/list) doit faire un nombre de requêtes constant quel que
+soit le nombre de conversations (pas de N+1), et la pagination par curseur doit
+parcourir toutes les conversations une seule fois, de la plus récente à la plus ancienne.
+
+Usage:
+    python test_messages_list_queries.py
+"""
+
+import re
+from datetime import datetime, timedelta
+
+from sqlalchemy import event
+from werkzeug.security import generate_password_hash
+
+from app import app, db
+from models import User, Conversation, ConversationParticipant, ConversationMessage
+
+MESSAGES_PER_CONVERSATION = 3
+
+
+def _create_user(name, conversations):
+    """Crée un utilisateur (avec mot de passe) et `conversations` conversations de test."""
+    user = User(username=name, is_active=True, password_hash=generate_password_hash('test-password'))
+    db.session.add(user)
+    db.session.flush()
+
+    base = datetime.utcnow() - timedelta(days=1)
+    for n in range(conversations):
+        ts = base + timedelta(minutes=n)
+        conv = Conversation(subject=f"Conversation {n}", created_at=ts, updated_at=ts)
+        db.session.add(conv)
+        db.session.flush()
+        db.session.add(ConversationParticipant(conversation_id=conv.id, user_id=user.id,
+                                               unread_count=n % 2))
+        for m in range(MESSAGES_PER_CONVERSATION):
+            db.session.add(ConversationMessage(conversation_id=conv.id, sender_id=None,
+                                               content=f"Message {m}",
+                                               created_at=ts - timedelta(seconds=MESSAGES_PER_CONVERSATION - m)))
+    db.session.commit()
+    return user.id
+
+
+def _cleanup(user_id):
+    conv_ids = [cid for (cid,) in db.session.query(ConversationParticipant.conversation_id)
+                .filter_by(user_id=user_id)]
+    ConversationMessage.query.filter(ConversationMessage.conversation_id.in_(conv_ids)).delete(synchronize_session=False)
+    ConversationParticipant.query.filter(ConversationParticipant.conversation_id.in_(conv_ids)).delete(synchronize_session=False)
+    Conversation.query.filter(Conversation.id.in_(conv_ids)).delete(synchronize_session=False)
+    User.query.filter_by(id=user_id).delete()
+    db.session.commit()
+
+
+def _get_counting_queries(client, url):
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', count)
+    try:
+        resp = client.get(url)
+    finally:
+        event.remove(engine, 'before_cursor_execute', count)
+    assert resp.status_code == 200, resp.status_code
+    return resp.get_data(as_text=True), len(statements)
+
+
+def _client_for(user_id):
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess['user_id'] = user_id
+    return client
+
+
+def test_constant_query_count():
+    """Le nombre de requêtes ne dépend pas du nombre de conversations"""
+    print("\n=== Test : requêtes de la liste des conversations ===")
+    counts = {}
+    for size in (5, 50):
+        with app.app_context():
+            user_id = _create_user(f"test_msglist_{size}", size)
+        try:
+            html, queries = _get_counting_queries(_client_for(user_id), '/api/messages/list')
+            assert 'conv-item' in html
+            counts[size] = queries
+        finally:
+            with app.app_context():
+                _cleanup(user_id)
+    assert counts[5] == counts[50], counts
+    assert counts[50] <= 3, counts
+    print(f"✅ Requêtes constantes: {counts}")
+
+
+def test_cursor_pagination():
+    """Le curseur parcourt toutes les conversations sans doublon, de la plus récente à la plus ancienne"""
+    print("\n=== Test : pagination par curseur ===")
+    total = 75
+    with app.app_context():
+        user_id = _create_user("test_msglist_pages", total)
+    try:
+        client = _client_for(user_id)
+        url = '/api/messages/list'
+        seen, pages = [], 0
+        while url:
+            html, _ = _get_counting_queries(client, url)
+            seen.extend(int(cid) for cid in re.findall(r'/api/messages/thread/(\d+)', html))
+            more = re.search(r'hx-get="(/api/messages/list\?cursor=[^"]+)"', html)
+            url = more.group(1).replace('&amp;', '&') if more else None
+            pages += 1
+        assert len(seen) == total, len(seen)
+        assert len(set(seen)) == total
+        assert seen == sorted(seen, reverse=True)
+        print(f"✅ {total} conversations parcourues en {pages} pages")
+    finally:
+        with app.app_context():
+            _cleanup(user_id)
+
+
+if __name__ == '__main__':
+    test_constant_query_count()
+    test_cursor_pagination()
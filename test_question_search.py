@@ -0,0 +1,86 @@
+"""
+Test de la recherche plein texte des questions (FTS5)
+
+- recherche insensible aux accents et à la casse
+- classement bm25 (le texte de la question compte plus que l'indice)
+- index tenu à jour à la modification, à la suppression et au renommage d'un thème
+- repli LIKE quand l'index n'est pas disponible
+
+Usage:
+    python test_question_search.py
+"""
+
+import question_search
+from app import app, db, _questions_base_query, _filter_questions_search, _apply_sorting
+from models import Question, User, BroadTheme
+
+
+def _search(q, sort_by='relevance'):
+    query, rank_column = _filter_questions_search(_questions_base_query(), q)
+    return [question.id for question in _apply_sorting(query, sort_by, 'desc', rank_column).all()]
+
+
+def _create(**fields):
+    admin = User.query.first()
+    question = Question(author_id=admin.id, possible_answers="A|||B", correct_answer="1", **fields)
+    db.session.add(question)
+    db.session.commit()
+    return question.id
+
+
+def test_full_text_search():
+    print("\n=== Test : recherche plein texte ===")
+    with app.app_context():
+        if not question_search.search_index_available():
+            print("⚠️  FTS5 indisponible sur cette base, test ignoré")
+            return
+        theme = BroadTheme(name="Thèmeéphémère")
+        db.session.add(theme)
+        db.session.commit()
+        in_text = _create(question_text="Qu'est-ce qu'une Géocache zzéphémère ?", broad_theme_id=theme.id)
+        in_hint = _create(question_text="Question sans rapport", hint="pensez à zzephemere")
+        try:
+            # Accents et casse ignorés, le texte de la question passe avant l'indice
+            results = _search("ZZEPHÉMÈRE")
+            assert results == [in_text], results
+            hits_query = question_search.search_hits("zzephemere")
+            hits = db.session.query(hits_query.c.question_id).order_by(hits_query.c.rank).all()
+            assert [h[0] for h in hits] == [in_text, in_hint], hits
+            print("✅ Recherche insensible aux accents, classée par bm25")
+
+            # Modification: l'ancien texte n'est plus trouvé, le nouveau l'est
+            db.session.get(Question, in_text).question_text = "Texte zzrenouvele"
+            db.session.commit()
+            assert _search("zzephemere") == []
+            assert _search("zzrenouvelé") == [in_text]
+
+            # Renommage du thème: les questions du thème sont réindexées
+            db.session.get(BroadTheme, theme.id).name = "Zzthemerenomme"
+            db.session.commit()
+            assert _search("zzthemerenomme") == [in_text]
+
+            # Suppression (même en masse): la question disparaît de l'index
+            Question.query.filter_by(id=in_hint).delete()
+            db.session.commit()
+            count = db.session.execute(db.text(
+                f"SELECT COUNT(*) FROM {question_search.FTS_TABLE} WHERE rowid = :id"), {'id': in_hint}).scalar()
+            assert count == 0
+            print("✅ Index synchronisé (modification, renommage de thème, suppression)")
+
+            # Repli LIKE: sous-chaîne exacte, pas de colonne de pertinence
+            question_search._available = False
+            try:
+                query, rank_column = _filter_questions_search(_questions_base_query(), "zzrenouvele")
+                assert rank_column is None
+                assert [q.id for q in query.all()] == [in_text]
+            finally:
+                question_search._available = True
+            print("✅ Repli LIKE sans index plein texte")
+        finally:
+            Question.query.filter(Question.id.in_([in_text, in_hint])).delete(synchronize_session=False)
+            BroadTheme.query.filter_by(id=theme.id).delete()
+            db.session.commit()
+
+
+if __name__ == '__main__':
+    test_full_text_search()
@@ -0,0 +1,88 @@
+"""
+Test de la pagination par curseur de la liste des questions
+
+Pour chaque clé de tri (dans les deux sens), le parcours page par page via
+"Charger plus" doit retourner toutes les questions, sans doublon, dans le
+même ordre que la requête triée complète.
+
+Usage:
+    python test_questions_pagination.py
+"""
+
+import re
+
+from app import app, db, _questions_base_query, _filter_questions_search, _apply_sorting, QUESTIONS_PAGE_SIZE
+from models import Question, User, BroadTheme, Profile
+
+MARKER = "zzpagination"
+SORT_KEYS = ['question_text', 'broad_theme', 'specific_theme', 'difficulty_level',
+             'is_published', 'created_at', 'author', 'updated_at', 'relevance']
+
+
+def _create_questions(count):
+    profile = Profile.query.filter_by(name='Administrateur').first()
+    admin = User.query.filter_by(profile_id=profile.id, is_active=True).first()
+    theme = BroadTheme(name=f"{MARKER} thème")
+    db.session.add(theme)
+    db.session.flush()
+    for n in range(count):
+        db.session.add(Question(
+            author_id=admin.id,
+            # Textes en double pour exercer le départage par id
+            question_text=f"{MARKER} question {n % 7}",
+            possible_answers="A|||B",
+            correct_answer="1",
+            difficulty_level=(n % 4) or None,
+            is_published=(n % 3 == 0) if n % 5 else None,
+            broad_theme_id=theme.id if n % 2 else None,
+        ))
+    db.session.commit()
+    return admin.id, theme.id
+
+
+def _cleanup(theme_id):
+    Question.query.filter(Question.question_text.startswith(MARKER)).delete(synchronize_session=False)
+    BroadTheme.query.filter_by(id=theme_id).delete()
+    db.session.commit()
+
+
+def _walk(client, view, sort_by, sort_order):
+    url = f"/api/questions/search?q={MARKER}&view={view}&sort_by={sort_by}&sort_order={sort_order}"
+    seen, pages = [], 0
+    while url:
+        resp = client.get(url)
+        assert resp.status_code == 200, resp.status_code
+        html = resp.get_data(as_text=True)
+        seen.extend(int(qid) for qid in re.findall(r'/question/(\d+)/edit', html))
+        more = re.search(r'hx-get="(/api/questions/search\?[^"]*cursor=[^"]+)"', html)
+        url = more.group(1).replace('&amp;', '&') if more else None
+        pages += 1
+    return seen, pages
+
+
+def test_cursor_pagination_all_sort_keys():
+    print("\n=== Test : pagination par curseur de la liste des questions ===")
+    total = QUESTIONS_PAGE_SIZE * 2 + 17
+    with app.app_context():
+        admin_id, theme_id = _create_questions(total)
+    try:
+        client = app.test_client()
+        with client.session_transaction() as sess:
+            sess['user_id'] = admin_id
+        for sort_by in SORT_KEYS:
+            for sort_order in ('asc', 'desc'):
+                with app.app_context():
+                    query, rank_column = _filter_questions_search(_questions_base_query(), MARKER)
+                    expected = [q.id for q in _apply_sorting(query, sort_by, sort_order, rank_column).all()]
+                for view in ('cards', 'table'):
+                    seen, pages = _walk(client, view, sort_by, sort_order)
+                    assert seen == expected, (sort_by, sort_order, view)
+                    assert pages == 3, pages
+        print(f"✅ {total} questions parcourues en 3 pages pour {len(SORT_KEYS)} clés de tri x 2 sens")
+    finally:
+        with app.app_context():
+            _cleanup(theme_id)
+
+
+if __name__ == '__main__':
+    test_cursor_pagination_all_sort_keys()
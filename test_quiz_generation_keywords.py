@@ -5,8 +5,8 @@ Usage:
     python test_quiz_generation_keywords.py
 """
 
-from app import app, db, _generate_quiz_playlist
-from models import QuizRuleSet, Question, Keyword, UserQuestionStat, User
+from app import app, db, _generate_quiz_playlist, _get_user_answered_keywords
+from models import QuizRuleSet, Question, Keyword, UserQuestionStat, User, question_keywords
 
 def test_quiz_generation_basic():
     """Test 1 : Génération basique avec keywords"""
@@ -103,19 +103,19 @@ def test_keyword_stats():
         print(f"  - Sans keywords : {questions_without_keywords}")
         
         # Keywords les plus utilisés
-        from sqlalchemy import func, select
+        from sqlalchemy import func
         result = db.session.query(
             Keyword.name,
-            func.count(db.literal_column('question_id')).label('count')
+            func.count(question_keywords.c.question_id).label('count')
         ).select_from(
-            db.text('question_keywords')
+            question_keywords
         ).join(
             Keyword,
-            Keyword.id == db.literal_column('keyword_id')
+            Keyword.id == question_keywords.c.keyword_id
         ).group_by(
             Keyword.name
         ).order_by(
-            func.count(db.literal_column('question_id')).desc()
+            func.count(question_keywords.c.question_id).desc()
         ).limit(10).all()
         
         if result:
@@ -172,6 +172,50 @@ def test_prevent_duplicate_keywords():
         
         print(f"\n✅ Test terminé. Valeur restaurée: {original_value}")
 
+def test_answered_keywords_lookup():
+    """Test 5 : Keywords déjà répondus (une seule requête, sans liste IN)"""
+    print("\n=== Test 5 : Keywords déjà répondus ===")
+    from sqlalchemy import event
+    with app.app_context():
+        author = User.query.first()
+        player = User(username="zz_answered_keywords", is_active=True)
+        kw_a, kw_b, kw_c = Keyword(name="zz kw a"), Keyword(name="zz kw b"), Keyword(name="zz kw c")
+        db.session.add_all([player, kw_a, kw_b, kw_c])
+        db.session.flush()
+        q1 = Question(author_id=author.id, question_text="zz q1", possible_answers="A|||B", correct_answer="1")
+        q2 = Question(author_id=author.id, question_text="zz q2", possible_answers="A|||B", correct_answer="1")
+        q3 = Question(author_id=author.id, question_text="zz q3", possible_answers="A|||B", correct_answer="1")
+        q1.keywords = [kw_a, kw_b]
+        q2.keywords = [kw_b]
+        q3.keywords = [kw_c]
+        db.session.add_all([q1, q2, q3])
+        db.session.flush()
+        # Le joueur a répondu à q1 et q2, pas à q3
+        db.session.add_all([UserQuestionStat(user_id=player.id, question_id=q1.id, times_answered=1),
+                            UserQuestionStat(user_id=player.id, question_id=q2.id, times_answered=1)])
+        db.session.commit()
+        player_id, expected = player.id, {kw_a.id, kw_b.id}
+        try:
+            statements = []
+            listener = lambda conn, cursor, statement, *args: statements.append(statement)
+            event.listen(db.engine, 'before_cursor_execute', listener)
+            try:
+                answered = _get_user_answered_keywords(player_id)
+            finally:
+                event.remove(db.engine, 'before_cursor_execute', listener)
+            assert answered == expected, answered
+            assert len(statements) == 1, statements
+            assert ' IN ' not in statements[0].upper()
+            print(f"✅ Keywords répondus : {len(answered)} en une requête")
+        finally:
+            for q in (q1, q2, q3):
+                db.session.delete(q)
+            UserQuestionStat.query.filter_by(user_id=player.id).delete()
+            db.session.delete(player)
+            for kw in (kw_a, kw_b, kw_c):
+                db.session.delete(kw)
+            db.session.commit()
+
 def test_all():
     """Exécuter tous les tests"""
     print("=" * 70)
@@ -183,6 +227,7 @@ def test_all():
         test_quiz_generation_with_user()
         test_keyword_stats()
         test_prevent_duplicate_keywords()
+        test_answered_keywords_lookup()
         
         print("\n" + "=" * 70)
         print("✅ Tous les tests sont terminés !")
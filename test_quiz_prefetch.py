@@ -0,0 +1,90 @@
+"""
+Test du préchargement de la question suivante (quiz avec set de règles)
+
+- La page d'une question précharge les images de la question suivante.
+- La page de résultat précharge le fragment de la question suivante via une URL
+  unique (partie + étape) mise en cache privée; le bouton utilise la même URL.
+- Deux rendus de cette URL affichent le même ordre de réponses (celui mémorisé
+  pour valider la réponse).
+- Après la dernière question, pas de préchargement (la page de fin clôt la session).
+- Une réponse rejouée (étape déjà passée) est refusée sans être comptée; une URL
+  d'étape périmée n'est pas mise en cache.
+
+Usage:
+    python test_quiz_prefetch.py
+"""
+
+import re
+
+from app import app, db, invalidate_question_index
+from models import ImageAsset, Profile, Question, QuestionAnswerStat, QuizRuleSet, User
+
+MARKER = "zzprefetch"
+
+
+def _answer(client, slug, question_id, step):
+    resp = client.post('/api/quiz/answer', data={'question_id': question_id, 'selected_answer': '1',
+                                                 'step': step, 'rule_set': slug})
+    assert resp.status_code == 200, resp.status_code
+    return resp.get_data(as_text=True)
+
+
+def test_next_question_prefetch():
+    print("\n=== Test : préchargement de la question suivante ===")
+    with app.app_context():
+        profile = Profile.query.filter_by(name='Administrateur').first()
+        admin = User.query.filter_by(profile_id=profile.id, is_active=True).first()
+        image = ImageAsset(title=f"{MARKER} image", filename=f"{MARKER}.png")
+        questions = [Question(author_id=admin.id, question_text=f"{MARKER} question {i}", is_published=True,
+                              possible_answers="A|||B|||C", correct_answer="1", difficulty_level=1)
+                     for i in range(2)]
+        for question in questions:
+            question.images.append(image)
+        rule_set = QuizRuleSet(name=f"{MARKER} set", slug=MARKER, created_by_user_id=admin.id,
+                               question_selection_mode='manual', prevent_duplicate_keywords=False)
+        rule_set.selected_questions.extend(questions)
+        db.session.add_all([image, rule_set, *questions])
+        db.session.commit()
+        invalidate_question_index()
+        try:
+            client = app.test_client()
+            html = client.get(f'/api/quiz/next?rule_set={MARKER}').get_data(as_text=True)
+            first_id = int(re.search(r'name="question_id" value="(\d+)"', html).group(1))
+            second = next(q for q in questions if q.id != first_id)
+            assert f'rel="prefetch" href="{image.url}"' in html, "images de la question suivante préchargées"
+            print("✅ Images de la question suivante préchargées")
+
+            result = _answer(client, MARKER, first_id, 0)
+            replay = client.post('/api/quiz/answer', data={'question_id': first_id, 'selected_answer': '1',
+                                                           'step': 0, 'rule_set': MARKER})
+            assert replay.status_code == 409
+            assert QuestionAnswerStat.query.filter_by(question_id=first_id).one().selected_count == 1
+            print("✅ Réponse rejouée refusée, comptée une seule fois")
+            next_url = re.search(r'<link rel="prefetch" href="([^"]+)">', result).group(1).replace('&amp;', '&')
+            assert 'step=1' in next_url and 'game=' in next_url, next_url
+            assert f'hx-get="{next_url.replace("&", "&amp;")}"' in result
+            prefetched = client.get(next_url)
+            assert prefetched.cache_control.private and prefetched.cache_control.max_age == app.config['QUIZ_PREFETCH_MAX_AGE']
+            again = client.get(next_url)
+            assert f'value="{second.id}"' in prefetched.get_data(as_text=True)
+            assert prefetched.get_data() == again.get_data(), "même ordre de réponses à chaque rendu"
+            stale = client.get(next_url.replace('step=1', 'step=5'))
+            assert f'value="{second.id}"' in stale.get_data(as_text=True) and not stale.cache_control.max_age
+            print("✅ Fragment préchargé en cache privé, identique au rendu du clic")
+
+            final = _answer(client, MARKER, second.id, 1)
+            assert 'rel="prefetch"' not in final
+            print("✅ Pas de préchargement après la dernière question")
+        finally:
+            db.session.rollback()
+            for question in questions:
+                QuestionAnswerStat.query.filter_by(question_id=question.id).delete()
+                db.session.delete(question)
+            db.session.delete(rule_set)
+            db.session.delete(image)
+            db.session.commit()
+            invalidate_question_index()
+
+
+if __name__ == '__main__':
+    test_next_question_prefetch()
@@ -0,0 +1,52 @@
+"""
+Test du score précompilé par set de règles
+
+- Points de base, bonus additif ou multiplicatif par difficulté (table précalculée).
+- Combo: palier de bonnes réponses consécutives (série tenue dans l'état de quiz).
+
+Usage:
+    python test_quiz_scoring.py
+"""
+
+from models import QuizRuleSet
+from quiz_scoring import compile_scoring
+
+
+def _rule(**fields):
+    defaults = {'scoring_base_points': 10, 'scoring_difficulty_bonus_type': 'none', 'combo_bonus_enabled': False}
+    return QuizRuleSet(**{**defaults, **fields})
+
+
+def test_difficulty_bonus():
+    print("\n=== Test : bonus selon la difficulté ===")
+    assert compile_scoring(_rule())(3, True) == 10
+    assert compile_scoring(_rule())(3, False) == 0
+
+    add = _rule(scoring_difficulty_bonus_type='add')
+    add.set_difficulty_bonus_map({'1': 0, '3': 2.0})
+    score = compile_scoring(add)
+    assert (score(1, True), score(3, True), score(5, True)) == (10, 12.0, 10)
+
+    mult = _rule(scoring_difficulty_bonus_type='mult')
+    mult.set_difficulty_bonus_map({'2': 1.5})
+    score = compile_scoring(mult)
+    assert (score(2, True), score(4, True)) == (15, 10)
+
+    # La table est figée à la compilation: modifier le set ne change pas la fonction déjà compilée
+    mult.set_difficulty_bonus_map({'2': 3})
+    assert score(2, True) == 15
+    print("✅ Bonus additif / multiplicatif, difficulté absente = points de base")
+
+
+def test_combo_from_streak():
+    print("\n=== Test : combo d'après la série ===")
+    score = compile_scoring(_rule(combo_bonus_enabled=True, combo_step=3, combo_bonus_points=5))
+    assert [score(1, True, streak) for streak in range(1, 8)] == [10, 10, 15, 15, 15, 20, 20]
+    assert score(1, False, 0) == 0
+    assert compile_scoring(_rule(combo_bonus_enabled=True, combo_step=None, combo_bonus_points=5))(1, True, 9) == 10
+    print("✅ +5 points par palier de 3 bonnes réponses consécutives")
+
+
+if __name__ == '__main__':
+    test_difficulty_bonus()
+    test_combo_from_streak()
@@ -0,0 +1,79 @@
+"""
+Test des stores d'état de quiz (quiz_state.py)
+
+- Mémoire et SQL: lecture / écriture / suppression, copie à chaque lecture,
+  réécriture de la même clé, expiration.
+- Mémoire: éviction LRU au-delà de max_entries.
+- SQL: l'écriture passe par sa propre transaction et ne valide ni n'annule le
+  travail en cours de la session de la requête.
+
+Usage:
+    python test_quiz_state.py
+"""
+
+from app import app, db
+from models import BroadTheme, QuizState
+from quiz_state import MemoryQuizStateStore, SqlQuizStateStore, create_quiz_state_store
+
+MARKER = "zzquizstate"
+
+
+def _check_store(store, expired_store):
+    key = f"{MARKER}:anon:set"
+    assert store.get(key) is None
+    store.set(key, {'playlist': [1, 2], 'index': 0})
+    state = store.get(key)
+    state['index'] = 5
+    assert store.get(key) == {'playlist': [1, 2], 'index': 0}, "chaque lecture est une copie"
+    store.set(key, {'playlist': [1, 2], 'index': 1})
+    assert store.get(key)['index'] == 1
+    store.delete(key)
+    assert store.get(key) is None
+    expired_store.set(key, {'index': 0})
+    assert expired_store.get(key) is None
+
+
+def test_memory_store():
+    print("\n=== Test : store en mémoire ===")
+    _check_store(MemoryQuizStateStore(60), MemoryQuizStateStore(-1))
+    store = MemoryQuizStateStore(60, max_entries=2)
+    for key in ('a', 'b'):
+        store.set(key, {'key': key})
+    store.get('a')
+    store.set('c', {'key': 'c'})
+    assert store.get('b') is None and store.get('a') and store.get('c'), "la moins récemment utilisée est évincée"
+    print("✅ Lecture/écriture/suppression, expiration et éviction LRU")
+
+
+def test_sql_store():
+    print("\n=== Test : store SQL ===")
+    with app.app_context():
+        store = create_quiz_state_store('sql', 60)
+        assert isinstance(store, SqlQuizStateStore)
+        expired = SqlQuizStateStore(-1)
+        try:
+            _check_store(store, expired)
+            assert expired.purge_expired() >= 1
+            assert db.session.get(QuizState, f"{MARKER}:anon:set") is None
+
+            # Travail en cours de la route: ni validé, ni annulé par l'écriture de l'état
+            theme = BroadTheme(name=f"{MARKER} thème")
+            db.session.add(theme)
+            store.set(f"{MARKER}:pending", {'index': 3})
+            assert theme in db.session.new, "toujours en attente dans la session"
+            with db.engine.connect() as conn:
+                assert not conn.execute(BroadTheme.__table__.select().where(
+                    BroadTheme.__table__.c.name == theme.name)).first(), "pas validé par l'écriture de l'état"
+            db.session.rollback()
+            assert store.get(f"{MARKER}:pending") == {'index': 3}, "pas annulé par le rollback de la route"
+            print("✅ Lecture/écriture (upsert), expiration, purge, session de la requête intacte")
+        finally:
+            db.session.rollback()
+            QuizState.query.filter(QuizState.key.like(f"{MARKER}%")).delete(synchronize_session=False)
+            BroadTheme.query.filter_by(name=f"{MARKER} thème").delete()
+            db.session.commit()
+
+
+if __name__ == '__main__':
+    test_memory_store()
+    test_sql_store()
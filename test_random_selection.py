@@ -0,0 +1,124 @@
+"""
+Test du tirage aléatoire des questions sans ORDER BY RANDOM()
+
+- Le tirage dans l'index respecte les filtres et exclut l'historique, y compris
+  quand l'historique couvre presque tous les candidats; None s'il les couvre tous.
+- Le tirage est uniforme; la liste des candidats est mise en cache par filtres.
+- /api/quiz/next sans set de règles ne trie plus la table (pas de random()) et
+  exclut l'historique tenu côté serveur: le client n'envoie que l'étape.
+  Seule l'étape 0 explicite démarre une nouvelle partie (absente ou invalide: ignorée).
+- L'historique de partie libre est une liste d'IDs triée et bornée (QUIZ_HISTORY_MAX_IDS).
+
+Usage:
+    python test_random_selection.py
+"""
+
+import random
+import re
+from collections import Counter
+
+from sqlalchemy import event
+
+from app import app, db, invalidate_question_index, _record_answered
+from models import BroadTheme, Profile, Question, QuestionAnswerStat, User
+from quiz_index import QuestionIndex, sample_excluding
+
+MARKER = "zzrandom"
+
+
+def test_index_sampling():
+    print("\n=== Test : tirage dans l'index ===")
+    rows = [(qid, 1 + qid % 3, 1, None) for qid in range(1, 31)]
+    index = QuestionIndex(1, rows, [], [])
+    rng = random.Random(7)
+    eligible = index.eligible_ids(difficulties=[2])
+    assert eligible is index.eligible_ids(difficulties=[2]), "liste mise en cache"
+    assert all(qid % 3 == 1 for qid in eligible)
+
+    history = set(eligible[:-1])
+    assert all(index.random_question_id(exclude=history, rng=rng, difficulties=[2]) == eligible[-1] for _ in range(20))
+    assert index.random_question_id(exclude=eligible, difficulties=[2]) is None
+    assert sample_excluding((), ()) is None
+    print("✅ Filtres et historique respectés, None si tout est exclu")
+
+    counts = Counter(sample_excluding(eligible, {eligible[0]}, rng) for _ in range(45_000))
+    assert len(counts) == len(eligible) - 1 and eligible[0] not in counts
+    expected = 45_000 / len(counts)
+    assert all(abs(c - expected) < expected * 0.1 for c in counts.values()), counts
+    print("✅ Tirage uniforme")
+
+
+def test_free_play_history_sorted_and_bounded():
+    print("\n=== Test : historique de partie libre ===")
+    state = {}
+    previous_max = app.config['QUIZ_HISTORY_MAX_IDS']
+    app.config['QUIZ_HISTORY_MAX_IDS'] = 4
+    try:
+        steps = [_record_answered(state, qid, free_play=True) for qid in (9, 3, 7, 3, 1)]
+        assert steps == [1, 2, 3, 4, 5] and state['history'] == [1, 3, 7, 9]
+        _record_answered(state, 5, free_play=True)
+        assert state['history'] == [5] and state['step'] == 6, "historique plein: nouveau cycle"
+        rule_state = {}
+        _record_answered(rule_state, 5, free_play=False)
+        assert rule_state == {'step': 1}
+    finally:
+        app.config['QUIZ_HISTORY_MAX_IDS'] = previous_max
+    print("✅ IDs triés sans doublon, bornés; pas d'historique en partie à set de règles")
+
+
+def test_next_question_without_order_by_random():
+    print("\n=== Test : /api/quiz/next sans set de règles ===")
+    with app.app_context():
+        profile = Profile.query.filter_by(name='Administrateur').first()
+        admin = User.query.filter_by(profile_id=profile.id, is_active=True).first()
+        theme = BroadTheme(name=f"{MARKER} thème")
+        db.session.add(theme)
+        db.session.flush()
+        questions = [Question(author_id=admin.id, question_text=f"{MARKER} {i}", is_published=True,
+                              broad_theme_id=theme.id, possible_answers="A|||B", correct_answer="1")
+                     for i in range(3)]
+        db.session.add_all(questions)
+        db.session.commit()
+        invalidate_question_index()
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        try:
+            client = app.test_client()
+            served = []
+            event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+            try:
+                for step in range(3):
+                    html = client.get(f'/api/quiz/next?broad_theme_id={theme.id}&step={step}').get_data(as_text=True)
+                    assert f'name="step" value="{step}"' in html and 'history' not in html
+                    question_id = int(re.search(r'name="question_id" value="(\d+)"', html).group(1))
+                    served.append(question_id)
+                    result = client.post('/api/quiz/answer', data={'question_id': question_id, 'selected_answer': '1',
+                                                                   'step': step}).get_data(as_text=True)
+                    assert f'"step": "{step + 1}"' in result
+                for query in ('step=3', 'step=abc', 'step=1', ''):
+                    html = client.get(f'/api/quiz/next?broad_theme_id={theme.id}&{query}').get_data(as_text=True)
+                    assert 'Aucune question disponible' in html, query
+            finally:
+                event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+            assert sorted(served) == sorted(q.id for q in questions), served
+            assert not any('random()' in s.lower() for s in statements), "pas de ORDER BY RANDOM()"
+            html = client.get(f'/api/quiz/next?broad_theme_id={theme.id}&step=0').get_data(as_text=True)
+            assert 'name="question_id"' in html, "étape 0: nouvelle partie, historique vidé"
+            print("✅ Questions hors historique (côté serveur) tirées sans ORDER BY RANDOM()")
+        finally:
+            db.session.rollback()
+            for question in questions:
+                QuestionAnswerStat.query.filter_by(question_id=question.id).delete()
+                db.session.delete(question)
+            db.session.delete(theme)
+            db.session.commit()
+            invalidate_question_index()
+
+
+if __name__ == '__main__':
+    test_index_sampling()
+    test_free_play_history_sorted_and_bounded()
+    test_next_question_without_order_by_random()
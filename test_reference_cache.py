@@ -0,0 +1,118 @@
+"""
+Test du cache des données de référence des formulaires et de la galerie paginée
+
+- Un second affichage du formulaire de question ne relit ni les thèmes, ni les
+  sous-thèmes, ni les pays.
+- La création d'un thème invalide le cache (le nouveau thème apparaît).
+- La galerie d'images est paginée ("Charger plus") sans doublon entre pages.
+- Le formulaire d'édition n'embarque que les images liées à la question.
+
+Usage:
+    python test_reference_cache.py
+"""
+
+import re
+
+from sqlalchemy import event
+
+from app import app, db, IMAGES_GALLERY_PAGE_SIZE
+from models import BroadTheme, ImageAsset, Profile, Question, User
+from reference_cache import invalidate_reference_data
+
+MARKER = "zzrefcache"
+
+
+def _admin_client():
+    profile = Profile.query.filter_by(name='Administrateur').first()
+    admin = User.query.filter_by(profile_id=profile.id, is_active=True).first()
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess['user_id'] = admin.id
+    return client, admin.id
+
+
+def _count_statements(client, url, tables):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        resp = client.get(url)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+    assert resp.status_code == 200, resp.status_code
+    hits = [s for s in statements if any(re.search(rf'\bFROM {table}\b', s) for table in tables)]
+    return resp.get_data(as_text=True), hits
+
+
+def test_reference_data_cached_and_invalidated():
+    print("\n=== Test : cache des données de référence du formulaire de question ===")
+    reference_tables = ('broad_themes', 'specific_themes', 'countries')
+    with app.app_context():
+        client, _ = _admin_client()
+        invalidate_reference_data()
+        _, first = _count_statements(client, '/question/new', reference_tables)
+        assert first, "le premier affichage doit charger les listes"
+        _, second = _count_statements(client, '/question/new', reference_tables)
+        assert not second, second
+        print(f"✅ 2e affichage sans requête de référence (1er: {len(first)} requêtes)")
+
+        resp = client.post('/api/theme', data={'name': f"{MARKER} thème", 'embedded': '1'})
+        assert resp.status_code == 200, resp.status_code
+        try:
+            html, hits = _count_statements(client, '/question/new', reference_tables)
+            assert hits, "la création d'un thème doit invalider le cache"
+            assert f"{MARKER} thème" in html
+            print("✅ Thème créé visible immédiatement dans le formulaire")
+        finally:
+            BroadTheme.query.filter(BroadTheme.name.startswith(MARKER)).delete(synchronize_session=False)
+            db.session.commit()
+            invalidate_reference_data()
+
+
+def test_gallery_pagination_and_form_images():
+    print("\n=== Test : galerie d'images paginée ===")
+    total = IMAGES_GALLERY_PAGE_SIZE + 5
+    with app.app_context():
+        client, admin_id = _admin_client()
+        for n in range(total):
+            db.session.add(ImageAsset(title=f"{MARKER} image {n}", filename=f"{MARKER}_{n}.png"))
+        question = Question(author_id=admin_id, question_text=f"{MARKER} question",
+                            possible_answers="A|||B", correct_answer="1")
+        db.session.add(question)
+        db.session.commit()
+        linked = ImageAsset.query.filter_by(filename=f"{MARKER}_0.png").first()
+        question.detailed_answer_image_id = linked.id
+        db.session.commit()
+        question_id = question.id
+    try:
+        url = f'/api/images/gallery?search={MARKER}&select_id=question_image_id'
+        seen, pages = [], 0
+        while url:
+            resp = client.get(url)
+            assert resp.status_code == 200, resp.status_code
+            html = resp.get_data(as_text=True)
+            seen.extend(int(i) for i in re.findall(r'data-image-id="(\d+)"', html))
+            more = re.search(r"fetch\('([^']*page=[^']*)'", html)
+            url = more.group(1).replace('&amp;', '&') if more else None
+            pages += 1
+        assert len(seen) == total and len(set(seen)) == total, (len(seen), len(set(seen)))
+        assert pages == 2, pages
+        print(f"✅ {total} images en {pages} pages, sans doublon")
+
+        html = client.get(f'/question/{question_id}/edit').get_data(as_text=True)
+        embedded = set(re.findall(rf'{MARKER}_(\d+)\.png', html))
+        assert embedded == {'0'}, embedded
+        print("✅ Le formulaire d'édition n'embarque que l'image liée")
+    finally:
+        with app.app_context():
+            Question.query.filter(Question.question_text.startswith(MARKER)).delete(synchronize_session=False)
+            ImageAsset.query.filter(ImageAsset.filename.startswith(MARKER)).delete(synchronize_session=False)
+            db.session.commit()
+
+
+if __name__ == '__main__':
+    test_reference_data_cached_and_invalidated()
+    test_gallery_pagination_and_form_images()
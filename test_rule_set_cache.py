@@ -0,0 +1,84 @@
+"""
+Test du cache des sets de règles (instantanés par slug)
+
+- Une seconde lecture d'un set ne fait aucune requête SQL; les valeurs JSON/CSV
+  sont décodées, les accesseurs retournent des copies et la fonction de score est compilée.
+- Une modification du set ou de ses images (commit) périme l'instantané.
+- La suppression via la route rend le slug inconnu (None), mis en cache lui aussi.
+
+Usage:
+    python test_rule_set_cache.py
+"""
+
+from sqlalchemy import event
+
+from app import app, db
+from models import ImageAsset, Profile, QuizRuleSet, User
+from rule_set_cache import get_rule_set
+
+MARKER = "zzruleset"
+
+
+def _count_queries(fn):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        result = fn()
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+    return result, len(statements)
+
+
+def test_rule_set_snapshot_cache():
+    print("\n=== Test : cache des sets de règles ===")
+    with app.app_context():
+        profile = Profile.query.filter_by(name='Administrateur').first()
+        admin = User.query.filter_by(profile_id=profile.id, is_active=True).first()
+        image = ImageAsset(title=f"{MARKER} image", filename=f"{MARKER}.png")
+        rule = QuizRuleSet(name=f"{MARKER} set", slug=MARKER, created_by_user_id=admin.id, intro_image=image)
+        rule.set_allowed_difficulties([3, 1])
+        rule.set_questions_per_difficulty({'1': 4, '3': 2})
+        db.session.add_all([image, rule])
+        db.session.commit()
+        rule_id = rule.id
+        try:
+            snapshot = get_rule_set(MARKER)
+            again, queries = _count_queries(lambda: get_rule_set(MARKER))
+            assert again is snapshot and queries == 0, queries
+            assert snapshot.get_allowed_difficulties() == [1, 3]
+            snapshot.get_questions_per_difficulty()['1'] = 99
+            assert snapshot.get_questions_per_difficulty() == {'1': 4, '3': 2}
+            assert snapshot.intro_image.url.endswith(f"/{MARKER}.png") and snapshot.selected_question_ids == ()
+            assert snapshot.score(2, True, 1) == rule.scoring_base_points and snapshot.score(2, False) == 0
+            print("✅ Seconde lecture sans requête SQL, valeurs décodées")
+
+            rule.timer_seconds = 12
+            image.filename = f"{MARKER}2.png"
+            db.session.commit()
+            snapshot = get_rule_set(MARKER)
+            assert snapshot.timer_seconds == 12 and snapshot.intro_image.url.endswith(f"/{MARKER}2.png")
+            print("✅ Modification du set ou de son image prise en compte")
+
+            client = app.test_client()
+            with client.session_transaction() as sess:
+                sess['user_id'] = admin.id
+            assert client.delete(f'/api/quiz-rule/{rule_id}').status_code == 200
+            assert get_rule_set(MARKER) is None
+            _, queries = _count_queries(lambda: get_rule_set(MARKER))
+            assert queries == 0, queries
+            print("✅ Set supprimé: slug inconnu, mis en cache")
+        finally:
+            db.session.rollback()
+            rule = db.session.get(QuizRuleSet, rule_id)
+            if rule is not None:
+                db.session.delete(rule)
+            db.session.delete(db.session.get(ImageAsset, image.id))
+            db.session.commit()
+
+
+if __name__ == '__main__':
+    test_rule_set_snapshot_cache()
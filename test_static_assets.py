@@ -0,0 +1,146 @@
+"""
+Test du service des fichiers statiques, sons et images avec cache HTTP
+
+- Les URLs à empreinte (?v=, /sounds/v<empreinte>/, /uploads/v<version>/<id>/,
+  <sha256>.<ext>) sont servies avec Cache-Control immutable; les autres sont revalidées.
+- Une empreinte ou une version périmée n'est pas mise en cache: redirection vers
+  l'URL courante (fichier qui n'est pas celui de l'image, ancien format: revalidé).
+- If-None-Match retourne 304, Range retourne 206 (lecture audio).
+- style.css est servi en version .gz (Content-Encoding) si le client l'accepte.
+
+Usage:
+    python test_static_assets.py
+"""
+
+import gzip
+import os
+from datetime import datetime
+
+from app import app, db
+from models import ImageAsset
+
+
+def test_fingerprinted_urls_are_immutable():
+    print("\n=== Test : URLs à empreinte en cache longue durée ===")
+    client = app.test_client()
+    with app.test_request_context():
+        from flask import render_template_string, url_for
+        css_url = url_for('static', filename='style.css')
+        sound = render_template_string("{{ sound_url('click.mp3') }}")
+    assert '?v=' in css_url, css_url
+    assert sound.startswith('/sounds/v') and sound.endswith('/click.mp3'), sound
+
+    for url in (css_url, sound):
+        resp = client.get(url)
+        assert resp.status_code == 200, (url, resp.status_code)
+        assert resp.cache_control.immutable and resp.cache_control.max_age == 31536000, (url, resp.headers)
+        resp.close()
+    resp = client.get('/sounds/click.mp3')
+    assert not resp.cache_control.immutable and resp.headers.get('ETag'), resp.headers
+    resp.close()
+    print("✅ ?v= et /sounds/v<empreinte>/ immutables, URL nue revalidée")
+
+
+def test_upload_urls():
+    print("\n=== Test : URLs des images envoyées ===")
+    digest = 'a' * 64
+    assert ImageAsset(filename=f"{digest}.webp").url == f"/uploads/{digest}.webp"
+    assert ImageAsset(id=5, filename="ancienne_photo.jpg").url == "/uploads/v0/5/ancienne_photo.jpg"
+    with app.test_request_context():
+        adapter = app.url_map.bind('localhost')
+        assert adapter.match('/uploads/v12/5/photo.webp') == ('uploaded_file_versioned',
+                                                              {'version': 12, 'image_id': 5, 'filename': 'photo.webp'})
+        assert adapter.match('/uploads/v12/photo.webp')[0] == 'uploaded_file_legacy_version'
+        assert adapter.match(f'/uploads/{digest}.webp')[0] == 'uploaded_file'
+    print("✅ Fichier adressé par contenu servi sous son nom, autres sous /uploads/v<version>/<id>/")
+
+
+def test_stale_versions_are_not_immutable():
+    print("\n=== Test : empreintes et versions périmées ===")
+    client = app.test_client()
+    with app.test_request_context():
+        from flask import render_template_string, url_for
+        css_url = url_for('static', filename='style.css')
+        sound = render_template_string("{{ sound_url('click.mp3') }}")
+    for stale, current in (('/static/style.css?v=perime', css_url), ('/sounds/vperime/click.mp3', sound)):
+        resp = client.get(stale)
+        assert resp.status_code == 302 and resp.location == current, (stale, resp.status_code, resp.location)
+        assert not resp.cache_control.immutable
+
+    folder = app.config['UPLOAD_FOLDER']
+    filename, variant = 'zzversion_photo.jpg', 'zzversion_photo_320w.webp'
+    for name in (filename, variant, 'zzversion_orphelin.jpg'):
+        with open(os.path.join(folder, name), 'wb') as f:
+            f.write(b'image')
+    with app.app_context():
+        image = ImageAsset(title='zzversion', filename=filename, updated_at=datetime(2024, 1, 1))
+        image.set_variants([{'width': 320, 'height': 240, 'filename': variant}])
+        db.session.add(image)
+        db.session.commit()
+        image_id, version = image.id, image.file_version
+    try:
+        for name in (filename, variant):
+            resp = client.get(f'/uploads/v{version}/{image_id}/{name}')
+            assert resp.status_code == 200 and resp.cache_control.immutable, (name, resp.headers)
+            resp.close()
+            resp = client.get(f'/uploads/v{version - 1}/{image_id}/{name}')
+            assert resp.status_code == 302 and resp.location == f'/uploads/v{version}/{image_id}/{name}', resp.location
+        for url in (f'/uploads/v{version}/{image_id}/zzversion_orphelin.jpg', f'/uploads/v{version}/{filename}'):
+            resp = client.get(url)
+            assert resp.status_code == 200 and not resp.cache_control.immutable and resp.headers.get('ETag'), url
+            resp.close()
+        print("✅ Version courante immutable, version périmée redirigée, autres fichiers revalidés")
+    finally:
+        with app.app_context():
+            ImageAsset.query.filter_by(id=image_id).delete()
+            db.session.commit()
+        for name in (filename, variant, 'zzversion_orphelin.jpg'):
+            os.remove(os.path.join(folder, name))
+
+
+def test_conditional_and_range_requests():
+    print("\n=== Test : requêtes conditionnelles et partielles ===")
+    client = app.test_client()
+    resp = client.get('/sounds/click.mp3')
+    etag, size = resp.headers['ETag'], len(resp.data)
+    resp = client.get('/sounds/click.mp3', headers={'If-None-Match': etag})
+    assert resp.status_code == 304, resp.status_code
+    resp = client.get('/sounds/click.mp3', headers={'Range': 'bytes=0-99'})
+    assert resp.status_code == 206 and len(resp.data) == 100, resp.status_code
+    assert resp.headers['Content-Range'] == f'bytes 0-99/{size}', resp.headers['Content-Range']
+    resp.close()
+    print("✅ 304 sur If-None-Match, 206 sur Range")
+
+
+def test_precompressed_stylesheet():
+    print("\n=== Test : style.css précompressé ===")
+    path = os.path.join(app.static_folder, 'style.css')
+    gz_path = path + '.gz'
+    existed = os.path.exists(gz_path)
+    with open(path, 'rb') as f:
+        data = f.read()
+    if not existed:
+        with open(gz_path, 'wb') as f:
+            f.write(gzip.compress(data))
+    try:
+        client = app.test_client()
+        resp = client.get('/static/style.css', headers={'Accept-Encoding': 'gzip'})
+        assert resp.headers.get('Content-Encoding') == 'gzip', resp.headers
+        assert resp.mimetype == 'text/css' and 'Accept-Encoding' in resp.headers.get('Vary', '')
+        assert gzip.decompress(resp.data) == data
+        resp.close()
+        resp = client.get('/static/style.css')
+        assert 'Content-Encoding' not in resp.headers and resp.data == data
+        resp.close()
+        print("✅ Version .gz servie avec Content-Encoding, fichier d'origine sinon")
+    finally:
+        if not existed:
+            os.remove(gz_path)
+
+
+if __name__ == '__main__':
+    test_fingerprinted_urls_are_immutable()
+    test_upload_urls()
+    test_stale_versions_are_not_immutable()
+    test_conditional_and_range_requests()
+    test_precompressed_stylesheet()
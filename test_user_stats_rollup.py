@@ -0,0 +1,82 @@
+"""
+Test des agrégats de /me (user_stats_rollups) quand une question change
+
+- Changement de thème / difficulté: les réponses passent dans les nouvelles
+  dimensions (même résultat qu'une reconstruction complète).
+- Suppression de la question (route DELETE): ses réponses sont retirées des
+  agrégats, total compris, et ses statistiques supprimées dans la même transaction.
+
+Usage:
+    python test_user_stats_rollup.py
+"""
+
+from app import app, db
+from answer_stats import AnswerEvent, apply_answer_events, move_question_rollups, rebuild_user_stats_rollup
+from models import BroadTheme, Profile, Question, QuestionAnswerStat, User, UserQuestionStat, UserStatsRollup
+
+MARKER = "zzrollup"
+
+
+def _rollups(user_id):
+    return {(r.dimension, r.dim_key): (r.answered, r.success)
+            for r in UserStatsRollup.query.filter_by(user_id=user_id)}
+
+
+def test_rollups_follow_question_changes():
+    print("\n=== Test : agrégats de /me après modification / suppression ===")
+    with app.app_context():
+        profile = Profile.query.filter_by(name='Administrateur').first()
+        admin = User.query.filter_by(profile_id=profile.id, is_active=True).first()
+        player = User(username=MARKER, is_active=False)
+        themes = [BroadTheme(name=f"{MARKER} {i}") for i in range(2)]
+        db.session.add_all([player, *themes])
+        db.session.flush()
+        questions = [Question(author_id=admin.id, question_text=f"{MARKER} {i}", possible_answers="A|||B",
+                              correct_answer="1", difficulty_level=1, broad_theme_id=themes[0].id)
+                     for i in range(2)]
+        db.session.add_all(questions)
+        db.session.commit()
+        player_id, question_ids = player.id, [q.id for q in questions]
+        try:
+            apply_answer_events([AnswerEvent(qid, player_id, answer, answer == "1")
+                                 for qid in question_ids for answer in ("1", "2", "1")])
+            assert _rollups(player_id)[('difficulty', 1)] == (6, 4)
+
+            question = db.session.get(Question, question_ids[0])
+            old_dims = (question.broad_theme_id, question.specific_theme_id, question.difficulty_level)
+            question.broad_theme_id, question.difficulty_level = themes[1].id, 4
+            move_question_rollups(question.id, old_dims, (themes[1].id, None, 4))
+            db.session.commit()
+            moved = _rollups(player_id)
+            assert moved[('broad_theme', themes[0].id)] == moved[('broad_theme', themes[1].id)] == (3, 2)
+            assert moved[('difficulty', 4)] == (3, 2) and moved[('total', 0)] == (6, 4)
+            rebuild_user_stats_rollup(player_id)
+            assert _rollups(player_id) == moved
+            print("✅ Réponses déplacées vers le nouveau thème / la nouvelle difficulté")
+
+            client = app.test_client()
+            with client.session_transaction() as sess:
+                sess['user_id'] = admin.id
+            assert client.delete(f'/api/question/{question_ids[0]}').status_code == 200
+            db.session.expire_all()
+            remaining = _rollups(player_id)
+            assert remaining == {('total', 0): (3, 2), ('broad_theme', themes[0].id): (3, 2),
+                                 ('specific_theme', 0): (3, 2), ('difficulty', 1): (3, 2)}, remaining
+            assert not UserQuestionStat.query.filter_by(question_id=question_ids[0]).count()
+            assert not QuestionAnswerStat.query.filter_by(question_id=question_ids[0]).count()
+            rebuild_user_stats_rollup(player_id)
+            assert _rollups(player_id) == remaining
+            print("✅ Question supprimée: réponses retirées des agrégats, dimensions vides supprimées")
+        finally:
+            db.session.rollback()
+            UserQuestionStat.query.filter(UserQuestionStat.question_id.in_(question_ids)).delete(synchronize_session=False)
+            QuestionAnswerStat.query.filter(QuestionAnswerStat.question_id.in_(question_ids)).delete(synchronize_session=False)
+            UserStatsRollup.query.filter_by(user_id=player_id).delete()
+            Question.query.filter(Question.id.in_(question_ids)).delete(synchronize_session=False)
+            BroadTheme.query.filter(BroadTheme.name.like(f"{MARKER}%")).delete(synchronize_session=False)
+            User.query.filter_by(id=player_id).delete()
+            db.session.commit()
+
+
+if __name__ == '__main__':
+    test_rollups_follow_question_changes()